@@ -1 +1,546 @@
+"""Declarative workflows: DAGs of DeskBot building blocks defined in YAML or TOML
 
+A workflow names its steps, the action each one runs, the steps it needs
+and the action's parameters (`with`):
+
+    name: tidy-downloads
+    steps:
+      scan:
+        action: scan
+        with: {directories: [~/Downloads]}
+      safe: {action: filter_safe, needs: [scan]}
+      categorize: {action: categorize, needs: [safe]}
+      move: {action: move, needs: [categorize]}
+      screenshot: {action: screenshot}
+      ocr: {action: ocr, needs: [screenshot]}
+      report:
+        action: export
+        needs: [move, ocr]
+        with: {path: ~/deskbot_report.csv}
+
+The same in TOML uses one [steps.<name>] table per step. YAML needs PyYAML;
+TOML is read with the standard library (Python 3.11+) or tomli.
+
+Run with: python -m automation.workflows <file> [--no-cache]
+"""
+import csv
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from queue import Queue
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SOURCE, MAP, REDUCE = 'source', 'map', 'reduce'
+END = None  # queue marker: one upstream step has finished
+
+
+class Action:
+    """A workflow building block
+
+    source  func(params) yields items
+    map     func(items, params) returns one item (or None to drop it) per input
+            item; runs chunk by chunk on the shared thread or process pool
+    reduce  func(items, params) sees every input item at once and yields items
+    Items are JSON-serializable dicts, usually with a 'path'. Cacheable
+    actions must be free of side effects (no moving or writing files) and
+    depend only on their input items, parameters and the settings named in
+    depends_on; bump version when an action's output changes. Map actions
+    whose output also depends on time pass item_key, a function of one
+    item whose result is added to that item's cache key.
+    """
+
+    def __init__(self, name: str, kind: str, func: Callable, cacheable: bool = False,
+                 processes: bool = False, version: int = 1, depends_on: Tuple[str, ...] = (),
+                 item_key: Optional[Callable[[Dict], object]] = None):
+        self.name = name
+        self.kind = kind
+        self.func = func
+        self.cacheable = cacheable
+        self.processes = processes
+        self.version = version
+        self.depends_on = depends_on
+        self.item_key = item_key
+
+    def cache_context(self) -> Dict:
+        """Version and current values of the settings this action's results depend on"""
+        context = {'version': self.version}
+        for name in self.depends_on:
+            value = getattr(settings, name)
+            if isinstance(value, Path) and value.is_file():
+                st = value.stat()
+                value = [str(value), st.st_size, st.st_mtime_ns]  # rule files can change in place
+            context[name] = value
+        return context
+
+
+ACTIONS: Dict[str, Action] = {}
+
+
+def action(name: str, kind: str, cacheable: bool = False, processes: bool = False,
+           version: int = 1, depends_on: Tuple[str, ...] = (),
+           item_key: Optional[Callable[[Dict], object]] = None):
+    """Register a function as a workflow action"""
+    def register(func):
+        ACTIONS[name] = Action(name, kind, func, cacheable, processes, version, depends_on, item_key)
+        return func
+    return register
+
+
+def _file_item(path: Path) -> Optional[Dict]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {'path': str(path), 'size': st.st_size, 'mtime': st.st_mtime}
+
+
+def _paths(params: Dict, key: str, default: Iterable[Path]) -> List[Path]:
+    values = params.get(key)
+    return [Path(value).expanduser() for value in values] if values else list(default)
+
+
+@action('scan', SOURCE)
+def scan_action(params: Dict) -> Iterator[Dict]:
+    """Files under `directories` (default WATCH_DIRECTORIES)"""
+    from core.file_organizer import get_organizer_instance
+    for path in get_organizer_instance().iter_files(_paths(params, 'directories', settings.WATCH_DIRECTORIES)):
+        item = _file_item(path)
+        if item:
+            yield item
+
+
+@action('screenshot', SOURCE)
+def screenshot_action(params: Dict) -> Iterator[Dict]:
+    """One screenshot of the current screen"""
+    from core.ocr_processor import ocr_processor
+    yield _file_item(ocr_processor.take_screenshot())
+
+
+@action('filter_safe', MAP)
+def filter_safe_action(items: List[Dict], params: Dict) -> List[Optional[Dict]]:
+    """Drop files that are too recent (`min_age` seconds), changing or locked"""
+    from core.file_organizer import get_organizer_instance
+    safe, _ = get_organizer_instance().filter_safe_to_move([Path(item['path']) for item in items],
+                                                           params.get('min_age'))
+    safe = {str(path) for path in safe}
+    return [item if item['path'] in safe else None for item in items]
+
+
+def _age_signature(item: Dict) -> Tuple[bool, ...]:
+    """Age rule outcomes for an item, so categories cached before a file aged past a limit are not reused"""
+    from core.categorizer import categorizer
+    mtime = item.get('mtime')
+    if mtime is None:
+        try:
+            mtime = Path(item['path']).stat().st_mtime
+        except OSError:
+            return ()
+    return categorizer.age_signature(mtime)
+
+
+@action('categorize', MAP, cacheable=True,
+        depends_on=('FILE_CATEGORIES', 'CATEGORY_RULES_FILE', 'CONTENT_SNIFFING'), item_key=_age_signature)
+def categorize_action(items: List[Dict], params: Dict) -> List[Optional[Dict]]:
+    """Add each file's category (rules, extension and optional content sniffing)"""
+    from core.file_organizer import get_organizer_instance
+    categories = get_organizer_instance().categorize_batch([Path(item['path']) for item in items])
+    return [{**item, 'category': categories[Path(item['path'])]} for item in items]
+
+
+@action('dedup', REDUCE)
+def dedup_action(items: List[Dict], params: Dict) -> Iterator[Dict]:
+    """Apply `duplicate_action` (default DUPLICATE_ACTION) across all input files"""
+    from core.duplicate_detector import DuplicateDetector
+    by_path = {item['path']: item for item in items}
+    kept, _ = DuplicateDetector(params.get('duplicate_action')).process([Path(path) for path in by_path])
+    for path in kept:
+        yield by_path[str(path)]
+
+
+@action('backup', MAP)
+def backup_action(items: List[Dict], params: Dict) -> List[Optional[Dict]]:
+    """Back each file up to the content-addressed backup store"""
+    from core.backup_store import backup_store
+    from core.file_organizer import get_organizer_instance
+    throttle = get_organizer_instance().throttle
+    results = []
+    for item in items:
+        try:
+            results.append({**item, 'backup': str(backup_store.backup(Path(item['path']), throttle=throttle))})
+        except Exception as e:
+            logger.error(f"Workflow backup failed for {item['path']}: {e}")
+            results.append(None)
+    return results
+
+
+@action('move', MAP)
+def move_action(items: List[Dict], params: Dict) -> List[Optional[Dict]]:
+    """Move categorized files into ORGANIZED_FILES_DIR/<category>; failed moves are dropped"""
+    from core.file_organizer import get_organizer_instance
+    organizer = get_organizer_instance()
+    results = []
+    for item in items:
+        with organizer.throttle.slot():
+            moved = organizer.move_file(Path(item['path']), item.get('category') or params.get('category', 'others'))
+        results.append({**item, 'moved': True} if moved else None)
+    return results
+
+
+@action('ocr', MAP, cacheable=True, processes=True,
+        depends_on=('OCR_LANGUAGE', 'OCR_STRUCTURED', 'OCR_MIN_CONFIDENCE', 'OCR_PREPROCESS', 'OCR_SOURCE_DPI',
+                    'OCR_TARGET_DPI', 'OCR_BLANK_TOLERANCE', 'OCR_THRESHOLD_RADIUS', 'OCR_THRESHOLD_OFFSET',
+                    'TESSERACT_PATH'))
+def ocr_action(items: List[Dict], params: Dict) -> List[Optional[Dict]]:
+    """Add the OCR text of each image (one tesseract run per chunk, in a worker process)"""
+    from core.ocr_processor import OCRPreprocessor, _ocr_files, ocr_config
+    preprocessor = OCRPreprocessor(params.get('preprocess'))
+    results = _ocr_files([item['path'] for item in items], ocr_config(preprocessor.dpi),
+                         settings.TESSERACT_PATH or None, preprocessor.steps,
+                         settings.OCR_MIN_CONFIDENCE if settings.OCR_STRUCTURED else None)
+    return [{**item, 'text': text} for item, (text, _) in zip(items, results)]
+
+
+@action('export', REDUCE)
+def export_action(items: List[Dict], params: Dict) -> Iterator[Dict]:
+    """Write all input items to `path` as CSV, or JSON Lines for a .jsonl path"""
+    path = Path(params.get('path') or settings.DATA_DIR / "exports" / "workflow.csv").expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        else:
+            fieldnames = list(dict.fromkeys(key for item in items for key in item))
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(items)
+    logger.info(f"Exported {len(items)} workflow items to {path}")
+    yield {'path': str(path), 'rows': len(items)}
+
+
+class Step:
+    def __init__(self, name: str, data: Dict):
+        if not isinstance(data, dict) or 'action' not in data:
+            raise ValueError(f"Workflow step {name!r} needs an action")
+        self.name = name
+        self.action = data['action']
+        needs = data.get('needs') or []
+        # Each upstream step sends one END marker, so a step may only be listed once
+        self.needs = [needs] if isinstance(needs, str) else list(dict.fromkeys(needs))
+        self.params = data.get('with') or {}
+        self.cache = data.get('cache', True)
+
+
+class Workflow:
+    """A validated DAG of steps"""
+
+    def __init__(self, name: str, steps: Dict[str, Dict]):
+        self.name = name
+        if not steps:
+            raise ValueError(f"Workflow {name!r} has no steps")
+        self.steps = {step_name: Step(step_name, data) for step_name, data in steps.items()}
+        for step in self.steps.values():
+            if step.action not in ACTIONS:
+                raise ValueError(f"Step {step.name!r} uses unknown action {step.action!r} "
+                                 f"(available: {', '.join(sorted(ACTIONS))})")
+            missing = [need for need in step.needs if need not in self.steps]
+            if missing:
+                raise ValueError(f"Step {step.name!r} needs unknown steps: {', '.join(missing)}")
+            kind = ACTIONS[step.action].kind
+            if kind == SOURCE and step.needs:
+                raise ValueError(f"Step {step.name!r}: {step.action} is a source and cannot have needs")
+            if kind != SOURCE and not step.needs:
+                raise ValueError(f"Step {step.name!r}: {step.action} needs an input step")
+        self.order = self._topological_order()
+        self.consumers = {name: [step.name for step in self.steps.values() if name in step.needs]
+                          for name in self.steps}
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(step.needs) for name, step in self.steps.items()}
+        order = []
+        while remaining:
+            ready = sorted(name for name, needs in remaining.items() if not needs)
+            if not ready:
+                raise ValueError(f"Workflow {self.name!r} has a dependency cycle among: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+                for needs in remaining.values():
+                    needs.discard(name)
+            order.extend(ready)
+        return order
+
+    @classmethod
+    def load(cls, path: Path) -> "Workflow":
+        """Read a workflow from a .yaml/.yml or .toml file"""
+        path = Path(path)
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("YAML workflows need PyYAML (pip install pyyaml); TOML works without it")
+            with open(path, encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        elif path.suffix.lower() == '.toml':
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                try:
+                    import tomli as tomllib
+                except ImportError:
+                    raise RuntimeError("TOML workflows need Python 3.11+ or tomli (pip install tomli)")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            raise ValueError(f"Unsupported workflow file type: {path.suffix} (use .yaml, .yml or .toml)")
+        if not isinstance(data, dict):
+            raise ValueError(f"Workflow file {path} does not define a mapping")
+        return cls(data.get('name') or path.stem, data.get('steps') or {})
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class WorkflowCache:
+    """SQLite (WAL) store of step results keyed by input fingerprint
+
+    Map steps cache the result of every item; reduce steps cache their whole
+    output under the fingerprint of all their input items. Keys also cover
+    the action's version, the settings it depends on and, for map steps, its
+    item_key (e.g. which age rules a file passes).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or settings.DATA_DIR / "workflow_cache.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS results "
+                               "(key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)")
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, object]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, entries: Dict[str, object]):
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO results (key, value, updated_at) VALUES (?, ?, ?)",
+                             [(key, json.dumps(value), now) for key, value in entries.items()])
+            conn.commit()
+
+
+class WorkflowRunner:
+    """Runs all steps of a workflow concurrently, streaming items between them
+
+    Every step has a coordinator thread. Items travel in chunks of
+    WORKFLOW_CHUNK_SIZE through a bounded inbox (WORKFLOW_QUEUE_SIZE chunks)
+    per step, so a fast producer blocks until its consumers catch up.
+    Independent steps therefore run in parallel. Map chunks are processed on
+    a shared thread pool (WORKFLOW_WORKERS) or, for CPU-bound actions like
+    OCR, a shared process pool (OCR_WORKERS), with a bounded number of chunks
+    in flight per step. A failed step ends its output; steps that depend on it
+    are reported as upstream_failed instead of running on partial input.
+    """
+
+    def __init__(self, workflow: Workflow, use_cache: bool = True, cache: Optional[WorkflowCache] = None):
+        self.workflow = workflow
+        self.use_cache = use_cache
+        self.cache = cache or WorkflowCache()
+        self.chunk_size = settings.WORKFLOW_CHUNK_SIZE
+        self.max_in_flight = max(1, settings.WORKFLOW_WORKERS)
+        self.thread_pool = None
+        self.process_pool = None
+        self._process_lock = threading.Lock()
+        self.inboxes = {name: Queue(maxsize=settings.WORKFLOW_QUEUE_SIZE) for name in workflow.steps}
+        self.open_inputs = {name: len(step.needs) for name, step in workflow.steps.items()}
+        self.stats = {name: {'status': 'pending', 'items_in': 0, 'items_out': 0, 'cache_hits': 0,
+                             'seconds': 0.0, 'error': None} for name in workflow.steps}
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._process_lock:
+            if self.process_pool is None:
+                self.process_pool = ProcessPoolExecutor(max_workers=settings.OCR_WORKERS)
+            return self.process_pool
+
+    def run(self) -> Dict[str, Dict]:
+        """Run the workflow to completion and return per-step stats"""
+        start = time.perf_counter()
+        steps = self.workflow.order
+        self.thread_pool = ThreadPoolExecutor(max_workers=settings.WORKFLOW_WORKERS, thread_name_prefix="workflow")
+        try:
+            with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="workflow-step") as coordinators:
+                for future in [coordinators.submit(self._run_step, name) for name in steps]:
+                    future.result()
+        finally:
+            self.thread_pool.shutdown(wait=True)
+            if self.process_pool:
+                self.process_pool.shutdown(wait=True)
+        summary = ", ".join(f"{name}: {stats['status']}" for name, stats in self.stats.items())
+        logger.info(f"Workflow {self.workflow.name} finished in {time.perf_counter() - start:.2f}s ({summary})")
+        return self.stats
+
+    def _emit(self, name: str, items: List[Dict]):
+        if not items:
+            return
+        self.stats[name]['items_out'] += len(items)
+        for consumer in self.workflow.consumers[name]:
+            self.inboxes[consumer].put(items)  # blocks while the consumer is behind
+
+    def _emit_stream(self, name: str, items: Iterable[Dict]):
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self._emit(name, chunk)
+                chunk = []
+        self._emit(name, chunk)
+
+    def _input(self, name: str) -> Iterator[List[Dict]]:
+        """Chunks from all upstream steps, until each of them has finished"""
+        while self.open_inputs[name]:
+            chunk = self.inboxes[name].get()
+            if chunk is END:
+                self.open_inputs[name] -= 1
+                continue
+            self.stats[name]['items_in'] += len(chunk)
+            yield chunk
+
+    def _run_step(self, name: str):
+        step = self.workflow.steps[name]
+        action = ACTIONS[step.action]
+        stats = self.stats[name]
+        start = time.perf_counter()
+        stats['status'] = 'running'
+        try:
+            if action.kind == SOURCE:
+                self._emit_stream(name, action.func(step.params))
+            elif action.kind == MAP:
+                self._run_map(step, action)
+            else:
+                self._run_reduce(step, action)
+            if stats['status'] == 'running':
+                stats['status'] = 'ok'
+        except Exception as e:
+            stats['status'], stats['error'] = 'failed', str(e)
+            logger.error(f"Workflow step {name} ({step.action}) failed: {e}")
+            for _ in self._input(name):  # keep upstream steps from blocking on a full inbox
+                pass
+        finally:
+            stats['seconds'] = round(time.perf_counter() - start, 3)
+            for consumer in self.workflow.consumers[name]:
+                self.inboxes[consumer].put(END)
+
+    def _upstream_failed(self, step: Step) -> bool:
+        return any(self.stats[need]['status'] in ('failed', 'upstream_failed') for need in step.needs)
+
+    def _submit(self, action: Action, items: List[Dict], params: Dict) -> Future:
+        pool = self._process_pool() if action.processes else self.thread_pool
+        return pool.submit(action.func, items, params)
+
+    def _run_map(self, step: Step, action: Action):
+        cacheable = self.use_cache and step.cache and action.cacheable
+        context = action.cache_context() if cacheable else None
+        in_flight = deque()
+        for chunk in self._input(step.name):
+            if self._upstream_failed(step):
+                continue
+            keys = [self._item_key(step, action, context, item) for item in chunk] if cacheable else []
+            cached = self.cache.get_many(keys) if cacheable else {}
+            self.stats[step.name]['cache_hits'] += len(cached)
+            misses = [item for i, item in enumerate(chunk) if not cacheable or keys[i] not in cached]
+            future = self._submit(action, misses, step.params) if misses else None
+            in_flight.append((chunk, keys, cached, future))
+            while len(in_flight) > self.max_in_flight:
+                self._finish_map(step, in_flight.popleft())
+        while in_flight:
+            self._finish_map(step, in_flight.popleft())
+        if self._upstream_failed(step):
+            self.stats[step.name]['status'] = 'upstream_failed'
+
+    @staticmethod
+    def _item_key(step: Step, action: Action, context: Dict, item: Dict) -> str:
+        if action.item_key is None:
+            return fingerprint(step.action, context, step.params, item)
+        return fingerprint(step.action, context, step.params, item, action.item_key(item))
+
+    def _finish_map(self, step: Step, entry):
+        chunk, keys, cached, future = entry
+        computed = iter(future.result() if future else [])
+        results, new_entries = [], {}
+        for i, item in enumerate(chunk):
+            if keys and keys[i] in cached:
+                result = cached[keys[i]]
+            else:
+                result = next(computed)
+                if keys:
+                    new_entries[keys[i]] = result
+            if result is not None:
+                results.append(result)
+        self.cache.put_many(new_entries)
+        self._emit(step.name, results)
+
+    def _run_reduce(self, step: Step, action: Action):
+        items = [item for chunk in self._input(step.name) for item in chunk]
+        if self._upstream_failed(step):
+            self.stats[step.name]['status'] = 'upstream_failed'
+            return
+        cacheable = self.use_cache and step.cache and action.cacheable
+        key = None
+        if cacheable:
+            key = fingerprint(step.action, action.cache_context(), step.params,
+                              sorted(fingerprint(item) for item in items))
+        if key:
+            cached = self.cache.get_many([key])
+            if key in cached:
+                self.stats[step.name].update(status='cached', cache_hits=len(items))
+                self._emit_stream(step.name, cached[key])
+                return
+        results = list(action.func(items, step.params))
+        if key:
+            self.cache.put_many({key: results})
+        self._emit_stream(step.name, results)
+
+
+def run_workflow(path: Path, use_cache: bool = True) -> Dict[str, Dict]:
+    """Load and run a workflow file"""
+    return WorkflowRunner(Workflow.load(path), use_cache=use_cache).run()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    if len(args) != 1:
+        sys.exit("usage: python -m automation.workflows <workflow.yaml|workflow.toml> [--no-cache]")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for step_name, step_stats in run_workflow(Path(args[0]), use_cache="--no-cache" not in sys.argv).items():
+        error = f"  {step_stats['error']}" if step_stats['error'] else ""
+        print(f"{step_name:<16}{step_stats['status']:<17}in {step_stats['items_in']:<7}out {step_stats['items_out']:<7}"
+              f"cached {step_stats['cache_hits']:<7}{step_stats['seconds']:.2f}s{error}")
@@ -16,6 +16,7 @@ class Settings:
         self.SCREENSHOTS_DIR = self.DATA_DIR / "screenshots"
         self.ORGANIZED_FILES_DIR = self.DATA_DIR / "organized_files"
         self.LOGS_DIR = self.DATA_DIR / "logs"
+        self.DUPLICATES_DIR = self.DATA_DIR / "duplicates"
 
         # File categories
         self.FILE_CATEGORIES = {
@@ -23,13 +24,22 @@ class Settings:
             'documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt'],
             'spreadsheets': ['.xls', '.xlsx', '.csv', '.ods'],
             'presentations': ['.ppt', '.pptx', '.odp'],
-            'archives': ['.zip', '.rar', '.7z', '.tar', '.gz'],
+            'archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.tgz', '.tar.gz', '.tar.bz2', '.tar.xz'],
             'executables': ['.exe', '.msi', '.dmg', '.pkg', '.deb', '.rpm'],
             'videos': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv'],
             'audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg'],
             'code': ['.py', '.js', '.html', '.css', '.cpp', '.java', '.c']
         }
 
+        # Optional JSON file with user categorization rules (see config/category_rules.example.json)
+        custom_rules = os.getenv('CATEGORY_RULES_FILE', '').strip()
+        self.CATEGORY_RULES_FILE = Path(custom_rules) if custom_rules else None
+        self._extension_index = None
+
+        # Content sniffing: off, unknown (only files the extension can't place) or all (also fix mislabeled files)
+        self.CONTENT_SNIFFING = os.getenv('CONTENT_SNIFFING', 'off').lower()
+        self.SNIFF_WORKERS = int(os.getenv('SNIFF_WORKERS', '8'))
+
         # Create directories if they don't exist
         self._create_directories()
         
@@ -41,37 +51,102 @@ class Settings:
             *self._get_custom_watch_dirs()
         ]
         
+        # Directory scanning settings
+        self.SCAN_RECURSIVE = os.getenv('SCAN_RECURSIVE', 'false').lower() == 'true'
+        self.SCAN_MAX_DEPTH = self._get_optional_int('SCAN_MAX_DEPTH')  # None = unlimited
+        self.SCAN_IGNORE_PATTERNS = [p.strip() for p in os.getenv('SCAN_IGNORE_PATTERNS', '.*').split(',') if p.strip()]
+        self.SCAN_SYMLINKS = os.getenv('SCAN_SYMLINKS', 'files').lower()  # skip, files or follow
+        self.SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', '4'))
+        
         # Screenshot settings
         self.SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'PNG')
         self.SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '85'))
         self.AUTO_SCREENSHOT_INTERVAL = int(os.getenv('AUTO_SCREENSHOT_INTERVAL', '300'))  # seconds
+        self.SCREENSHOT_ARCHIVE = os.getenv('SCREENSHOT_ARCHIVE', 'true').lower() == 'true'  # keep captures after OCR
+        self.SCREENSHOT_COMPRESSION = int(os.getenv('SCREENSHOT_COMPRESSION', '1'))  # PNG zlib level 0-9
         
         # OCR settings
         self.OCR_LANGUAGE = os.getenv('OCR_LANGUAGE', 'eng')
-        self.OCR_MIN_CONFIDENCE = int(os.getenv('OCR_MIN_CONFIDENCE', '50'))
+        self.OCR_MIN_CONFIDENCE = int(os.getenv('OCR_MIN_CONFIDENCE', '50'))  # words below are dropped from structured OCR
+        self.OCR_STRUCTURED = os.getenv('OCR_STRUCTURED', 'true').lower() == 'true'  # word boxes/confidence saved as .jsonl
         self.OCR_ENABLED = os.getenv('OCR_ENABLED', 'true').lower() == 'true'
         self.TESSERACT_PATH = os.getenv('TESSERACT_PATH', '').strip()
+        self.OCR_SKIP_UNCHANGED = os.getenv('OCR_SKIP_UNCHANGED', 'true').lower() == 'true'  # auto screenshots only
+        self.OCR_CHANGE_HASH_SIZE = int(os.getenv('OCR_CHANGE_HASH_SIZE', '32'))  # difference hash is size x size bits
+        self.OCR_CHANGE_THRESHOLD = int(os.getenv('OCR_CHANGE_THRESHOLD', '1'))  # differing bits still treated as unchanged
+        self.OCR_INCREMENTAL = os.getenv('OCR_INCREMENTAL', 'true').lower() == 'true'  # auto screenshots re-OCR changed tiles only
+        self.OCR_TILE_SIZE = int(os.getenv('OCR_TILE_SIZE', '128'))  # pixels
+        self.OCR_TILE_DIFF_THRESHOLD = int(os.getenv('OCR_TILE_DIFF_THRESHOLD', '24'))  # grey levels ignored as noise
+        self.OCR_WORKERS = self._get_optional_int('OCR_WORKERS') or max(1, (os.cpu_count() or 2) // 2)  # batch OCR processes
+        self.OCR_BATCH_CHUNK = int(os.getenv('OCR_BATCH_CHUNK', '8'))  # images per tesseract run in batch OCR
+        self.OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', '4'))  # pending GUI/auto-screenshot OCR jobs
+        self.OCR_PREPROCESS = [s.strip().lower() for s in os.getenv('OCR_PREPROCESS', 'grayscale,crop').split(',') if s.strip()]
+        self.OCR_SOURCE_DPI = int(os.getenv('OCR_SOURCE_DPI', '96'))  # screen resolution of captures
+        self.OCR_TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', '192'))  # resolution after the scale step
+        self.OCR_BLANK_TOLERANCE = int(os.getenv('OCR_BLANK_TOLERANCE', '8'))  # grey levels treated as background by crop
+        self.OCR_THRESHOLD_RADIUS = int(os.getenv('OCR_THRESHOLD_RADIUS', '15'))  # neighbourhood for adaptive threshold
+        self.OCR_THRESHOLD_OFFSET = int(os.getenv('OCR_THRESHOLD_OFFSET', '12'))  # grey levels from the local mean that count as ink
+        self.OCR_INDEX_ENABLED = os.getenv('OCR_INDEX_ENABLED', 'true').lower() == 'true'  # full-text search over OCR results
         
         # System monitoring settings
-        self.MONITOR_INTERVAL = int(os.getenv('MONITOR_INTERVAL', '60'))  # seconds
+        self.MONITOR_INTERVAL = int(os.getenv('MONITOR_INTERVAL', '5'))  # seconds between background samples
+        self.METRICS_PERSIST = os.getenv('METRICS_PERSIST', 'true').lower() == 'true'
+        self.METRICS_DIR = self.DATA_DIR / "metrics"
+        self.METRICS_RAW_SAMPLES = int(os.getenv('METRICS_RAW_SAMPLES', '720'))  # raw samples kept per metric
         self.CPU_THRESHOLD = int(os.getenv('CPU_THRESHOLD', '80'))  # percent
         self.MEMORY_THRESHOLD = int(os.getenv('MEMORY_THRESHOLD', '85'))  # percent
         self.DISK_THRESHOLD = int(os.getenv('DISK_THRESHOLD', '90'))  # percent
+        self.PROCESS_SAMPLE_INTERVAL = int(os.getenv('PROCESS_SAMPLE_INTERVAL', '15'))  # seconds between top-process samples; 0 disables
+        self.PROCESS_TOP_N = int(os.getenv('PROCESS_TOP_N', '5'))
+        self.ALERT_SUSTAIN_SECONDS = int(os.getenv('ALERT_SUSTAIN_SECONDS', '120'))  # CPU/memory must stay above threshold this long
+        self.ALERT_HYSTERESIS = int(os.getenv('ALERT_HYSTERESIS', '5'))  # percent below threshold before an alert resolves
+        self.DISK_FILL_ALERT_HOURS = int(os.getenv('DISK_FILL_ALERT_HOURS', '24'))  # alert when the disk is predicted full sooner
         
         # Automation settings
         self.AUTO_ORGANIZE_ENABLED = os.getenv('AUTO_ORGANIZE_ENABLED', 'true').lower() == 'true'
         self.AUTO_ORGANIZE_INTERVAL = int(os.getenv('AUTO_ORGANIZE_INTERVAL', '1800'))  # seconds
+        self.AUTO_ORGANIZE_CRON = os.getenv('AUTO_ORGANIZE_CRON', '').strip()  # cron expression; overrides the interval
+        self.SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '2'))  # default pool for scheduled jobs
+        self.SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', '30'))  # max random delay (seconds) for organize runs
+        self.SCHEDULER_MISFIRE_GRACE = float(os.getenv('SCHEDULER_MISFIRE_GRACE', '60'))  # seconds late before a run counts as missed
+        self.DAEMON_WATCH = os.getenv('DAEMON_WATCH', 'false').lower() == 'true'  # watch mode in `python -m deskbot daemon`
+        self.DAEMON_SCREENSHOTS = os.getenv('DAEMON_SCREENSHOTS', 'false').lower() == 'true'  # needs a display
+        self.WORKFLOW_WORKERS = int(os.getenv('WORKFLOW_WORKERS', '4'))  # shared thread pool for workflow steps
+        self.WORKFLOW_CHUNK_SIZE = int(os.getenv('WORKFLOW_CHUNK_SIZE', '100'))  # items passed between steps at a time
+        self.WORKFLOW_QUEUE_SIZE = int(os.getenv('WORKFLOW_QUEUE_SIZE', '8'))  # chunks buffered per step before producers block
         self.BACKUP_BEFORE_ORGANIZE = os.getenv('BACKUP_BEFORE_ORGANIZE', 'true').lower() == 'true'
+        self.BACKUP_RETENTION_DAYS = int(os.getenv('BACKUP_RETENTION_DAYS', '30'))  # 0 = keep forever
+        self.BACKUP_GC_INTERVAL = int(os.getenv('BACKUP_GC_INTERVAL', '86400'))  # seconds
+        self.DUPLICATE_ACTION = os.getenv('DUPLICATE_ACTION', 'none').lower()  # none, skip, hardlink or quarantine
+        self.MOVE_WORKERS_PER_DEVICE = int(os.getenv('MOVE_WORKERS_PER_DEVICE', '4'))  # SSD / network targets
+        self.MOVE_WORKERS_ROTATIONAL = int(os.getenv('MOVE_WORKERS_ROTATIONAL', '1'))  # spinning disks
+        self.MOVE_COPY_WORKERS = int(os.getenv('MOVE_COPY_WORKERS', '2'))  # cross-device copies in flight
+        self.THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'true').lower() == 'true'
+        self.THROTTLE_CHECK_INTERVAL = int(os.getenv('THROTTLE_CHECK_INTERVAL', '2'))  # seconds
+        self.THROTTLE_MAX_MB_PER_SEC = int(os.getenv('THROTTLE_MAX_MB_PER_SEC', '0'))  # copy bandwidth cap; 0 = unlimited while idle
+        self.THROTTLE_DISK_BUSY_MB_PER_SEC = int(os.getenv('THROTTLE_DISK_BUSY_MB_PER_SEC', '50'))  # other programs' disk I/O that counts as busy
+        self.BACKGROUND_NICE = int(os.getenv('BACKGROUND_NICE', '10'))  # 0 keeps normal CPU priority
+        self.BACKGROUND_IO_CLASS = os.getenv('BACKGROUND_IO_CLASS', 'idle').lower()  # idle, best-effort or none
+        
+        # Watch mode settings
+        self.WATCH_DEBOUNCE_SECONDS = float(os.getenv('WATCH_DEBOUNCE_SECONDS', '5'))  # quiet time before a file is organized
+        self.WATCH_POLL_INTERVAL = float(os.getenv('WATCH_POLL_INTERVAL', '10'))  # seconds, polling fallback only
+        self.WATCH_FORCE_POLLING = os.getenv('WATCH_FORCE_POLLING', 'false').lower() == 'true'
         
         # GUI settings
         self.WINDOW_WIDTH = int(os.getenv('WINDOW_WIDTH', '800'))
         self.WINDOW_HEIGHT = int(os.getenv('WINDOW_HEIGHT', '600'))
         self.THEME = os.getenv('THEME', 'light')  # light or dark
+        self.SESSION_LOG_LIMIT = int(os.getenv('SESSION_LOG_LIMIT', '10000'))  # GUI event log entries kept
         
         # Logging settings
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
         self.LOG_MAX_SIZE = int(os.getenv('LOG_MAX_SIZE', '10485760'))  # 10MB
         self.LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+        self.LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'  # write from a QueueListener thread
+        self.LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # text or json (JSON Lines)
+        self.LOG_COMPRESS = os.getenv('LOG_COMPRESS', 'true').lower() == 'true'  # gzip rotated files
+        self.LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '500'))  # records written per flush
         
         # Security settings (for keyring integration)
         self.USE_KEYRING = os.getenv('USE_KEYRING', 'false').lower() == 'true'
@@ -100,13 +175,20 @@ class Settings:
             return [Path(dir_path.strip()) for dir_path in custom_dirs.split(',')]
         return []
 
+    def _get_optional_int(self, key):
+        """Read an integer from environment, returning None when unset or empty"""
+        value = os.getenv(key, '').strip()
+        return int(value) if value else None
+
     def get_category_for_extension(self, extension):
-        """Get file category for a given extension"""
-        extension = extension.lower()
-        for category, extensions in self.FILE_CATEGORIES.items():
-            if extension in extensions:
-                return category
-        return 'others'
+        """Get file category for a given extension (multi-part extensions like .tar.gz included)"""
+        if self._extension_index is None:
+            self._extension_index = {
+                ext: category
+                for category, extensions in self.FILE_CATEGORIES.items()
+                for ext in extensions
+            }
+        return self._extension_index.get(extension.lower(), 'others')
     
     def get_organized_path(self, category, filename):
         """Get the organized file path for a given category and filename"""
@@ -116,6 +198,8 @@ class Settings:
         """Update a setting value dynamically"""
         if hasattr(self, key):
             setattr(self, key, value)
+            if key == 'FILE_CATEGORIES':
+                self._extension_index = None
             return True
         return False
     
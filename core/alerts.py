@@ -0,0 +1,166 @@
+import math
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ThresholdRule:
+    """Fires when a metric stays above threshold for `duration` seconds
+
+    The alert only resolves once the value drops below threshold - hysteresis,
+    so a value hovering around the threshold doesn't flap. State is a couple
+    of numbers, so each sample is evaluated in O(1).
+    """
+
+    def __init__(self, name: str, metric: str, threshold: float, duration: float = 0,
+                 hysteresis: float = 0):
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.duration = duration
+        self.hysteresis = hysteresis
+        self.active = False
+        self._breach_start = None
+
+    def evaluate(self, value: float, timestamp: float) -> Optional[Dict]:
+        if self.active:
+            if value < self.threshold - self.hysteresis:
+                self.active = False
+                self._breach_start = None
+                return {'state': 'resolved',
+                        'message': f"{self.metric} back to {value:.1f}% (threshold {self.threshold}%)"}
+            return None
+        if value <= self.threshold:
+            self._breach_start = None
+            return None
+        if self._breach_start is None:
+            self._breach_start = timestamp
+        if timestamp - self._breach_start >= self.duration:
+            self.active = True
+            sustained = f" for {self.duration:.0f}s" if self.duration else ""
+            return {'state': 'firing',
+                    'message': f"{self.metric} at {value:.1f}% above {self.threshold}%{sustained}"}
+        return None
+
+
+class RateRule:
+    """Fires when a metric rising at its current rate would reach `limit` within `horizon` seconds
+
+    The rate of change is an exponentially weighted moving average with time
+    constant `smoothing` seconds, updated in O(1) per sample. Nothing fires
+    until one smoothing window has been observed, so a single jump in a
+    coarse percentage doesn't predict a full disk. Used for disk fill rate
+    with a predicted time until full.
+    """
+
+    def __init__(self, name: str, metric: str, horizon: float, limit: float = 100.0,
+                 smoothing: float = 600.0):
+        self.name = name
+        self.metric = metric
+        self.horizon = horizon
+        self.limit = limit
+        self.smoothing = smoothing
+        self.active = False
+        self.rate = 0.0  # units per second
+        self._last = None
+        self._first_timestamp = None
+
+    def time_until_limit(self, value: float) -> Optional[float]:
+        if self.rate <= 0:
+            return None
+        return max(0.0, (self.limit - value) / self.rate)
+
+    def evaluate(self, value: float, timestamp: float) -> Optional[Dict]:
+        if self._last is not None:
+            last_value, last_timestamp = self._last
+            dt = timestamp - last_timestamp
+            if dt > 0:
+                alpha = 1 - math.exp(-dt / self.smoothing)
+                self.rate += alpha * ((value - last_value) / dt - self.rate)
+        else:
+            self._first_timestamp = timestamp
+        self._last = (value, timestamp)
+        if timestamp - self._first_timestamp < self.smoothing:
+            return None
+
+        remaining = self.time_until_limit(value)
+        if not self.active and remaining is not None and remaining < self.horizon:
+            self.active = True
+            return {'state': 'firing',
+                    'message': f"{self.metric} at {value:.1f}% and rising {self.rate * 3600:.2f}%/h, "
+                               f"full in ~{remaining / 3600:.1f}h"}
+        # Resolve with 20% headroom on the horizon to avoid flapping
+        if self.active and (remaining is None or remaining > self.horizon * 1.2):
+            self.active = False
+            return {'state': 'resolved', 'message': f"{self.metric} fill rate back to normal"}
+        return None
+
+
+class AlertEngine:
+    """Evaluates alert rules against streaming SystemMonitor samples
+
+    Attach with monitor.add_listener(engine.evaluate). Alerts are published as
+    event dicts to every subscriber (GUI, logger, automation).
+    """
+
+    SNAPSHOT_METRICS = {'cpu': 'cpu_percent', 'memory': 'memory_percent', 'disk': 'disk_percent'}
+
+    def __init__(self, rules: Optional[List] = None):
+        self.rules = rules if rules is not None else self.default_rules()
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_rules() -> List:
+        """Rules built from CPU_THRESHOLD, MEMORY_THRESHOLD and DISK_THRESHOLD"""
+        sustain = settings.ALERT_SUSTAIN_SECONDS
+        hysteresis = settings.ALERT_HYSTERESIS
+        return [
+            ThresholdRule('cpu_high', 'cpu', settings.CPU_THRESHOLD, sustain, hysteresis),
+            ThresholdRule('memory_high', 'memory', settings.MEMORY_THRESHOLD, sustain, hysteresis),
+            ThresholdRule('disk_high', 'disk', settings.DISK_THRESHOLD, 0, hysteresis),
+            RateRule('disk_filling', 'disk', settings.DISK_FILL_ALERT_HOURS * 3600),
+        ]
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def active_alerts(self) -> List[str]:
+        return [rule.name for rule in self.rules if rule.active]
+
+    def evaluate(self, snapshot: Dict):
+        """Feed one SystemMonitor snapshot through every rule"""
+        timestamp = datetime.fromisoformat(snapshot['timestamp']).timestamp()
+        events = []
+        with self._lock:
+            for rule in self.rules:
+                value = snapshot.get(self.SNAPSHOT_METRICS.get(rule.metric, rule.metric))
+                if value is None:
+                    continue
+                result = rule.evaluate(value, timestamp)
+                if result:
+                    result.update({'rule': rule.name, 'metric': rule.metric, 'value': value,
+                                   'timestamp': snapshot['timestamp']})
+                    events.append(result)
+        for event in events:
+            self._publish(event)
+
+    def _publish(self, event: Dict):
+        if event['state'] == 'firing':
+            logger.warning(f"ALERT {event['rule']}: {event['message']}")
+        else:
+            logger.info(f"RESOLVED {event['rule']}: {event['message']}")
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Alert subscriber failed: {e}")
@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from config.settings import settings
+from core.hash_cache import hash_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones (btrfs, xfs, ...)
+
+
+class BackupStore:
+    """Content-addressed backup store
+
+    Each unique file content is stored once under blobs/<hash[:2]>/<hash>.
+    Backups are reflinked where the filesystem supports it and copied
+    otherwise; blobs never share an inode with a live file, since an
+    in-place edit of the organized file would change the backup too.
+    manifest.jsonl records which original path was backed up when, and
+    under which blob.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = root or settings.DATA_DIR / "backups"
+        self.blobs_dir = self.root / "blobs"
+        self.manifest_path = self.root / "manifest.jsonl"
+        self.retention_days = settings.BACKUP_RETENTION_DAYS
+        self._lock = threading.Lock()
+        self._touched = set()  # digests referenced since the last GC pass finished
+        self._gc_thread = None
+        self._last_gc = 0.0
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def _clone(self, source: Path, target: Path) -> bool:
+        """Try a copy-on-write clone; returns False when unsupported"""
+        if fcntl is None:
+            return False
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            target.unlink(missing_ok=True)
+            return False
+
+    def _store_blob(self, file_path: Path, blob: Path, throttle=None) -> str:
+        """Materialize file_path as blob and return how it was stored"""
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f".{blob.name}.{threading.get_ident()}.tmp")
+        try:
+            if self._clone(file_path, tmp):
+                method = 'reflink'
+            else:
+                self._copy(file_path, tmp, throttle)
+                method = 'copy'
+            os.replace(tmp, blob)
+            return method
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _is_independent(blob: Path) -> bool:
+        """True if blob exists and is its own file
+
+        Older versions hardlinked blobs to the backed up file; such a blob
+        follows edits of the organized file, so it is re-stored instead of reused.
+        """
+        try:
+            return blob.stat().st_nlink == 1
+        except FileNotFoundError:
+            return False
+
+    def _copy(self, source: Path, target: Path, throttle=None):
+        if throttle is not None:
+            throttle.consume(source.stat().st_size)
+        shutil.copy2(source, target)
+
+    def backup(self, file_path: Path, digest: Optional[str] = None, throttle=None) -> Path:
+        """Back up file_path and return the blob it is stored under
+
+        Full copies are paced by the optional IOThrottle; clones are free.
+        """
+        digest = digest or hash_cache.get_full(file_path)
+        blob = self.blob_path(digest)
+        with self._lock:
+            self._touched.add(digest)  # protects the blob from a concurrent GC pass
+        if self._is_independent(blob):
+            method = 'dedup'
+        else:
+            method = self._store_blob(file_path, blob, throttle)
+        st = file_path.stat()
+        self._append_manifest({
+            'path': str(file_path),
+            'time': time.time(),
+            'blob': digest,
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+        })
+        logger.debug(f"Backed up {file_path.name} as {digest[:12]} ({method})")
+        return blob
+
+    def _append_manifest(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def _read_manifest(self) -> List[Dict]:
+        if not self.manifest_path.exists():
+            return []
+        records = []
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # partially written line from a crash
+        return records
+
+    def find(self, original_path: Path) -> List[Dict]:
+        """Return manifest records for an original path, newest first"""
+        records = [r for r in self._read_manifest() if r['path'] == str(original_path)]
+        return sorted(records, key=lambda r: r['time'], reverse=True)
+
+    def restore(self, record: Dict, destination: Optional[Path] = None) -> Path:
+        """Copy a backed up blob back to destination (defaults to its original path)"""
+        destination = destination or Path(record['path'])
+        shutil.copy2(self.blob_path(record['blob']), destination)
+        return destination
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """Drop manifest records past retention and delete blobs nothing refers to"""
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days > 0 else None
+        with self._lock:
+            records = self._read_manifest()
+            kept = [r for r in records if cutoff is None or r['time'] >= cutoff]
+            tmp = self.manifest_path.with_suffix('.tmp')
+            if len(kept) != len(records):
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    for record in kept:
+                        f.write(json.dumps(record, separators=(',', ':')) + "\n")
+                os.replace(tmp, self.manifest_path)
+        referenced = {r['blob'] for r in kept}
+        removed_blobs = 0
+        freed = 0
+        if self.blobs_dir.exists():
+            for blob in self.blobs_dir.glob('*/*'):
+                if blob.name.startswith('.') or blob.name in referenced:
+                    continue
+                # Re-check under the lock so a concurrent backup of the same content survives
+                with self._lock:
+                    if blob.name in self._touched:
+                        continue
+                    try:
+                        freed += blob.stat().st_size
+                        blob.unlink()
+                        removed_blobs += 1
+                    except OSError:
+                        pass
+        with self._lock:
+            self._touched = set()
+        result = {
+            'expired_records': len(records) - len(kept),
+            'removed_blobs': removed_blobs,
+            'freed_mb': round(freed / (1024 * 1024), 2),
+        }
+        logger.info(f"Backup garbage collection: {result}")
+        return result
+
+    def schedule_gc(self):
+        """Run garbage collection in a background thread if it is due"""
+        if time.time() - self._last_gc < settings.BACKUP_GC_INTERVAL:
+            return
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+        self._last_gc = time.time()
+        self._gc_thread = threading.Thread(target=self._gc_worker, daemon=True)
+        self._gc_thread.start()
+
+    def _gc_worker(self):
+        try:
+            self.collect_garbage()
+        except Exception as e:
+            logger.error(f"Backup garbage collection failed: {str(e)}")
+
+
+backup_store = BackupStore()
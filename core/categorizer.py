@@ -0,0 +1,204 @@
+import fnmatch
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SUFFIX_PARTS = 3  # longest multi-part extension considered, e.g. .tar.gz
+MEMO_LIMIT = 4096  # suffix lookups remembered before the memo is reset
+
+
+class CategoryRule:
+    """A user rule matching files by name pattern, extension, size and/or age"""
+
+    def __init__(self, data: Dict):
+        self.category = data['category']
+        if 'glob' in data:
+            self.pattern = fnmatch.translate(data['glob'].lower())
+        elif 'regex' in data:
+            self.pattern = data['regex']
+        else:
+            self.pattern = None
+        self.regex = re.compile(self.pattern, re.IGNORECASE) if self.pattern is not None else None
+        self.pattern_position = None  # index of this rule's group in the combined regex, if it is in it
+        self.extensions = {ext.lower() for ext in data.get('extensions', [])}
+        mb = 1024 * 1024
+        self.min_size = float(data['min_size_mb']) * mb if 'min_size_mb' in data else None
+        self.max_size = float(data['max_size_mb']) * mb if 'max_size_mb' in data else None
+        self.min_age = float(data['min_age_days']) * 86400 if 'min_age_days' in data else None
+        self.max_age = float(data['max_age_days']) * 86400 if 'max_age_days' in data else None
+
+    @property
+    def needs_stat(self) -> bool:
+        return any(v is not None for v in (self.min_size, self.max_size, self.min_age, self.max_age))
+
+    def matches_predicates(self, st: os.stat_result, now: float) -> bool:
+        age = now - st.st_mtime
+        return not (
+            (self.min_size is not None and st.st_size < self.min_size)
+            or (self.max_size is not None and st.st_size > self.max_size)
+            or (self.min_age is not None and age < self.min_age)
+            or (self.max_age is not None and age > self.max_age)
+        )
+
+
+class Categorizer:
+    """Categorization engine compiled from FILE_CATEGORIES plus user rules
+
+    Extension lookups are a dictionary hit memoized per suffix, so .tar.gz
+    resolves before .gz. User rules (CATEGORY_RULES_FILE) are tried first, in
+    file order; their glob and regex patterns are compiled into a single
+    alternation so one regex match finds the first candidate rule. Regexes
+    with groups of their own (numbered groups, backreferences) would be
+    renumbered by the alternation, so they are matched separately.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, List[str]]] = None,
+                 rules: Optional[List[Dict]] = None):
+        self.categories = categories if categories is not None else settings.FILE_CATEGORIES
+        if rules is None:
+            rules = self.load_rules(settings.CATEGORY_RULES_FILE)
+        self._extension_map = {
+            ext.lower(): category
+            for category, extensions in self.categories.items()
+            for ext in extensions
+        }
+        # Only suffixes ending a multi-part extension need more than the last part as memo key
+        self._multi_part_tails = {ext.rsplit('.', 1)[-1] for ext in self._extension_map if ext.count('.') > 1}
+        self._memo: Dict[str, str] = {}
+        self.rules = []
+        for data in rules:
+            try:
+                self.rules.append(CategoryRule(data))
+            except re.error as e:
+                logger.error(f"Ignoring category rule with invalid pattern {data.get('regex')!r}: {str(e)}")
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                logger.error(f"Ignoring invalid category rule {data!r}: {type(e).__name__}: {str(e)}")
+        self._pattern_rules = [rule for rule in self.rules if rule.regex is not None and rule.regex.groups == 0]
+        for position, rule in enumerate(self._pattern_rules):
+            rule.pattern_position = position
+        self._combined = None
+        if self._pattern_rules:
+            self._combined = re.compile(
+                "|".join(f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(self._pattern_rules)),
+                re.IGNORECASE
+            )
+
+    @staticmethod
+    def load_rules(rules_file: Optional[Path]) -> List[Dict]:
+        if not rules_file:
+            return []
+        try:
+            with open(rules_file, encoding='utf-8') as f:
+                rules = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Category rules file not found: {rules_file}")
+            return []
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid category rules file {rules_file}: {str(e)}")
+            return []
+        if not isinstance(rules, list):
+            logger.error(f"Invalid category rules file {rules_file}: expected a list of rules, "
+                         f"got {type(rules).__name__}")
+            return []
+        invalid = [rule for rule in rules if not isinstance(rule, dict)]
+        if invalid:
+            logger.error(f"Ignoring {len(invalid)} category rules in {rules_file} that are not objects")
+        rules = [rule for rule in rules if isinstance(rule, dict)]
+        logger.info(f"Loaded {len(rules)} category rules from {rules_file}")
+        return rules
+
+    @property
+    def all_categories(self) -> List[str]:
+        names = list(self.categories)
+        names += [rule.category for rule in self.rules if rule.category not in names]
+        return names
+
+    def category_for_name(self, name: str) -> str:
+        """Category from the file name's (possibly multi-part) extension"""
+        name = name.lower()
+        dot = name.find('.', 1)  # leading dot of hidden files is not an extension
+        parts = name[dot + 1:].split('.')[-MAX_SUFFIX_PARTS:] if dot != -1 else []
+        if parts and parts[-1] not in self._multi_part_tails:
+            parts = parts[-1:]  # e.g. report.2023.05.01.jpg is memoized under "jpg"
+        suffix_chain = '.'.join(parts)
+        category = self._memo.get(suffix_chain)
+        if category is None:
+            category = 'others'
+            for start in range(len(parts)):
+                candidate = '.' + '.'.join(parts[start:])
+                if candidate in self._extension_map:
+                    category = self._extension_map[candidate]
+                    break
+            if len(self._memo) >= MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[suffix_chain] = category
+        return category
+
+    def age_signature(self, mtime: float, now: Optional[float] = None) -> Tuple[bool, ...]:
+        """Which age limits a file with this mtime passes; empty without age rules
+
+        Rules are otherwise decided by name, size and settings, so a cached
+        category stays valid for as long as this signature does.
+        """
+        age = (time.time() if now is None else now) - mtime
+        signature = []
+        for rule in self.rules:
+            if rule.min_age is not None:
+                signature.append(age >= rule.min_age)
+            if rule.max_age is not None:
+                signature.append(age <= rule.max_age)
+        return tuple(signature)
+
+    def _rule_applies(self, rule: CategoryRule, name: str,
+                      st: Optional[os.stat_result], now: float) -> bool:
+        if rule.extensions and not any(name.endswith(ext) for ext in rule.extensions):
+            return False
+        if rule.needs_stat:
+            if st is None:
+                return False
+            return rule.matches_predicates(st, now)
+        return True
+
+    def categorize(self, file_path: Path, st: Optional[os.stat_result] = None) -> str:
+        """Return the category for a file, applying user rules before extensions"""
+        if not self.rules:
+            return self.category_for_name(file_path.name)
+        name = file_path.name.lower()
+        now = time.time()
+        if st is None and any(rule.needs_stat for rule in self.rules):
+            try:
+                st = file_path.stat()
+            except OSError:
+                st = None
+
+        first_pattern_index = None
+        if self._combined:
+            match = self._combined.fullmatch(name)
+            if match:
+                first_pattern_index = next(
+                    i for i in range(len(self._pattern_rules)) if match.group(f"r{i}") is not None
+                )
+
+        for rule in self.rules:
+            position = rule.pattern_position
+            if position is not None:
+                if first_pattern_index is None or position < first_pattern_index:
+                    continue  # the combined match already ruled this pattern out
+                if position > first_pattern_index and not rule.regex.fullmatch(name):
+                    continue
+            elif rule.regex is not None and not rule.regex.fullmatch(name):
+                continue
+            if self._rule_applies(rule, name, st, now):
+                return rule.category
+        return self.category_for_name(file_path.name)
+
+
+categorizer = Categorizer()
@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 4096
+CACHE_SIZE = 100000
+
+# (offset, magic bytes, file type, category)
+SIGNATURES = [
+    (0, b'\x89PNG\r\n\x1a\n', 'png', 'images'),
+    (0, b'\xff\xd8\xff', 'jpeg', 'images'),
+    (0, b'GIF87a', 'gif', 'images'),
+    (0, b'GIF89a', 'gif', 'images'),
+    (0, b'BM', 'bmp', 'images'),
+    (0, b'II*\x00', 'tiff', 'images'),
+    (0, b'MM\x00*', 'tiff', 'images'),
+    (8, b'WEBP', 'webp', 'images'),
+    (0, b'%PDF-', 'pdf', 'documents'),
+    (0, b'{\\rtf', 'rtf', 'documents'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole2', 'documents'),  # generic container, see GENERIC_CONTAINERS
+    (0, b'PK\x03\x04', 'zip', 'archives'),
+    (0, b'Rar!\x1a\x07', 'rar', 'archives'),
+    (0, b"7z\xbc\xaf'\x1c", '7z', 'archives'),
+    (0, b'\x1f\x8b\x08', 'gzip', 'archives'),
+    (0, b'BZh', 'bzip2', 'archives'),
+    (0, b'\xfd7zXZ\x00', 'xz', 'archives'),
+    (257, b'ustar', 'tar', 'archives'),
+    (0, b'\x7fELF', 'elf', 'executables'),
+    (0, b'MZ', 'pe', 'executables'),
+    (0, b'\xcf\xfa\xed\xfe', 'mach-o', 'executables'),
+    (0, b'!<arch>\ndebian', 'deb', 'executables'),
+    (0, b'\xed\xab\xee\xdb', 'rpm', 'executables'),
+    (4, b'ftyp', 'mp4', 'videos'),
+    (0, b'\x1aE\xdf\xa3', 'matroska', 'videos'),
+    (0, b'FLV\x01', 'flv', 'videos'),
+    (8, b'AVI ', 'avi', 'videos'),
+    (0, b'0&\xb2u\x8ef\xcf\x11', 'asf', 'videos'),
+    (0, b'ID3', 'mp3', 'audio'),
+    (0, b'fLaC', 'flac', 'audio'),
+    (0, b'OggS', 'ogg', 'audio'),
+    (8, b'WAVE', 'wav', 'audio'),
+]
+
+# ZIP containers are refined by the names of their first entries
+ZIP_MARKERS = [
+    (b'word/', 'docx', 'documents'),
+    (b'xl/', 'xlsx', 'spreadsheets'),
+    (b'ppt/', 'pptx', 'presentations'),
+    (b'application/vnd.oasis.opendocument.text', 'odt', 'documents'),
+    (b'application/vnd.oasis.opendocument.spreadsheet', 'ods', 'spreadsheets'),
+    (b'application/vnd.oasis.opendocument.presentation', 'odp', 'presentations'),
+    (b'application/epub+zip', 'epub', 'documents'),
+]
+
+# Containers shared by several formats (OLE2: legacy .doc/.xls/.ppt, .msi, .msg); their
+# verdicts are weak, so the extension decides whenever it names a category
+GENERIC_CONTAINERS = {'ole2'}
+
+# Major brands of an ISO base media (ftyp) container. HEIF/AVIF stills share the
+# container with MP4, so only brands known to be video keep the strong 'videos' verdict
+AUDIO_FTYP_BRANDS = (b'M4A ', b'M4B ', b'M4P ')
+IMAGE_FTYP_BRANDS = {b'heic': 'heic', b'heix': 'heic', b'heif': 'heif', b'mif1': 'heif', b'msf1': 'heif',
+                     b'avif': 'avif', b'avis': 'avif'}
+VIDEO_FTYP_BRANDS = (b'isom', b'iso2', b'iso4', b'iso5', b'iso6', b'mp41', b'mp42', b'avc1', b'M4V ',
+                     b'M4VH', b'M4VP', b'qt  ', b'3gp4', b'3gp5', b'3gp6', b'3g2a', b'dash', b'f4v ')
+
+
+class ContentSniffer:
+    """Detects file types from a small header read instead of the file extension
+
+    Verdicts are (file type, category, strong). Binary magic numbers are
+    strong and may override a wrong extension; text heuristics and generic
+    containers are weak and only used when the extension says nothing.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.SNIFF_WORKERS
+        self._cache: "OrderedDict[Tuple[int, int, int], Optional[Tuple[str, str, bool]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(header: bytes) -> Optional[Tuple[str, str, bool]]:
+        """Classify a header buffer against the signature table"""
+        for offset, magic, file_type, category in SIGNATURES:
+            if header[offset:offset + len(magic)] != magic:
+                continue
+            if file_type == 'zip':
+                for marker, zip_type, zip_category in ZIP_MARKERS:
+                    if marker in header:
+                        return zip_type, zip_category, True
+                return 'zip', 'archives', False
+            if file_type == 'mp4':
+                brand = header[8:12]
+                if brand in AUDIO_FTYP_BRANDS:
+                    return 'm4a', 'audio', True
+                if brand in IMAGE_FTYP_BRANDS:
+                    return IMAGE_FTYP_BRANDS[brand], 'images', True
+                return 'mp4', 'videos', brand in VIDEO_FTYP_BRANDS
+            if file_type in ('pe', 'bmp') and not ContentSniffer._valid_short_magic(file_type, header):
+                continue
+            return file_type, category, file_type not in GENERIC_CONTAINERS
+        return ContentSniffer._classify_text(header)
+
+    @staticmethod
+    def _valid_short_magic(file_type: str, header: bytes) -> bool:
+        """Two-byte magics are common in text, so check a second structural field"""
+        if file_type == 'pe':
+            if len(header) < 64:
+                return False
+            pe_offset = int.from_bytes(header[0x3c:0x40], 'little')
+            return header[pe_offset:pe_offset + 4] == b'PE\x00\x00'
+        if file_type == 'bmp':
+            return int.from_bytes(header[14:18], 'little') in (12, 40, 52, 56, 64, 108, 124)
+        return True
+
+    @staticmethod
+    def _classify_text(header: bytes) -> Optional[Tuple[str, str, bool]]:
+        if not header or b'\x00' in header:
+            return None
+        try:
+            text = header.decode('utf-8')
+        except UnicodeDecodeError as e:
+            if e.start < len(header) - 4:
+                return None
+            text = header[:e.start].decode('utf-8')  # multi-byte char cut off by the buffer
+        if text.startswith('#!'):
+            return 'script', 'code', False
+        lowered = text.lstrip().lower()
+        if lowered.startswith(('<!doctype html', '<html')):
+            return 'html', 'code', False
+        return 'text', 'documents', False
+
+    def _read_header(self, file_path: Path) -> bytes:
+        with open(file_path, 'rb') as f:
+            return f.read(HEADER_SIZE)
+
+    def sniff(self, file_path: Path, st: Optional[os.stat_result] = None) -> Optional[Tuple[str, str, bool]]:
+        """Return (file type, category, strong) for a file, or None if unknown"""
+        try:
+            st = st or file_path.stat()
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        try:
+            verdict = self.classify(self._read_header(file_path))
+        except OSError as e:
+            logger.debug(f"Could not read header of {file_path.name}: {str(e)}")
+            return None
+        with self._lock:
+            self._cache[key] = verdict
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return verdict
+
+    def sniff_batch(self, file_paths: Iterable[Path]) -> Dict[Path, Optional[Tuple[str, str, bool]]]:
+        """Sniff many files concurrently"""
+        file_paths = list(file_paths)
+        if not file_paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(file_paths, pool.map(self.sniff, file_paths)))
+
+
+content_sniffer = ContentSniffer()
@@ -0,0 +1,113 @@
+import signal
+import threading
+from typing import Callable, Dict, Optional
+import logging
+
+from config.settings import settings
+from core.alerts import AlertEngine
+from core.file_organizer import FileOrganizer
+from core.file_watcher import FileWatcher
+from core.metrics_store import MetricsStore
+from core.scheduler import Scheduler
+from core.system_monitor import SystemMonitor
+
+logger = logging.getLogger(__name__)
+
+
+def add_default_jobs(scheduler: Scheduler, organizer: FileOrganizer,
+                     on_organized: Optional[Callable[[Dict], None]] = None,
+                     on_screenshot: Optional[Callable] = None, screenshots: bool = False,
+                     organize: bool = True):
+    """Register DeskBot's periodic work: auto organize and auto screenshot
+
+    Organize passes run every AUTO_ORGANIZE_INTERVAL (or on AUTO_ORGANIZE_CRON)
+    in a single-worker background-priority pool; the job starts paused unless
+    organize=True. Screenshots are queued on the shared OCR queue every
+    AUTO_SCREENSHOT_INTERVAL; the job starts paused unless screenshots=True.
+    """
+    scheduler.add_pool('organize', 1, background=True)
+
+    def organize_pass():
+        stats = organizer.organize_files(background=True)
+        if on_organized and stats.get('total_organized'):
+            on_organized(stats)
+
+    options = dict(jitter=settings.SCHEDULER_JITTER, misfire='coalesce', pool='organize', paused=not organize)
+    if settings.AUTO_ORGANIZE_CRON:
+        scheduler.cron('organize', settings.AUTO_ORGANIZE_CRON, organize_pass, **options)
+    else:
+        scheduler.every('organize', settings.AUTO_ORGANIZE_INTERVAL, organize_pass, **options)
+
+    def screenshot():
+        # The OCR queue's worker owns the processor's change-detection state
+        from core.ocr_processor import ocr_processor, ocr_queue
+        job = ocr_processor.screenshot_and_ocr_if_changed if settings.OCR_SKIP_UNCHANGED else ocr_processor.screenshot_and_ocr
+        if not ocr_queue.submit(job, callback=on_screenshot,
+                                error_callback=lambda e: logger.error(f"Auto OCR error: {e}")):
+            logger.warning("OCR queue full, skipped auto screenshot")
+
+    scheduler.every('screenshot', settings.AUTO_SCREENSHOT_INTERVAL, screenshot,
+                    misfire='skip', paused=not screenshots)
+
+
+class DeskBotDaemon:
+    """Headless DeskBot: system monitor, alerts and scheduled jobs without Tk
+
+    Runs until SIGINT or SIGTERM. Scheduled organize passes, watch mode and
+    auto screenshots are controlled by AUTO_ORGANIZE_ENABLED, DAEMON_WATCH and
+    DAEMON_SCREENSHOTS (screenshots need a display).
+    """
+
+    def __init__(self, watch: Optional[bool] = None, screenshots: Optional[bool] = None):
+        self.watch = settings.DAEMON_WATCH if watch is None else watch
+        self.screenshots = settings.DAEMON_SCREENSHOTS if screenshots is None else screenshots
+        self.monitor = SystemMonitor()
+        self.metrics_store = MetricsStore()
+        self.monitor.add_listener(self.metrics_store.record_snapshot)
+        self.alert_engine = AlertEngine()
+        self.monitor.add_listener(self.alert_engine.evaluate)
+        self.scheduler = Scheduler()
+        # One organizer for scheduled passes and watch flushes; its passes never overlap
+        self.organizer = FileOrganizer(self.monitor)
+        add_default_jobs(self.scheduler, self.organizer,
+                         on_organized=lambda stats: logger.info(f"Auto organize: {stats}"),
+                         on_screenshot=self._on_screenshot, screenshots=self.screenshots,
+                         organize=settings.AUTO_ORGANIZE_ENABLED)
+        self.file_watcher = FileWatcher(self.organizer) if self.watch else None
+        self._stop_event = threading.Event()
+
+    def _on_screenshot(self, result):
+        if result is not None:
+            logger.info(f"Auto OCR saved to {result[0]}")
+
+    def start(self):
+        self.monitor.start()
+        self.scheduler.start()
+        if self.file_watcher:
+            self.file_watcher.start()
+        jobs = ", ".join(f"{job['name']} ({job['schedule']})" for job in self.scheduler.status() if not job['paused'])
+        logger.info(f"DeskBot daemon started; jobs: {jobs or 'none'}; watch mode {'on' if self.watch else 'off'}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self.file_watcher:
+            self.file_watcher.stop()
+        self.scheduler.stop()
+        self.monitor.stop()
+        self.metrics_store.close()
+        logger.info("DeskBot daemon stopped")
+
+    def run(self):
+        """Start and block until SIGINT/SIGTERM"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self._stop_event.set())
+        self.start()
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        finally:
+            self.stop()
+
+
+def run_daemon(watch: Optional[bool] = None, screenshots: Optional[bool] = None):
+    DeskBotDaemon(watch, screenshots).run()
@@ -0,0 +1,119 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SYMLINK_POLICIES = ('skip', 'files', 'follow')
+
+
+class DirectoryScanner:
+    """Parallel os.scandir-based walker that yields files as they are found
+
+    Symlink policies:
+        skip   - ignore symlinked files and directories
+        files  - include symlinked files but never descend into symlinked directories
+        follow - include symlinked files and descend into symlinked directories
+    """
+
+    def __init__(self, recursive: Optional[bool] = None, max_depth: Optional[int] = None,
+                 ignore_patterns: Optional[List[str]] = None, symlinks: Optional[str] = None,
+                 max_workers: Optional[int] = None):
+        self.recursive = settings.SCAN_RECURSIVE if recursive is None else recursive
+        self.max_depth = settings.SCAN_MAX_DEPTH if max_depth is None else max_depth
+        self.ignore_patterns = settings.SCAN_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns
+        self.symlinks = symlinks or settings.SCAN_SYMLINKS
+        if self.symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {self.symlinks}")
+        self.max_workers = max_workers or settings.SCAN_WORKERS
+        self._visited = set()
+        self._visited_lock = threading.Lock()
+
+    def is_ignored(self, name: str) -> bool:
+        return any(fnmatch(name, pattern) for pattern in self.ignore_patterns)
+
+    def _should_descend(self, depth: int) -> bool:
+        if not self.recursive:
+            return False
+        return self.max_depth is None or depth < self.max_depth
+
+    def _mark_visited(self, st: os.stat_result) -> bool:
+        """Record a directory by (device, inode); False if it was already seen"""
+        key = (st.st_dev, st.st_ino)
+        with self._visited_lock:
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+            return True
+
+    def _scan_one(self, directory: str, depth: int) -> Tuple[List[os.DirEntry], List[str], int]:
+        """List a single directory and return (file entries, subdirectories to walk, depth)"""
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if self.is_ignored(entry.name):
+                        continue
+                    try:
+                        is_symlink = entry.is_symlink()
+                        if is_symlink and self.symlinks == 'skip':
+                            continue
+                        if entry.is_dir():
+                            if not self._should_descend(depth):
+                                continue
+                            if is_symlink and self.symlinks != 'follow':
+                                continue
+                            if self.symlinks == 'follow' and not self._mark_visited(entry.stat()):
+                                continue
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry)
+                    except OSError:
+                        continue  # broken symlink or entry vanished mid-scan
+        except PermissionError:
+            logger.error(f"Permission denied accessing: {directory}")
+        except OSError as e:
+            logger.error(f"Error scanning {directory}: {str(e)}")
+        return files, subdirs, depth
+
+    def scan_entries(self, roots: Iterable[Path]) -> Iterator[os.DirEntry]:
+        """Yield DirEntry objects for every file under the given roots
+
+        Each directory is listed by a worker thread, so several roots and
+        subtrees are walked concurrently. File types come from the listing
+        (d_type). entry.stat() still costs one syscall on POSIX (the listing
+        includes it on Windows), but the result is cached on the entry.
+        """
+        self._visited = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            for root in roots:
+                root = Path(root)
+                if not root.exists():
+                    logger.warning(f"Watch directory does not exist: {root}")
+                    continue
+                if self.symlinks == 'follow':
+                    self._mark_visited(root.stat())
+                pending.add(pool.submit(self._scan_one, str(root), 0))
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files, subdirs, depth = future.result()
+                        for subdir in subdirs:
+                            pending.add(pool.submit(self._scan_one, subdir, depth + 1))
+                        yield from files
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def scan(self, roots: Iterable[Path]) -> Iterator[Path]:
+        """Yield paths of every file under the given roots"""
+        for entry in self.scan_entries(roots):
+            yield Path(entry.path)
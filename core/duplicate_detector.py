@@ -0,0 +1,173 @@
+import os
+import shutil
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+from core.file_catalog import file_catalog
+from core.hash_cache import hash_cache
+from core.name_allocator import name_allocator
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_ACTIONS = ('none', 'skip', 'hardlink', 'quarantine')
+
+
+class DuplicateDetector:
+    """Finds files with identical content before they are categorized
+
+    Candidates are bucketed by size, then narrowed by a hash of their first and
+    last blocks; only files that still collide are hashed in full. All hashes
+    go through the persistent hash cache. Files organized in earlier passes
+    (looked up by size in the file catalog) take part as well, so a file saved
+    again later is recognized even when it arrives in a batch of its own.
+
+    Actions for duplicates:
+        skip       - leave the duplicate where it is
+        hardlink   - replace the duplicate with a hardlink to the kept copy, then organize it
+        quarantine - move the duplicate into DUPLICATES_DIR
+    """
+
+    def __init__(self, action: Optional[str] = None):
+        self.action = action or settings.DUPLICATE_ACTION
+        if self.action not in DUPLICATE_ACTIONS:
+            raise ValueError(f"Unknown duplicate action: {self.action}")
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'found': 0, 'bytes_saved': 0, 'action': self.action}
+
+    @property
+    def enabled(self) -> bool:
+        return self.action != 'none'
+
+    def _add_organized(self, by_size: Dict[int, List[Tuple[Path, os.stat_result]]]) -> set:
+        """Add already organized files of matching sizes to the buckets and return their paths"""
+        organized = set()
+        for size, paths in file_catalog.find_by_size(by_size).items():
+            candidates = by_size[size]
+            for path in paths:
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue  # removed since it was organized
+                if st.st_size != size or any(os.path.samestat(st, other) for _, other in candidates):
+                    continue
+                candidates.append((path, st))
+                organized.add(path)
+        return organized
+
+    def find_duplicates(self, file_paths: List[Path]) -> List[List[Path]]:
+        """Group files with identical content; the first path of each group is the one to keep
+
+        When a group contains an already organized file, that file is kept and
+        only files from file_paths are listed after it.
+        """
+        by_size = defaultdict(list)
+        for file_path in file_paths:
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            if st.st_size > 0:
+                by_size[st.st_size].append((file_path, st))
+        try:
+            organized = self._add_organized(by_size)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not look up organized files for duplicates: {str(e)}")
+            organized = set()
+
+        groups = []
+        for candidates in by_size.values():
+            if len(candidates) < 2:
+                continue
+            by_partial = defaultdict(list)
+            for file_path, st in candidates:
+                try:
+                    by_partial[hash_cache.get_partial(file_path, st)].append((file_path, st))
+                except OSError as e:
+                    logger.debug(f"Could not hash {file_path.name}: {str(e)}")
+            for partial_matches in by_partial.values():
+                if len(partial_matches) < 2:
+                    continue
+                by_full = defaultdict(list)
+                for file_path, st in partial_matches:
+                    try:
+                        by_full[hash_cache.get_full(file_path, st)].append((file_path, st))
+                    except OSError as e:
+                        logger.debug(f"Could not hash {file_path.name}: {str(e)}")
+                for matches in by_full.values():
+                    if len(matches) < 2:
+                        continue
+                    # Keep an organized copy if there is one, else the oldest copy,
+                    # which usually carries the original name
+                    matches.sort(key=lambda item: (item[0] not in organized, item[1].st_mtime, len(item[0].name)))
+                    keeper = matches[0][0]
+                    duplicates = [file_path for file_path, _ in matches[1:] if file_path not in organized]
+                    if duplicates:
+                        groups.append([keeper] + duplicates)
+        return groups
+
+    def _hardlink(self, keeper: Path, duplicate: Path) -> bool:
+        tmp = duplicate.with_name(f".{duplicate.name}.dedup")
+        try:
+            if os.path.samestat(keeper.stat(), duplicate.stat()):
+                return False  # already the same inode, nothing to reclaim
+            os.link(keeper, tmp)
+            os.replace(tmp, duplicate)
+            return True
+        except OSError as e:
+            logger.debug(f"Could not hardlink {duplicate.name}: {str(e)}")
+            tmp.unlink(missing_ok=True)
+            return False
+
+    def _quarantine(self, duplicate: Path) -> bool:
+        dest_dir = settings.DUPLICATES_DIR
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest_path = name_allocator.allocate(dest_dir, duplicate.name)
+        try:
+            os.replace(duplicate, dest_path)
+        except OSError:
+            try:
+                shutil.move(str(duplicate), str(dest_path))
+            except OSError as e:
+                logger.error(f"Failed to quarantine {duplicate.name}: {str(e)}")
+                name_allocator.release(dest_path)
+                return False
+        logger.info(f"Quarantined duplicate {duplicate.name} as {dest_path.name}")
+        return True
+
+    def process(self, file_paths: List[Path]) -> Tuple[List[Path], Dict]:
+        """Apply the duplicate action and return (files still to organize, stats for this batch)"""
+        batch_stats = {'found': 0, 'bytes_saved': 0}
+        if not self.enabled:
+            return file_paths, batch_stats
+        remove = set()
+        for group in self.find_duplicates(file_paths):
+            keeper, duplicates = group[0], group[1:]
+            for duplicate in duplicates:
+                try:
+                    size = duplicate.stat().st_size
+                except OSError:
+                    continue
+                batch_stats['found'] += 1
+                if self.action == 'skip':
+                    remove.add(duplicate)
+                    batch_stats['bytes_saved'] += size
+                    logger.debug(f"Skipping duplicate {duplicate.name} of {keeper.name}")
+                elif self.action == 'hardlink':
+                    if self._hardlink(keeper, duplicate):
+                        batch_stats['bytes_saved'] += size
+                elif self.action == 'quarantine':
+                    if self._quarantine(duplicate):
+                        remove.add(duplicate)
+                        batch_stats['bytes_saved'] += size
+        self.stats['found'] += batch_stats['found']
+        self.stats['bytes_saved'] += batch_stats['bytes_saved']
+        if batch_stats['found']:
+            logger.info(f"Found {batch_stats['found']} duplicates "
+                        f"({batch_stats['bytes_saved'] / (1024 * 1024):.2f} MB saved, action: {self.action})")
+        return [f for f in file_paths if f not in remove], batch_stats
@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from config.settings import settings
+from core.directory_scanner import DirectoryScanner
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    category TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    source_dir TEXT,
+    content_hash TEXT,
+    organized_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_category ON files (category);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_files_organized_at ON files (organized_at);
+CREATE INDEX IF NOT EXISTS idx_files_hash ON files (content_hash);
+CREATE INDEX IF NOT EXISTS idx_files_size ON files (size);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class FileCatalog:
+    """Persistent SQLite (WAL) catalog of everything under ORGANIZED_FILES_DIR
+
+    move_file records each organized file, so directory stats, searches and
+    "recently organized" queries are index lookups instead of directory walks.
+    Records are buffered and written in batches; reconcile() resyncs the
+    catalog with what is actually on disk.
+    """
+
+    FLUSH_EVERY = 200
+    QUERY_CHUNK = 500  # values per IN (...) clause, below SQLite's variable limit
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or settings.DATA_DIR / "catalog.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pending: List[tuple] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, path: Path, category: str, source_dir: Optional[Path] = None,
+               content_hash: Optional[str] = None, st: Optional[os.stat_result] = None):
+        """Queue an organized file for insertion"""
+        st = st or path.stat()
+        row = (str(path), path.name, category, st.st_size, st.st_mtime,
+               str(source_dir) if source_dir else None, content_hash, time.time())
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.FLUSH_EVERY:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        conn = self._connect()
+        conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+        conn.commit()
+        self._pending = []
+
+    def flush(self):
+        """Write any buffered records"""
+        with self._lock:
+            self._flush_locked()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            self._flush_locked()
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.row_factory = None
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]['value'] if rows else None
+
+    def get_category_stats(self) -> Dict[str, Dict]:
+        """Per-category file count, total size and newest mtime"""
+        if self._get_meta('last_reconcile') is None:
+            self.reconcile()  # first use on an existing tree
+        rows = self._query(
+            "SELECT category, COUNT(*) AS file_count, SUM(size) AS total_size, MAX(mtime) AS last_modified "
+            "FROM files GROUP BY category"
+        )
+        return {
+            row['category']: {
+                'file_count': row['file_count'],
+                'total_size_mb': round((row['total_size'] or 0) / (1024 * 1024), 2),
+                'last_modified': row['last_modified'] or 0,
+            }
+            for row in rows
+        }
+
+    def search(self, name: Optional[str] = None, category: Optional[str] = None,
+               limit: int = 100) -> List[Dict]:
+        """Find organized files by name (case-insensitive; `*` wildcards, prefix queries use the index)"""
+        clauses, params = [], []
+        if name:
+            pattern = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '%')
+            if '%' not in pattern:
+                pattern = f"%{pattern}%"
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(pattern)
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM files {where} ORDER BY organized_at DESC LIMIT ?", (*params, limit))
+        return [dict(row) for row in rows]
+
+    def find_by_size(self, sizes: Iterable[int]) -> Dict[int, List[Path]]:
+        """Organized files with any of the given sizes, grouped by size"""
+        sizes = list(set(sizes))
+        found: Dict[int, List[Path]] = {}
+        for start in range(0, len(sizes), self.QUERY_CHUNK):
+            chunk = sizes[start:start + self.QUERY_CHUNK]
+            rows = self._query(f"SELECT path, size FROM files WHERE size IN ({','.join('?' * len(chunk))})",
+                               tuple(chunk))
+            for row in rows:
+                found.setdefault(row['size'], []).append(Path(row['path']))
+        return found
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        """Most recently organized files"""
+        rows = self._query("SELECT * FROM files ORDER BY organized_at DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    def reconcile(self, root: Optional[Path] = None) -> Dict[str, int]:
+        """Resync the catalog with the files actually present under ORGANIZED_FILES_DIR"""
+        root = root or settings.ORGANIZED_FILES_DIR
+        scanner = DirectoryScanner(recursive=True, max_depth=1, ignore_patterns=['.*'], symlinks='files')
+        on_disk = {}
+        for entry in scanner.scan_entries([root]):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            path = Path(entry.path)
+            if path.parent == root:
+                continue  # only files inside category directories are organized files
+            on_disk[entry.path] = (path.name, path.parent.name, st.st_size, st.st_mtime)
+
+        with self._lock:
+            self._flush_locked()
+            conn = self._connect()
+            known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, size, mtime FROM files")}
+            removed = [(path,) for path in known if path not in on_disk]
+            upserts = [
+                (path, name, category, size, mtime, None, None, time.time())
+                for path, (name, category, size, mtime) in on_disk.items()
+                if path not in known
+            ]
+            updates = [
+                (size, mtime, path)
+                for path, (_, _, size, mtime) in on_disk.items()
+                if path in known and known[path] != (size, mtime)
+            ]
+            conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+            conn.executemany("UPDATE files SET size = ?, mtime = ?, content_hash = NULL WHERE path = ?", updates)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_reconcile', ?)", (str(time.time()),))
+            conn.commit()
+        result = {'added': len(upserts), 'updated': len(updates), 'removed': len(removed)}
+        logger.info(f"Catalog reconciled: {result}")
+        return result
+
+
+file_catalog = FileCatalog()
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "reconcile":
+        print(file_catalog.reconcile())
+    elif command == "search":
+        for record in file_catalog.search(sys.argv[2] if len(sys.argv) > 2 else None):
+            print(f"{record['category']}: {record['path']}")
+    elif command == "recent":
+        for record in file_catalog.recent():
+            print(f"{record['category']}: {record['path']}")
+    else:
+        for category, stats in file_catalog.get_category_stats().items():
+            print(f"{category}: {stats}")
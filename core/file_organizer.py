@@ -1,96 +1,169 @@
+import errno
+import os
 import shutil
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import logging
 
 from config.settings import settings
+from core.backup_store import backup_store
+from core.categorizer import categorizer
+from core.content_sniffer import content_sniffer
+from core.directory_scanner import DirectoryScanner
+from core.duplicate_detector import DuplicateDetector
+from core.file_catalog import file_catalog
+from core.hash_cache import hash_cache
+from core.io_throttle import IOThrottle
+from core.move_executor import MoveExecutor
+from core.name_allocator import name_allocator
+from utils.logger import log_stage
 
 logger = logging.getLogger(__name__)
 
 class FileOrganizer:
     """Handles automatic file organization and sorting"""
+
+    MIN_FILE_AGE = 30  # seconds since last modification
+    STABILITY_WAIT = 0.1  # seconds between the two size/mtime snapshots
+    BATCH_SIZE = 500  # files checked and moved per batch while a scan is still running
     
-    def __init__(self):
+    def __init__(self, monitor=None):
         self.organized_count = 0
         self.error_count = 0
+        self.skipped_counts = {}
+        self.device_stats = {}
         self.last_run = None
         self.backup_enabled = settings.BACKUP_BEFORE_ORGANIZE
+        self.scanner = DirectoryScanner()
+        self.duplicate_detector = DuplicateDetector()
+        self.throttle = IOThrottle(monitor)
+        self._stats_lock = threading.Lock()
+        self._pass_lock = threading.Lock()
         
+    def iter_files(self, directories: Iterable[Path]) -> Iterator[Path]:
+        """Lazily yield files to organize from the given directories"""
+        return self.scanner.scan(directories)
+
     def scan_directories(self) -> List[Path]:
         """Scan watch directories for files to organize"""
-        files_to_organize = []
-        for watch_dir in settings.WATCH_DIRECTORIES:
-            if not watch_dir.exists():
-                logger.warning(f"Watch directory does not exist: {watch_dir}")
-                continue
-            try:
-                for file_path in watch_dir.iterdir():
-                    if file_path.is_file() and not file_path.name.startswith('.'):
-                        files_to_organize.append(file_path)
-            except PermissionError:
-                logger.error(f"Permission denied accessing: {watch_dir}")
-            except Exception as e:
-                logger.error(f"Error scanning {watch_dir}: {str(e)}")
-        logger.info(f"Found {len(files_to_organize)} files to potentially organize")
-        return files_to_organize
+        return self.scan_directories_from_list(settings.WATCH_DIRECTORIES)
 
-    def scan_directories_from_list(self, dirs_list):
+    def scan_directories_from_list(self, dirs_list) -> List[Path]:
         """Scan user-provided directories for files"""
-        files_to_organize = []
-        for watch_dir in dirs_list:
-            if watch_dir.exists():
-                for file_path in watch_dir.iterdir():
-                    if file_path.is_file() and not file_path.name.startswith('.'):
-                        files_to_organize.append(file_path)
-            else:
-                logger.warning(f"Directory does not exist: {watch_dir}")
+        files_to_organize = list(self.iter_files(dirs_list))
         logger.info(f"Found {len(files_to_organize)} files to potentially organize")
         return files_to_organize
 
-    def categorize_file(self, file_path: Path) -> str:
-        """Determine the category for a file based on its extension"""
-        return settings.get_category_for_extension(file_path.suffix)
+    def categorize_file(self, file_path: Path, verdict=None) -> str:
+        """Determine the category for a file from user rules, its extension and optionally its content"""
+        category = categorizer.categorize(file_path)
+        if not self._needs_sniffing(category):
+            return category
+        verdict = verdict or content_sniffer.sniff(file_path)
+        if not verdict or verdict[1] == category:
+            return category
+        file_type, sniffed_category, strong = verdict
+        if category == 'others' or strong:
+            if category != 'others':
+                logger.debug(f"{file_path.name} looks like {file_type}, not {category}")
+            return sniffed_category
+        return category
+
+    def _needs_sniffing(self, category: str) -> bool:
+        mode = settings.CONTENT_SNIFFING
+        if mode == 'all':
+            # user rule categories are deliberate and never overridden
+            return category == 'others' or category in settings.FILE_CATEGORIES
+        return mode == 'unknown' and category == 'others'
+
+    def categorize_batch(self, file_paths: List[Path]) -> Dict[Path, str]:
+        """Categorize a batch, reading content headers concurrently when sniffing is enabled"""
+        categories = {file_path: categorizer.categorize(file_path) for file_path in file_paths}
+        to_sniff = [file_path for file_path, category in categories.items() if self._needs_sniffing(category)]
+        verdicts = content_sniffer.sniff_batch(to_sniff)
+        for file_path, verdict in verdicts.items():
+            if verdict:
+                categories[file_path] = self.categorize_file(file_path, verdict)
+        return categories
     
     def is_safe_to_move(self, file_path: Path) -> bool:
         """Check if file is safe to move (not in use, not system file, etc.)"""
-        try:
-            initial_size = file_path.stat().st_size
-            time.sleep(0.1)
-            current_size = file_path.stat().st_size
-            if initial_size != current_size:
-                logger.debug(f"File {file_path.name} appears to be actively written to")
-                return False
-            file_age = time.time() - file_path.stat().st_mtime
-            if file_age < 30:
-                logger.debug(f"File {file_path.name} is too recent (age: {file_age}s)")
-                return False
+        safe_files, _ = self.filter_safe_to_move([file_path])
+        return bool(safe_files)
+
+    def filter_safe_to_move(self, file_paths: List[Union[Path, os.DirEntry]],
+                            min_age: Optional[float] = None) -> Tuple[List[Path], Dict[str, int]]:
+        """Check a batch of files at once and return (safe files, rejection counts by reason)
+
+        Sizes and mtimes are snapshotted for the whole batch, followed by a single
+        wait and a second snapshot, instead of sleeping once per file. DirEntries
+        from the scanner are stat'ed through entry.stat(): one call per file,
+        cached on the entry, and served from the listing on Windows.
+        """
+        rejected = {}
+        min_age = self.MIN_FILE_AGE if min_age is None else min_age
+
+        def reject(file_path, reason, message):
+            logger.debug(f"File {file_path.name} {message}")
+            rejected[reason] = rejected.get(reason, 0) + 1
+
+        now = time.time()
+        snapshots = []
+        for entry in file_paths:
+            file_path = Path(entry)
             try:
-                with open(file_path, 'rb'):
-                    pass
-            except PermissionError:
-                logger.debug(f"File {file_path.name} appears to be locked")
-                return False
-            return True
-        except Exception as e:
-            logger.error(f"Error checking if file is safe to move: {str(e)}")
-            return False
+                st = entry.stat()
+            except FileNotFoundError:
+                reject(file_path, 'missing', "no longer exists")
+                continue
+            except Exception as e:
+                logger.error(f"Error checking if file is safe to move: {str(e)}")
+                reject(file_path, 'error', "could not be checked")
+                continue
+            file_age = now - st.st_mtime
+            if file_age < min_age:
+                reject(file_path, 'too_recent', f"is too recent (age: {file_age}s)")
+                continue
+            snapshots.append((file_path, st.st_size, st.st_mtime))
+
+        if snapshots:
+            time.sleep(self.STABILITY_WAIT)
+
+        safe_files = []
+        for file_path, initial_size, initial_mtime in snapshots:
+            try:
+                st = file_path.stat()
+                if st.st_size != initial_size or st.st_mtime != initial_mtime:
+                    reject(file_path, 'changing', "appears to be actively written to")
+                    continue
+                try:
+                    with open(file_path, 'rb'):
+                        pass
+                except PermissionError:
+                    reject(file_path, 'locked', "appears to be locked")
+                    continue
+                safe_files.append(file_path)
+            except FileNotFoundError:
+                reject(file_path, 'missing', "no longer exists")
+            except Exception as e:
+                logger.error(f"Error checking if file is safe to move: {str(e)}")
+                reject(file_path, 'error', "could not be checked")
+
+        if rejected:
+            summary = ", ".join(f"{reason}: {count}" for reason, count in sorted(rejected.items()))
+            logger.info(f"Rejected {sum(rejected.values())} of {len(file_paths)} files ({summary})")
+        return safe_files, rejected
     
     def create_backup(self, file_path: Path) -> Optional[Path]:
         """Create a backup of the file before moving"""
         if not self.backup_enabled:
             return None
         try:
-            backup_dir = settings.DATA_DIR / "backups" / datetime.now().strftime("%Y%m%d")
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            backup_path = backup_dir / file_path.name
-            counter = 1
-            while backup_path.exists():
-                stem, suffix = file_path.stem, file_path.suffix
-                backup_path = backup_dir / f"{stem}_{counter}{suffix}"
-                counter += 1
-            shutil.copy2(file_path, backup_path)
+            backup_path = backup_store.backup(file_path, throttle=self.throttle)
             logger.info(f"Created backup: {backup_path}")
             return backup_path
         except Exception as e:
@@ -99,49 +172,95 @@ class FileOrganizer:
     
     def move_file(self, file_path: Path, category: str) -> bool:
         """Move file to organized directory"""
+        dest_path = None
         try:
             dest_dir = settings.ORGANIZED_FILES_DIR / category
             dest_dir.mkdir(parents=True, exist_ok=True)
-            dest_path = dest_dir / file_path.name
-            counter = 1
-            while dest_path.exists():
-                stem, suffix = file_path.stem, file_path.suffix
-                dest_path = dest_dir / f"{stem}_{counter}{suffix}"
-                counter += 1
+            dest_path = name_allocator.allocate(dest_dir, file_path.name)
             self.create_backup(file_path)
-            shutil.move(str(file_path), str(dest_path))
+            self._transfer(file_path, dest_path)
             logger.info(f"Moved {file_path.name} to {category}/{dest_path.name}")
-            self.organized_count += 1
+            st = dest_path.stat()
+            file_catalog.record(dest_path, category, source_dir=file_path.parent,
+                                content_hash=hash_cache.peek_full(st), st=st)
+            with self._stats_lock:
+                self.organized_count += 1
             return True
         except Exception as e:
             logger.error(f"Failed to move {file_path.name}: {str(e)}")
-            self.error_count += 1
+            if dest_path:
+                name_allocator.release(dest_path)
+            self.record_error()
             return False
+
+    def _transfer(self, file_path: Path, dest_path: Path):
+        """Rename within a filesystem, falling back to copy + delete across devices"""
+        try:
+            os.rename(file_path, dest_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(str(file_path), str(dest_path))
+
+    def record_error(self):
+        with self._stats_lock:
+            self.error_count += 1
     
-    def organize_files(self, file_list: Optional[List[Path]] = None) -> Dict[str, int]:
-        """Organize files from watch directories or provided list"""
+    def organize_files(self, file_list: Optional[Iterable[Path]] = None,
+                       min_age: Optional[float] = None, background: bool = False) -> Dict[str, int]:
+        """Organize files from watch directories or provided list
+
+        Background passes move files at BACKGROUND_NICE / BACKGROUND_IO_CLASS priority.
+        Passes of one organizer run one at a time, so a scheduled full pass and a
+        watch-mode flush sharing it never race on the same files.
+        """
+        with self._pass_lock:
+            return self._organize_pass(file_list, min_age, background)
+
+    def is_busy(self) -> bool:
+        """Whether an organize pass is running on this organizer"""
+        return self._pass_lock.locked()
+
+    def _organize_pass(self, file_list: Optional[Iterable[Path]], min_age: Optional[float],
+                       background: bool) -> Dict[str, int]:
         start_time = datetime.now()
         self.organized_count = 0
         self.error_count = 0
-        files_to_process = file_list if file_list else self.scan_directories()
-        if not files_to_process:
+        self.skipped_counts = {}
+        self.device_stats = {}
+        self.duplicate_detector.reset_stats()
+        files_to_process = file_list if file_list else self.scanner.scan_entries(settings.WATCH_DIRECTORIES)
+        total_files = 0
+        files_iter = iter(files_to_process)
+        with MoveExecutor(self, background) as executor:
+            while True:
+                batch = list(islice(files_iter, self.BATCH_SIZE))
+                if not batch:
+                    break
+                total_files += len(batch)
+                logger.info(f"Processing batch of {len(batch)} files ({total_files} so far)")
+                with log_stage(logger, 'filter', files=len(batch)):
+                    safe_files, rejected = self.filter_safe_to_move(batch, min_age)
+                for reason, count in rejected.items():
+                    self.skipped_counts[reason] = self.skipped_counts.get(reason, 0) + count
+                with log_stage(logger, 'dedup', files=len(safe_files)):
+                    safe_files, _ = self.duplicate_detector.process(safe_files)
+                with log_stage(logger, 'categorize', files=len(safe_files)):
+                    categories = self.categorize_batch(safe_files)
+                for file_path in safe_files:
+                    try:
+                        executor.submit(file_path, categories[file_path])
+                    except Exception as e:
+                        logger.error(f"Error processing {file_path}: {str(e)}")
+                        self.record_error()
+        category_counts = executor.category_counts
+        self.device_stats = executor.get_device_stats()
+        if not total_files:
             logger.info("No files to organize")
             return self.get_organization_stats()
-        logger.info(f"Starting organization of {len(files_to_process)} files")
-        category_counts = {}
-        for file_path in files_to_process:
-            try:
-                if not file_path.exists():
-                    continue
-                if not self.is_safe_to_move(file_path):
-                    logger.debug(f"Skipping {file_path.name} - not safe to move")
-                    continue
-                category = self.categorize_file(file_path)
-                if self.move_file(file_path, category):
-                    category_counts[category] = category_counts.get(category, 0) + 1
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {str(e)}")
-                self.error_count += 1
+        file_catalog.flush()
+        if self.backup_enabled:
+            backup_store.schedule_gc()
         self.last_run = start_time
         duration = (datetime.now() - start_time).total_seconds()
         logger.info(f"Organization complete. Organized: {self.organized_count}, "
@@ -152,11 +271,14 @@ class FileOrganizer:
         if not file_path.exists():
             logger.error(f"File does not exist: {file_path}")
             return False
-        if not self.is_safe_to_move(file_path):
-            logger.warning(f"File not safe to move: {file_path}")
+        safe_files, rejected = self.filter_safe_to_move([file_path])
+        if not safe_files:
+            logger.warning(f"File not safe to move: {file_path} ({', '.join(rejected)})")
             return False
         category = self.categorize_file(file_path)
-        return self.move_file(file_path, category)
+        moved = self.move_file(file_path, category)
+        file_catalog.flush()
+        return moved
     
     def get_organization_stats(self, category_counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
         stats = {
@@ -166,20 +288,20 @@ class FileOrganizer:
         }
         if category_counts:
             stats['categories'] = category_counts
+        if self.skipped_counts:
+            stats['skipped'] = self.skipped_counts
+        if self.device_stats:
+            stats['devices'] = self.device_stats
+        if self.duplicate_detector.stats['found']:
+            stats['duplicates'] = dict(self.duplicate_detector.stats)
         return stats
     
     def get_directory_stats(self) -> Dict[str, Dict]:
-        stats = {}
-        for category in settings.FILE_CATEGORIES.keys():
-            dir_path = settings.ORGANIZED_FILES_DIR / category
-            if dir_path.exists():
-                files = list(dir_path.glob('*'))
-                total_size = sum(f.stat().st_size for f in files if f.is_file())
-                stats[category] = {
-                    'file_count': len([f for f in files if f.is_file()]),
-                    'total_size_mb': round(total_size / (1024 * 1024), 2),
-                    'last_modified': max((f.stat().st_mtime for f in files if f.is_file()), default=0)
-                }
+        """Per-category stats from the file catalog (see core/file_catalog.py reconcile)"""
+        catalog_stats = file_catalog.get_category_stats()
+        empty = {'file_count': 0, 'total_size_mb': 0.0, 'last_modified': 0}
+        stats = {category: dict(empty) for category in categorizer.all_categories}
+        stats.update(catalog_stats)
         return stats
     
     def clean_empty_directories(self) -> int:
@@ -197,15 +319,11 @@ class FileOrganizer:
 # Convenience functions
 def organize_downloads():
     fo = FileOrganizer()
-    downloads_path = Path.home() / "Downloads"
-    files = [f for f in downloads_path.iterdir() if f.is_file()] if downloads_path.exists() else []
-    return fo.organize_files(files)
+    return fo.organize_files(fo.scan_directories_from_list([Path.home() / "Downloads"]))
 
 def organize_desktop():
     fo = FileOrganizer()
-    desktop_path = Path.home() / "Desktop"
-    files = [f for f in desktop_path.iterdir() if f.is_file()] if desktop_path.exists() else []
-    return fo.organize_files(files)
+    return fo.organize_files(fo.scan_directories_from_list([Path.home() / "Desktop"]))
 
 def get_organizer_instance():
     if not hasattr(get_organizer_instance, '_instance'):
@@ -0,0 +1,252 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from config.settings import settings
+from core.file_organizer import FileOrganizer
+from core.io_throttle import apply_background_priority
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifySource:
+    """Thin ctypes wrapper around the Linux inotify API"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Path] = {}
+
+    def add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def read_events(self, timeout: float) -> Tuple[List[Path], bool]:
+        """Wait up to timeout seconds and return (changed file paths, overflowed)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        paths, overflowed = [], False
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _cookie, name_len = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+            elif mask & IN_IGNORED:
+                directory = self.watches.pop(wd, None)
+                if directory:
+                    logger.warning(f"Watch directory removed: {directory}")
+            elif name and not mask & IN_ISDIR and wd in self.watches:
+                paths.append(self.watches[wd] / os.fsdecode(name))
+        return paths, overflowed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Fallback change source that diffs (size, mtime) snapshots of each directory
+
+    Directories are listed once every `interval` seconds. Shorter waits asked
+    for by the watcher's debounce return without listing anything.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.directories: List[Path] = []
+        self._snapshot: Dict[str, Tuple[int, float]] = {}
+        self._next_poll = time.monotonic() + interval
+
+    def add_watch(self, directory: Path):
+        self.directories.append(directory)
+        self._snapshot.update(self._take_snapshot(directory))
+
+    def _take_snapshot(self, directory: Path) -> Dict[str, Tuple[int, float]]:
+        snapshot = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        snapshot[entry.path] = (st.st_size, st.st_mtime)
+        except OSError as e:
+            logger.error(f"Error polling {directory}: {str(e)}")
+        return snapshot
+
+    def read_events(self, timeout: float) -> Tuple[List[Path], bool]:
+        wait = self._next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(timeout, wait))
+            if time.monotonic() < self._next_poll:
+                return [], False
+        self._next_poll = time.monotonic() + self.interval
+        current = {}
+        for directory in self.directories:
+            current.update(self._take_snapshot(directory))
+        changed = [Path(path) for path, state in current.items() if self._snapshot.get(path) != state]
+        self._snapshot = current
+        return changed, False
+
+    def close(self):
+        pass
+
+
+class FileWatcher:
+    """Watches WATCH_DIRECTORIES and organizes files once they have settled
+
+    Files a flush leaves in place (too recent, still being written, locked)
+    are queued again, up to MAX_RETRIES times, instead of waiting for the
+    next full rescan.
+    """
+
+    MAX_RETRIES = 5
+
+    def __init__(self, organizer: Optional[FileOrganizer] = None,
+                 directories: Optional[List[Path]] = None,
+                 on_organized: Optional[Callable[[Dict], None]] = None):
+        self.organizer = organizer or FileOrganizer()
+        self.directories = list(directories or settings.WATCH_DIRECTORIES)
+        self.on_organized = on_organized
+        self.debounce = settings.WATCH_DEBOUNCE_SECONDS
+        self.rescan_interval = settings.AUTO_ORGANIZE_INTERVAL
+        self.pending: Dict[Path, float] = {}
+        self.retries: Dict[Path, int] = {}
+        self.backend = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _create_source(self):
+        if not settings.WATCH_FORCE_POLLING:
+            try:
+                source = InotifySource()
+                self.backend = 'inotify'
+                return source
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify unavailable ({e}), falling back to polling")
+        self.backend = 'polling'
+        return PollingSource(settings.WATCH_POLL_INTERVAL)
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_in_background, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signal the watcher thread to stop and wait for it"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run_in_background(self):
+        apply_background_priority()  # scanning and hashing run on this thread
+        self.run()
+
+    def run(self):
+        """Blocking watch loop; returns once stop() is called"""
+        source = self._create_source()
+        try:
+            for directory in self.directories:
+                if not directory.exists():
+                    logger.warning(f"Watch directory does not exist: {directory}")
+                    continue
+                try:
+                    source.add_watch(directory)
+                except OSError as e:
+                    logger.error(f"Cannot watch {directory}: {str(e)}")
+            logger.info(f"Watching {len(self.directories)} directories using {self.backend}")
+
+            # Files already sitting in the directories are handled by one initial pass
+            self._queue(self.organizer.scan_directories_from_list(self.directories))
+            next_rescan = time.monotonic() + self.rescan_interval
+
+            while not self._stop_event.is_set():
+                paths, overflowed = source.read_events(self._next_timeout())
+                self._queue(paths)
+                if overflowed or time.monotonic() >= next_rescan:
+                    if overflowed:
+                        logger.warning("inotify event queue overflowed, rescanning")
+                    self._queue(self.organizer.scan_directories_from_list(self.directories))
+                    next_rescan = time.monotonic() + self.rescan_interval
+                self._flush_settled()
+        finally:
+            source.close()
+
+    def _queue(self, paths: List[Path]):
+        now = time.monotonic()
+        for path in paths:
+            if not path.name.startswith('.'):
+                self.pending[path] = now
+
+    def _next_timeout(self) -> float:
+        if not self.pending:
+            return 1.0
+        oldest = min(self.pending.values())
+        return max(0.05, min(1.0, oldest + self.debounce - time.monotonic()))
+
+    def _flush_settled(self):
+        """Organize files that have not seen an event for the debounce period"""
+        now = time.monotonic()
+        settled = [path for path, seen in self.pending.items() if now - seen >= self.debounce]
+        if not settled:
+            return
+        for path in settled:
+            del self.pending[path]
+        stats = self.organizer.organize_files(settled, min_age=self.debounce, background=True)
+        self._requeue_left_behind(settled)
+        if self.on_organized and stats.get('total_organized'):
+            self.on_organized(stats)
+
+    def _requeue_left_behind(self, paths: List[Path]):
+        now = time.monotonic()
+        for path in paths:
+            if path in self.pending or not path.exists():
+                self.retries.pop(path, None)
+                continue
+            attempts = self.retries.get(path, 0) + 1
+            if attempts > self.MAX_RETRIES:
+                logger.info(f"Giving up on {path.name} until the next rescan")
+                del self.retries[path]
+                continue
+            self.retries[path] = attempts
+            self.pending[path] = now
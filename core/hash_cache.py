@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+
+from config.settings import settings
+from utils.helpers import hash_file
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_BLOCK_SIZE = 64 * 1024
+
+
+def partial_hash(file_path: Path, size: int) -> str:
+    """Hash the first and last block of a file (the whole file when it is small)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        if size <= PARTIAL_BLOCK_SIZE * 2:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(PARTIAL_BLOCK_SIZE))
+            f.seek(-PARTIAL_BLOCK_SIZE, os.SEEK_END)
+            digest.update(f.read(PARTIAL_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+class HashCache:
+    """On-disk cache of partial and full content hashes
+
+    Entries are keyed by (device, inode, size, mtime_ns), so any change to a
+    file naturally misses the cache and unchanged files are never re-read.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or settings.DATA_DIR / "hash_cache.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                    partial TEXT, full TEXT,
+                    PRIMARY KEY (dev, ino, size, mtime_ns)
+                )
+            """)
+        return self._conn
+
+    @staticmethod
+    def _key(st: os.stat_result) -> Tuple[int, int, int, int]:
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _lookup(self, key) -> Tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT partial, full FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=?", key
+            ).fetchone()
+        return row if row else (None, None)
+
+    def _store(self, key, partial: Optional[str] = None, full: Optional[str] = None):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO hashes (dev, ino, size, mtime_ns, partial, full) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dev, ino, size, mtime_ns) DO UPDATE SET "
+                "partial=COALESCE(excluded.partial, partial), full=COALESCE(excluded.full, full)",
+                (*key, partial, full)
+            )
+            conn.commit()
+
+    def get_partial(self, file_path: Path, st: Optional[os.stat_result] = None) -> str:
+        st = st or file_path.stat()
+        key = self._key(st)
+        partial, _ = self._lookup(key)
+        if partial is None:
+            partial = partial_hash(file_path, st.st_size)
+            # For small files the partial hash already covers the whole content
+            full = partial if st.st_size <= PARTIAL_BLOCK_SIZE * 2 else None
+            self._store(key, partial=partial, full=full)
+        return partial
+
+    def peek_full(self, st: os.stat_result) -> Optional[str]:
+        """Return the cached full hash for a stat result without reading the file"""
+        return self._lookup(self._key(st))[1]
+
+    def get_full(self, file_path: Path, st: Optional[os.stat_result] = None) -> str:
+        st = st or file_path.stat()
+        key = self._key(st)
+        _, full = self._lookup(key)
+        if full is None:
+            full = hash_file(file_path)
+            self._store(key, full=full)
+        return full
+
+
+hash_cache = HashCache()
@@ -0,0 +1,158 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+import logging
+
+import psutil
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IO_CLASSES = {
+    'idle': getattr(psutil, 'IOPRIO_CLASS_IDLE', None),
+    'best-effort': getattr(psutil, 'IOPRIO_CLASS_BE', None),
+}
+
+
+def apply_background_priority():
+    """Lower the CPU and I/O priority of the calling thread (BACKGROUND_NICE / BACKGROUND_IO_CLASS)
+
+    On Linux both nice and ionice are per thread, so only background workers
+    are affected, not the GUI. Elsewhere this is a no-op.
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    thread_id = threading.get_native_id()
+    if settings.BACKGROUND_NICE:
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, thread_id)
+            os.setpriority(os.PRIO_PROCESS, thread_id, max(current, settings.BACKGROUND_NICE))
+        except OSError as e:
+            logger.debug(f"Could not renice background thread: {e}")
+    io_class = IO_CLASSES.get(settings.BACKGROUND_IO_CLASS)
+    if io_class is not None:
+        try:
+            psutil.Process(thread_id).ionice(io_class)
+        except (psutil.Error, OSError) as e:
+            logger.debug(f"Could not set I/O class for background thread: {e}")
+
+
+class IOThrottle:
+    """Adaptive concurrency and bandwidth limit for organize passes
+
+    Every THROTTLE_CHECK_INTERVAL seconds the latest SystemMonitor sample is
+    compared with CPU_THRESHOLD, MEMORY_THRESHOLD and the disk I/O generated by
+    other programs. A busy system halves the throttle level, an idle one ramps
+    it back up in steps. Below full level, the level scales both the number
+    of moves running at once and the bytes per second allowed for copies.
+
+    Samples come from the monitor's background sampler (the app's shared
+    SystemMonitor); the throttle never samples itself. Without a monitor, or
+    while its sampler is stopped, only THROTTLE_MAX_MB_PER_SEC applies.
+    """
+
+    MIN_LEVEL = 0.125
+    RAMP_UP = 0.25
+    IDLE_MARGIN = 20  # percent below the thresholds that counts as idle
+
+    def __init__(self, monitor=None, max_workers: Optional[int] = None):
+        self.monitor = monitor
+        self.enabled = settings.THROTTLE_ENABLED
+        self.max_workers = max_workers or settings.MOVE_WORKERS_PER_DEVICE
+        self.max_bytes_per_sec = settings.THROTTLE_MAX_MB_PER_SEC * 1024 * 1024
+        self.busy_disk_bytes_per_sec = settings.THROTTLE_DISK_BUSY_MB_PER_SEC * 1024 * 1024
+        self.level = 1.0
+        self._active = 0
+        self._condition = threading.Condition()
+        self._next_check = 0.0
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._own_rate = 0.0
+        self._peak_rate = 0.0
+        self._available_at = 0.0
+
+    @property
+    def allowed_workers(self) -> int:
+        return max(1, round(self.max_workers * self.level))
+
+    @property
+    def bytes_per_sec(self) -> Optional[float]:
+        """Current bandwidth limit; None while unthrottled without THROTTLE_MAX_MB_PER_SEC"""
+        base = self.max_bytes_per_sec or self._peak_rate
+        if not base or (self.level >= 1.0 and not self.max_bytes_per_sec):
+            return None
+        return base * self.level
+
+    def _refresh(self):
+        with self._condition:
+            now = time.monotonic()
+            if not self.enabled or now < self._next_check:
+                return
+            self._next_check = now + settings.THROTTLE_CHECK_INTERVAL
+        # Read the published sample outside the lock; move workers never wait on sampling
+        stats = self.monitor.peek_stats() if self.monitor is not None else None
+        with self._condition:
+            self._adjust(now, stats)
+
+    def _adjust(self, now: float, stats: Optional[dict]):
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self._own_rate = self._window_bytes / elapsed
+            self._peak_rate = max(self._peak_rate, self._own_rate)
+        self._window_start, self._window_bytes = now, 0
+        if stats is None:
+            return  # no sampler running
+        disk_rates = [rate['read_bytes_per_sec'] + rate['write_bytes_per_sec']
+                      for rate in (stats.get('disk_io') or {}).values()]
+        # Our own copies show up in the disk counters too
+        foreign_io = max(0.0, max(disk_rates, default=0) - self._own_rate)
+        busy = (stats['cpu_percent'] > settings.CPU_THRESHOLD
+                or stats['memory_percent'] > settings.MEMORY_THRESHOLD
+                or foreign_io > self.busy_disk_bytes_per_sec)
+        idle = (stats['cpu_percent'] < settings.CPU_THRESHOLD - self.IDLE_MARGIN
+                and stats['memory_percent'] < settings.MEMORY_THRESHOLD
+                and foreign_io < self.busy_disk_bytes_per_sec / 2)
+        previous = self.level
+        if busy:
+            self.level = max(self.MIN_LEVEL, self.level / 2)
+        elif idle:
+            self.level = min(1.0, self.level + self.RAMP_UP)
+        if self.level != previous:
+            logger.info(f"Organizer throttle level {previous:.2f} -> {self.level:.2f} "
+                        f"({self.allowed_workers} workers, cpu {stats['cpu_percent']}%, "
+                        f"foreign disk I/O {foreign_io / (1024 * 1024):.1f} MB/s)")
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the currently allowed concurrent move slots"""
+        while True:
+            self._refresh()
+            with self._condition:
+                if self.level >= 1.0 or self._active < self.allowed_workers:
+                    self._active += 1
+                    break
+                self._condition.wait(timeout=settings.THROTTLE_CHECK_INTERVAL)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    def consume(self, num_bytes: int):
+        """Account for num_bytes of copying, sleeping as needed to respect the bandwidth limit"""
+        with self._condition:
+            self._window_bytes += num_bytes
+            limit = self.bytes_per_sec if self.enabled else None
+            if not limit:
+                return
+            now = time.monotonic()
+            start = max(now, self._available_at)
+            self._available_at = start + num_bytes / limit
+        if start > now:
+            time.sleep(start - now)
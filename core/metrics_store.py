@@ -0,0 +1,202 @@
+import mmap
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = 0x4D455452  # "METR"
+FILE_VERSION = 1
+FILE_HEADER = 4  # doubles: magic, version, layout signature, reserved
+RING_HEADER = 8  # doubles: head, count, bucket start, bucket min, bucket max, bucket sum, bucket count, reserved
+COLUMNS = 4  # doubles per row: timestamp, min, avg, max
+DOUBLE_SIZE = 8
+UNSAFE_NAME_CHARS = re.compile(r'[^\w.-]')
+
+
+def default_tiers():
+    """(name, resolution in seconds, capacity); resolution 0 keeps raw samples"""
+    return (
+        ('raw', 0, settings.METRICS_RAW_SAMPLES),
+        ('minute', 60, 1440),    # one day
+        ('hour', 3600, 24 * 30),  # thirty days
+        ('day', 86400, 365),     # one year
+    )
+
+
+class _Ring:
+    """Fixed-capacity ring of (timestamp, min, avg, max) rows inside a shared double buffer"""
+
+    def __init__(self, view: memoryview, offset: int, resolution: int, capacity: int):
+        self.view = view
+        self.offset = offset
+        self.resolution = resolution
+        self.capacity = capacity
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        return RING_HEADER + capacity * COLUMNS
+
+    def _get(self, i: int) -> float:
+        return self.view[self.offset + i]
+
+    def _set(self, i: int, value: float):
+        self.view[self.offset + i] = value
+
+    def append(self, timestamp: float, minimum: float, average: float, maximum: float):
+        head = int(self._get(0))
+        base = self.offset + RING_HEADER + head * COLUMNS
+        self.view[base] = timestamp
+        self.view[base + 1] = minimum
+        self.view[base + 2] = average
+        self.view[base + 3] = maximum
+        self._set(0, (head + 1) % self.capacity)
+        self._set(1, min(self._get(1) + 1, self.capacity))
+
+    def add_sample(self, timestamp: float, value: float):
+        """Raw rings store every sample; rollup rings fold it into the current bucket"""
+        if not self.resolution:
+            self.append(timestamp, value, value, value)
+            return
+        bucket = timestamp - timestamp % self.resolution
+        count = self._get(6)
+        if count and bucket != self._get(2):
+            self.append(self._get(2), self._get(3), self._get(5) / count, self._get(4))
+            count = 0
+        if not count:
+            self._set(2, bucket)
+            self._set(3, value)
+            self._set(4, value)
+            self._set(5, value)
+        else:
+            self._set(3, min(self._get(3), value))
+            self._set(4, max(self._get(4), value))
+            self._set(5, self._get(5) + value)
+        self._set(6, count + 1)
+
+    def rows(self, since: Optional[float] = None, include_partial: bool = True) -> List[Dict]:
+        head, count = int(self._get(0)), int(self._get(1))
+        start = (head - count) % self.capacity
+        rows = []
+        for i in range(count):
+            base = self.offset + RING_HEADER + ((start + i) % self.capacity) * COLUMNS
+            timestamp = self.view[base]
+            if since is None or timestamp >= since:
+                rows.append({'timestamp': timestamp, 'min': self.view[base + 1],
+                             'avg': self.view[base + 2], 'max': self.view[base + 3]})
+        bucket_count = self._get(6)
+        if include_partial and self.resolution and bucket_count:
+            if since is None or self._get(2) >= since:
+                rows.append({'timestamp': self._get(2), 'min': self._get(3),
+                             'avg': self._get(5) / bucket_count, 'max': self._get(4)})
+        return rows
+
+
+class MetricSeries:
+    """One metric's raw ring plus its minute/hour/day rollups in a single fixed-size buffer"""
+
+    def __init__(self, name: str, path: Optional[Path] = None, tiers=None):
+        self.name = name
+        self.path = path
+        self.tiers = tiers or default_tiers()
+        total = FILE_HEADER + sum(_Ring.size(capacity) for _, _, capacity in self.tiers)
+        signature = float(zlib.crc32(repr(tuple(self.tiers)).encode()))
+        self._mmap = None
+        self._file = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, 'r+b' if path.exists() else 'w+b')
+            if self._file.seek(0, 2) != total * DOUBLE_SIZE:
+                self._file.truncate(0)
+                self._file.truncate(total * DOUBLE_SIZE)
+            self._mmap = mmap.mmap(self._file.fileno(), total * DOUBLE_SIZE)
+            self.view = memoryview(self._mmap).cast('d')
+        else:
+            self.view = memoryview(bytearray(total * DOUBLE_SIZE)).cast('d')
+        if (self.view[0], self.view[1], self.view[2]) != (FILE_MAGIC, FILE_VERSION, signature):
+            for i in range(total):
+                self.view[i] = 0.0
+            self.view[0], self.view[1], self.view[2] = FILE_MAGIC, FILE_VERSION, signature
+        self.rings: Dict[str, _Ring] = {}
+        offset = FILE_HEADER
+        for tier_name, resolution, capacity in self.tiers:
+            self.rings[tier_name] = _Ring(self.view, offset, resolution, capacity)
+            offset += _Ring.size(capacity)
+        self._lock = threading.Lock()
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for ring in self.rings.values():
+                ring.add_sample(timestamp, float(value))
+
+    def query(self, tier: str = 'raw', since: Optional[float] = None) -> List[Dict]:
+        with self._lock:
+            return self.rings[tier].rows(since)
+
+    def close(self):
+        with self._lock:
+            self.view.release()
+            if self._mmap is not None:
+                self._mmap.flush()
+                self._mmap.close()
+                self._file.close()
+
+
+class MetricsStore:
+    """Constant-memory time-series store for system metrics
+
+    Every metric keeps a fixed-size raw ring buffer plus minute, hour and
+    day rollups with min/avg/max. With METRICS_PERSIST each metric lives in a
+    memory-mapped file under METRICS_DIR, so history survives restarts.
+    """
+
+    SNAPSHOT_METRICS = {'cpu': 'cpu_percent', 'memory': 'memory_percent', 'disk': 'disk_percent'}
+
+    def __init__(self, directory: Optional[Path] = None, persist: Optional[bool] = None):
+        self.persist = settings.METRICS_PERSIST if persist is None else persist
+        self.directory = directory or settings.METRICS_DIR
+        self._series: Dict[str, MetricSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, name: str) -> MetricSeries:
+        series = self._series.get(name)
+        if series is None:
+            with self._lock:
+                series = self._series.get(name)
+                if series is None:
+                    path = None
+                    if self.persist:
+                        path = self.directory / (UNSAFE_NAME_CHARS.sub('_', name) + ".ring")
+                    series = MetricSeries(name, path)
+                    self._series[name] = series
+        return series
+
+    def add(self, name: str, value: float, timestamp: Optional[float] = None):
+        self.series(name).add(value, timestamp)
+
+    def record_snapshot(self, snapshot: Dict):
+        """SystemMonitor listener: store cpu, memory and disk from one sample"""
+        timestamp = datetime.fromisoformat(snapshot['timestamp']).timestamp()
+        for name, key in self.SNAPSHOT_METRICS.items():
+            if snapshot.get(key) is not None:
+                self.add(name, snapshot[key], timestamp)
+
+    def query(self, name: str, tier: str = 'raw', since: Optional[float] = None) -> List[Dict]:
+        return self.series(name).query(tier, since)
+
+    def names(self) -> List[str]:
+        return list(self._series)
+
+    def close(self):
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series = {}
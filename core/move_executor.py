@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from config.settings import settings
+from core.io_throttle import apply_background_priority
+
+logger = logging.getLogger(__name__)
+
+
+def is_rotational(device: int) -> Optional[bool]:
+    """Return True for spinning disks, False for SSDs, None when unknown (e.g. NFS, non-Linux)"""
+    if not hasattr(os, 'major'):
+        return None
+    block_dir = Path(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+    # Partitions keep their queue settings on the parent device
+    for queue_file in (block_dir / "queue" / "rotational", block_dir / ".." / "queue" / "rotational"):
+        try:
+            return queue_file.read_text().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def device_workers(device: int) -> int:
+    """Concurrency cap for moves touching the given device"""
+    if is_rotational(device):
+        return settings.MOVE_WORKERS_ROTATIONAL
+    return settings.MOVE_WORKERS_PER_DEVICE
+
+
+class MoveExecutor:
+    """Runs planned moves concurrently with one worker pool per (source, destination) device pair
+
+    Each device's concurrency cap is a semaphore shared by every pair that
+    reads from or writes to it, so a destination fed from several source
+    devices still sees at most device_workers() concurrent moves.
+
+    Same-device moves are cheap renames; cross-device moves are full copies,
+    so they additionally share a global limit of MOVE_COPY_WORKERS. Every
+    move also holds a slot of the organizer's IOThrottle, and copies are paced
+    to its bandwidth limit. Workers of background passes run at lowered
+    CPU/IO priority.
+    """
+
+    MAX_PENDING = 1000  # queued moves before submit() blocks
+
+    def __init__(self, organizer, background: bool = False):
+        self.organizer = organizer
+        self.throttle = organizer.throttle
+        self.background = background
+        self.category_counts: Dict[str, int] = {}
+        self.device_stats: Dict[str, Dict] = {}
+        self._pools: Dict[Tuple[int, int], ThreadPoolExecutor] = {}
+        self._pending = threading.BoundedSemaphore(self.MAX_PENDING)
+        self._dest_devices: Dict[Path, int] = {}
+        self._device_slots: Dict[int, threading.BoundedSemaphore] = {}
+        self._copy_slots = threading.BoundedSemaphore(settings.MOVE_COPY_WORKERS)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wait()
+
+    def _dest_device(self, category: str) -> int:
+        dest_dir = settings.ORGANIZED_FILES_DIR / category
+        device = self._dest_devices.get(dest_dir)
+        if device is None:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            device = dest_dir.stat().st_dev
+            self._dest_devices[dest_dir] = device
+        return device
+
+    def _get_pool(self, key: Tuple[int, int]) -> ThreadPoolExecutor:
+        pool = self._pools.get(key)
+        if pool is None:
+            workers = min(device_workers(key[0]), device_workers(key[1]))
+            pool = ThreadPoolExecutor(max_workers=max(1, workers),
+                                      thread_name_prefix=f"move-{key[0]}-{key[1]}",
+                                      initializer=apply_background_priority if self.background else None)
+            self._pools[key] = pool
+            logger.debug(f"Created move pool for devices {key} with {workers} workers")
+        return pool
+
+    def _device_slot(self, device: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._device_slots.get(device)
+            if slot is None:
+                slot = threading.BoundedSemaphore(max(1, device_workers(device)))
+                self._device_slots[device] = slot
+            return slot
+
+    def submit(self, file_path: Path, category: str):
+        """Queue a move of file_path into category"""
+        st = file_path.stat()
+        key = (st.st_dev, self._dest_device(category))
+        self._pending.acquire()
+        future = self._get_pool(key).submit(self._run, file_path, category, key, st.st_size)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future):
+        self._pending.release()
+        if future.exception():
+            logger.error(f"Move task failed: {str(future.exception())}")
+            self.organizer.record_error()
+
+    def _run(self, file_path: Path, category: str, key: Tuple[int, int], size: int):
+        cross_device = key[0] != key[1]
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            # Acquire in device order so two pairs sharing devices can't deadlock
+            for device in sorted(set(key)):
+                stack.enter_context(self._device_slot(device))
+            stack.enter_context(self.throttle.slot())
+            if cross_device:
+                with self._copy_slots:
+                    self.throttle.consume(size)
+                    moved = self.organizer.move_file(file_path, category)
+            else:
+                moved = self.organizer.move_file(file_path, category)
+        end = time.perf_counter()
+        with self._lock:
+            if moved:
+                self.category_counts[category] = self.category_counts.get(category, 0) + 1
+            entry = self.device_stats.setdefault(f"{key[0]}->{key[1]}", {
+                'files': 0, 'bytes': 0, 'first_start': start, 'last_end': end, 'cross_device': cross_device
+            })
+            if moved:
+                entry['files'] += 1
+                entry['bytes'] += size
+            entry['first_start'] = min(entry['first_start'], start)
+            entry['last_end'] = max(entry['last_end'], end)
+
+    def wait(self):
+        """Block until every queued move has finished and shut the pools down"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+        self._pools = {}
+
+    def get_device_stats(self) -> Dict[str, Dict]:
+        """Per device pair totals and throughput, measured from first start to last finish"""
+        stats = {}
+        for key, entry in self.device_stats.items():
+            seconds = entry['last_end'] - entry['first_start']
+            stats[key] = {
+                'files': entry['files'],
+                'total_size_mb': round(entry['bytes'] / (1024 * 1024), 2),
+                'cross_device': entry['cross_device'],
+                'files_per_second': round(entry['files'] / seconds, 2) if seconds else 0,
+                'mb_per_second': round(entry['bytes'] / (1024 * 1024) / seconds, 2) if seconds else 0,
+            }
+        return stats
@@ -0,0 +1,90 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+COUNTER_PATTERN = re.compile(r'^(.*)_(\d+)$')
+
+
+class _DirectoryIndex:
+    """Names in use in one directory plus the highest `_N` suffix per (stem, suffix)"""
+
+    def __init__(self, directory: Path):
+        self.lock = threading.Lock()
+        self.taken: Set[str] = set()
+        self.counters: Dict[Tuple[str, str], int] = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    self._record(entry.name)
+        except FileNotFoundError:
+            pass
+
+    def _record(self, name: str):
+        self.taken.add(name)
+        path = Path(name)
+        match = COUNTER_PATTERN.match(path.stem)
+        if match:
+            key = (match.group(1), path.suffix)
+            self.counters[key] = max(self.counters.get(key, 0), int(match.group(2)))
+
+    def allocate(self, directory: Path, filename: str) -> Path:
+        stem, suffix = Path(filename).stem, Path(filename).suffix
+        key = (stem, suffix)
+        candidate = filename
+        counter = self.counters.get(key, 0)
+        # The exists() check catches files created behind the index's back;
+        # normally it runs once per allocation rather than once per probe.
+        while candidate in self.taken or (directory / candidate).exists():
+            self.taken.add(candidate)
+            counter += 1
+            candidate = f"{stem}_{counter}{suffix}"
+        self.counters[key] = max(self.counters.get(key, 0), counter)
+        self._record(candidate)
+        return directory / candidate
+
+
+class NameAllocator:
+    """Hands out collision-free destination names without probing `_1`, `_2`, ...
+
+    Each directory is listed once, lazily, on first use. Allocation is
+    thread-safe, so several organizer threads can share a destination folder.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Path, _DirectoryIndex] = {}
+        self._lock = threading.Lock()
+
+    def _get_index(self, directory: Path) -> _DirectoryIndex:
+        with self._lock:
+            index = self._indexes.get(directory)
+            if index is None:
+                index = _DirectoryIndex(directory)
+                self._indexes[directory] = index
+            return index
+
+    def allocate(self, directory: Path, filename: str) -> Path:
+        """Reserve and return a unique path for filename inside directory"""
+        index = self._get_index(directory)
+        with index.lock:
+            return index.allocate(directory, filename)
+
+    def release(self, path: Path):
+        """Forget a reserved name, e.g. after a failed move"""
+        index = self._indexes.get(path.parent)
+        if index:
+            with index.lock:
+                index.taken.discard(path.name)
+
+    def invalidate(self, directory: Optional[Path] = None):
+        """Drop cached listings so they are rebuilt on next use"""
+        with self._lock:
+            if directory is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(directory, None)
+
+
+# Shared instance so every FileOrganizer sees the same reservations
+name_allocator = NameAllocator()
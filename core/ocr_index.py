@@ -0,0 +1,183 @@
+import bisect
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from config.settings import settings, get_screenshots_dir
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    text_file TEXT NOT NULL UNIQUE,
+    screenshot TEXT,
+    captured_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_captured_at ON results (captured_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(text, tokenize='unicode61', prefix='2 3');
+"""
+TIMESTAMP_PATTERN = re.compile(r'(\d{8}_\d{6})')
+QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+LINK_WINDOW = 60  # seconds an OCR result may be saved after the screenshot it came from
+
+
+def to_fts_query(query: str) -> str:
+    """Turn user input into a safe FTS5 query: "quoted phrases" and word* prefixes, all terms required"""
+    terms = []
+    for phrase, word in QUERY_TOKEN.findall(query):
+        if phrase:
+            if phrase.strip():
+                terms.append('"' + phrase.replace('"', '') + '"')
+            continue
+        prefix = word.endswith('*')
+        word = re.sub(r'[^\w]', ' ', word).strip()
+        for part in word.split():
+            terms.append(f'"{part}"')
+        if prefix and word:
+            terms[-1] += '*'
+    return " ".join(terms)
+
+
+def parse_capture_time(path: Path) -> float:
+    """Capture time from an ocr_/screenshot_ timestamp in the name, else the file's mtime"""
+    match = TIMESTAMP_PATTERN.search(path.stem)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return path.stat().st_mtime
+
+
+class OCRIndex:
+    """Full-text index (SQLite FTS5) over OCR results
+
+    OCRProcessor adds each result as it is saved; rebuild() recreates the
+    index from the ocr_*.txt files. Searches support "phrases", prefix*
+    terms and time ranges, are ranked with BM25 and link back to the
+    screenshot each text came from.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or settings.DATA_DIR / "ocr_index.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _insert(self, conn: sqlite3.Connection, text_file: Path, text: str,
+                screenshot: Optional[Path], captured_at: float):
+        existing = conn.execute("SELECT id FROM results WHERE text_file = ?", (str(text_file),)).fetchone()
+        if existing:
+            conn.execute("DELETE FROM results_fts WHERE rowid = ?", (existing['id'],))
+            conn.execute("DELETE FROM results WHERE id = ?", (existing['id'],))
+        cursor = conn.execute("INSERT INTO results (text_file, screenshot, captured_at) VALUES (?, ?, ?)",
+                              (str(text_file), str(screenshot) if screenshot else None, captured_at))
+        conn.execute("INSERT INTO results_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+
+    def add(self, text_file: Path, text: str, screenshot: Optional[Path] = None,
+            captured_at: Optional[float] = None):
+        """Index one OCR result"""
+        with self._lock:
+            conn = self._connect()
+            self._insert(conn, text_file, text, screenshot, captured_at or time.time())
+            conn.commit()
+
+    def search(self, query: str, since: Optional[float] = None, until: Optional[float] = None,
+               limit: int = 20) -> List[Dict]:
+        """Best matching results first, each with a highlighted snippet"""
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        clauses, params = ["results_fts MATCH ?"], [fts_query]
+        if since is not None:
+            clauses.append("r.captured_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("r.captured_at < ?")
+            params.append(until)
+        sql = (
+            "SELECT r.text_file, r.screenshot, r.captured_at, "
+            "snippet(results_fts, 0, '[', ']', '...', 12) AS snippet "
+            "FROM results_fts JOIN results r ON r.id = results_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY bm25(results_fts) LIMIT ?"
+        )
+        with self._lock:
+            rows = self._connect().execute(sql, (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def _screenshot_before(screenshots: List[Tuple[float, str]],
+                           saved_at: float) -> Tuple[Optional[Path], Optional[float]]:
+        """The latest screenshot taken at most LINK_WINDOW seconds before an OCR result was saved
+
+        Text files are named after the time they were saved, which is
+        usually a second or two after the capture.
+        """
+        i = bisect.bisect_right(screenshots, (saved_at, '\uffff'))
+        if i and saved_at - screenshots[i - 1][0] <= LINK_WINDOW:
+            captured_at, path = screenshots[i - 1]
+            return Path(path), captured_at
+        return None, None
+
+    def rebuild(self, ocr_dir: Optional[Path] = None) -> int:
+        """Recreate the index from the OCR text files on disk"""
+        ocr_dir = ocr_dir or get_screenshots_dir() / "ocr_results"
+        screenshots = sorted(
+            (parse_capture_time(path), str(path))
+            for path in get_screenshots_dir().glob("screenshot_*")
+            if TIMESTAMP_PATTERN.search(path.stem)
+        )
+        indexed = 0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results_fts")
+            conn.execute("DELETE FROM results")
+            for text_file in sorted(ocr_dir.glob("ocr_*.txt")):
+                try:
+                    text = text_file.read_text(encoding="utf-8")
+                except OSError as e:
+                    logger.error(f"Cannot read {text_file}: {e}")
+                    continue
+                saved_at = parse_capture_time(text_file)
+                screenshot, captured_at = self._screenshot_before(screenshots, saved_at)
+                self._insert(conn, text_file, text, screenshot, captured_at or saved_at)
+                indexed += 1
+            conn.execute("INSERT INTO results_fts (results_fts) VALUES ('optimize')")
+            conn.commit()
+        logger.info(f"OCR index rebuilt with {indexed} results")
+        return indexed
+
+
+ocr_index = OCRIndex()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(f"Indexed {ocr_index.rebuild()} OCR results")
+    elif len(sys.argv) > 2 and sys.argv[1] == "search":
+        for result in ocr_index.search(" ".join(sys.argv[2:])):
+            captured = datetime.fromtimestamp(result['captured_at']).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{captured}  {result['screenshot'] or result['text_file']}\n    {result['snippet']}")
+    else:
+        print("usage: python -m core.ocr_index rebuild | search <query>")
@@ -1,9 +1,537 @@
-import pyautogui
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import logging
 import pytesseract
 from datetime import datetime
 from pathlib import Path
-from PIL import Image
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from PIL import Image, ImageChops, ImageFilter
 from config.settings import settings, get_screenshots_dir
+from core.ocr_index import ocr_index, parse_capture_time
+
+logger = logging.getLogger(__name__)
+
+
+def capture_screen() -> Image.Image:
+    """Grab the screen; pyautogui is imported here because it needs a display, which batch OCR doesn't"""
+    import pyautogui
+    return pyautogui.screenshot()
+
+
+def difference_hash(image: Image.Image, hash_size: int = 16) -> int:
+    """Perceptual difference hash: one bit per horizontally adjacent pair of downscaled pixels"""
+    # Box-downscale first so the grayscale conversion only touches a tiny thumbnail
+    small = image.resize((hash_size + 1, hash_size), Image.BOX).convert("L")
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+def ocr_config(dpi: Optional[int] = None) -> str:
+    config = f'--oem 3 --psm 6 -l {settings.OCR_LANGUAGE}'
+    return f'{config} --dpi {dpi}' if dpi else config
+
+
+def uncompressed(image: Image.Image) -> Image.Image:
+    """Tag an in-memory image so pytesseract passes it to tesseract as raw PNM instead of encoding a PNG"""
+    if image.mode not in ("1", "L", "RGB", "RGBA"):
+        image = image.convert("RGB")
+    image.format = "PPM"
+    return image
+
+
+def data_lines(data: Dict[str, list], min_confidence: float = 0, to_source: Optional[Callable] = None,
+               page: Optional[int] = None) -> List[List[Tuple]]:
+    """Group an image_to_data result into lines of words, dropping words below min_confidence
+
+    Words are (left, top, right, bottom, text, confidence, block) tuples in
+    reading order; to_source maps their boxes back to source image coordinates.
+    """
+    lines = {}
+    for i, text in enumerate(data['text']):
+        text = text.strip()
+        confidence = float(data['conf'][i])
+        if not text or confidence < min_confidence or (page is not None and data['page_num'][i] != page):
+            continue
+        box = (data['left'][i], data['top'][i],
+               data['left'][i] + data['width'][i], data['top'][i] + data['height'][i])
+        if to_source:
+            box = to_source(box)
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append((*box, text, round(confidence, 1), data['block_num'][i]))
+    return list(lines.values())
+
+
+def lines_to_text(lines: List[List[Tuple]]) -> str:
+    """Plain text of grouped words, with a blank line between blocks like image_to_string"""
+    parts = []
+    for i, line in enumerate(lines):
+        if i and line[0][6] != lines[i - 1][0][6]:
+            parts.append("")
+        parts.append(" ".join(word[4] for word in line))
+    return "\n".join(parts)
+
+
+def line_records(lines: List[List[Tuple]]) -> List[Dict]:
+    """One compact record per line of text
+
+    box is [left, top, right, bottom], conf the mean word confidence, and each
+    entry of words is [text, confidence, left, top, right, bottom].
+    """
+    records = []
+    line_numbers = {}
+    for line in lines:
+        block = line[0][6]
+        line_numbers[block] = line_numbers.get(block, 0) + 1
+        records.append({
+            'block': block,
+            'line': line_numbers[block],
+            'box': [min(word[0] for word in line), min(word[1] for word in line),
+                    max(word[2] for word in line), max(word[3] for word in line)],
+            'conf': round(sum(word[5] for word in line) / len(line), 1),
+            'text': " ".join(word[4] for word in line),
+            'words': [[word[4], word[5], *word[:4]] for word in line],
+        })
+    return records
+
+
+def write_records(lines: List[List[Tuple]], path: Path):
+    """Save structured OCR output as JSON Lines"""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in line_records(lines):
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read_structured(image_input, config: str, min_confidence: float,
+                    preprocessor: Optional["OCRPreprocessor"] = None) -> Tuple[str, List[List[Tuple]]]:
+    """Text and confident words from a single image_to_data pass"""
+    data = pytesseract.image_to_data(image_input, config=config, output_type=pytesseract.Output.DICT)
+    lines = data_lines(data, min_confidence, preprocessor.to_source if preprocessor else None)
+    return lines_to_text(lines), lines
+
+
+class OCRPreprocessor:
+    """Image cleanup applied before recognition, configured by OCR_PREPROCESS
+
+    Steps run in a fixed order, each a single C-level Pillow operation:
+      grayscale  drop colour (Tesseract only uses luminance)
+      crop       cut blank margins and collapse tall blank horizontal bands
+      scale      resample from OCR_SOURCE_DPI to OCR_TARGET_DPI
+      threshold  adaptive binarization against a box-blurred local mean; works
+                 for dark-on-light and light-on-dark text alike
+    """
+
+    STEPS = ('grayscale', 'crop', 'scale', 'threshold')
+    BAND_HEIGHT = 16  # rows per band when looking for blank areas
+    CROP_PADDING = 8  # pixels of background kept around content
+
+    def __init__(self, steps: Optional[Iterable[str]] = None):
+        steps = settings.OCR_PREPROCESS if steps is None else steps
+        unknown = set(steps) - set(self.STEPS)
+        if unknown:
+            raise ValueError(f"Unknown OCR preprocessing steps: {', '.join(sorted(unknown))}")
+        self.steps = [step for step in self.STEPS if step in steps]
+        self.scale_factor = settings.OCR_TARGET_DPI / settings.OCR_SOURCE_DPI if 'scale' in self.steps else 1.0
+        # Geometry of the last apply(), for mapping word boxes back: crop origin, kept bands, resize factor
+        self.origin = (0, 0)
+        self.bands: List[Tuple[int, int, int]] = []  # (output top, source top, height)
+        self.applied_scale = 1.0
+
+    @property
+    def dpi(self) -> Optional[int]:
+        """Resolution to report to Tesseract after scaling"""
+        return settings.OCR_TARGET_DPI if 'scale' in self.steps else None
+
+    def apply(self, image: Image.Image, allow_crop: bool = True) -> Image.Image:
+        self.origin, self.bands, self.applied_scale = (0, 0), [], 1.0
+        if 'grayscale' in self.steps or 'threshold' in self.steps:
+            image = image.convert("L")
+        if 'crop' in self.steps and allow_crop:
+            image = self.crop_blank(image)
+        if 'scale' in self.steps and abs(self.scale_factor - 1.0) > 0.05:
+            size = (max(1, round(image.width * self.scale_factor)), max(1, round(image.height * self.scale_factor)))
+            self.applied_scale = size[0] / image.width
+            image = image.resize(size, Image.BICUBIC if self.scale_factor > 1 else Image.BOX)
+        if 'threshold' in self.steps:
+            image = self.adaptive_threshold(image)
+        return image
+
+    def crop_blank(self, image: Image.Image) -> Image.Image:
+        """Remove margins and tall runs of rows that only contain the background colour"""
+        gray = image if image.mode == "L" else image.convert("L")
+        # The most common grey level is taken as the background colour
+        histogram = gray.histogram()
+        background = histogram.index(max(histogram))
+        tolerance = settings.OCR_BLANK_TOLERANCE
+        content = ImageChops.difference(gray, Image.new("L", gray.size, background)).point(
+            lambda v: 255 if v > tolerance else 0)
+        bbox = content.getbbox()
+        if bbox is None:
+            return image
+        pad = self.CROP_PADDING
+        left, right = max(0, bbox[0] - pad), min(image.width, bbox[2] + pad)
+        top, bottom = max(0, bbox[1] - pad), min(image.height, bbox[3] + pad)
+
+        # Keep bands with content plus one blank band of separation between them
+        bands = []
+        blank_run = 0
+        for y in range(top, bottom, self.BAND_HEIGHT):
+            band = (y, min(y + self.BAND_HEIGHT, bottom))
+            if content.crop((left, band[0], right, band[1])).getbbox():
+                blank_run = 0
+                bands.append(band)
+            else:
+                blank_run += 1
+                if blank_run == 1:
+                    bands.append(band)
+        height = sum(end - start for start, end in bands)
+        self.origin = (left, top)
+        if height == bottom - top:
+            return image.crop((left, top, right, bottom))
+        result = Image.new(image.mode, (right - left, height))
+        y = 0
+        for start, end in bands:
+            result.paste(image.crop((left, start, right, end)), (0, y))
+            self.bands.append((y, start, end - start))
+            y += end - start
+        return result
+
+    def _source_y(self, y: int) -> int:
+        for output_top, source_top, _ in reversed(self.bands):
+            if y >= output_top:
+                return source_top + y - output_top
+        return y + self.origin[1]
+
+    def to_source(self, box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """Map a box in the last apply() result back to the original image"""
+        left, top, right, bottom = (round(v / self.applied_scale) for v in box)
+        return (left + self.origin[0], self._source_y(top),
+                right + self.origin[0], self._source_y(max(top, bottom - 1)) + 1)
+
+    def adaptive_threshold(self, gray: Image.Image) -> Image.Image:
+        """Black text on white: ink is darker than a light neighbourhood or lighter than a dark one"""
+        mean = gray.filter(ImageFilter.BoxBlur(settings.OCR_THRESHOLD_RADIUS))
+        offset = settings.OCR_THRESHOLD_OFFSET
+        dark_ink = ImageChops.subtract(mean, gray).point(lambda v: 0 if v > offset else 255)
+        light_ink = ImageChops.subtract(gray, mean).point(lambda v: 0 if v > offset else 255)
+        dark_background = mean.point(lambda v: 255 if v < 128 else 0)
+        return Image.composite(light_ink, dark_ink, dark_background)
+
+
+class ScreenshotWriter:
+    """Encodes and saves screenshots on a background thread
+
+    Capture-to-text latency then only includes OCR. The queue is small
+    because every pending full-resolution frame is held in memory.
+    """
+
+    def __init__(self, maxsize: int = 4):
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, image: Image.Image, path: Path):
+        """Queue image to be saved at path; blocks while the queue is full"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((image, path))
+
+    def flush(self):
+        """Wait until every queued screenshot is on disk"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            image, path = self._queue.get()
+            try:
+                write_screenshot(image, path)
+            except Exception as e:
+                logger.error(f"Failed to save screenshot {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+def write_screenshot(image: Image.Image, path: Path):
+    """Encode with SCREENSHOT_QUALITY for JPEG, SCREENSHOT_COMPRESSION for PNG"""
+    if path.suffix.lower() in [".jpg", ".jpeg"]:
+        image.save(path, format="JPEG", quality=settings.SCREENSHOT_QUALITY)
+    elif path.suffix.lower() == ".png":
+        image.save(path, format="PNG", compress_level=settings.SCREENSHOT_COMPRESSION)
+    else:
+        image.save(path)
+
+
+def _ocr_files(paths: List[str], config: str, tesseract_cmd: Optional[str] = None,
+               preprocess_steps: Iterable[str] = (),
+               min_confidence: Optional[float] = None) -> List[Tuple[str, Optional[List[List[Tuple]]]]]:
+    """OCR several image files with a single tesseract run (process pool worker)
+
+    Tesseract treats a text file as a list of images and separates the pages
+    of its output with form feeds, so process startup and language data
+    loading are paid once per chunk. Falls back to one run per image if the
+    pages can't be matched up. Preprocessed images are handed over as
+    uncompressed PNM files.
+
+    Returns (text, lines) per image. With min_confidence set, the chunk is
+    read with image_to_data instead (pages told apart by page_num) and lines
+    holds the confident words as grouped by data_lines; otherwise it is None.
+    """
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    structured = min_confidence is not None
+    with tempfile.TemporaryDirectory(prefix="deskbot_ocr_") as work_dir:
+        inputs = []
+        preprocessors: List[Optional[OCRPreprocessor]] = []
+        for i, path in enumerate(paths):
+            if not preprocess_steps:
+                inputs.append(path)
+                preprocessors.append(None)
+                continue
+            try:
+                preprocessor = OCRPreprocessor(preprocess_steps)
+                with Image.open(path) as img:
+                    processed = preprocessor.apply(img)
+                processed_path = os.path.join(work_dir, f"{i}.pnm")
+                processed.save(processed_path, format="PPM")
+                inputs.append(processed_path)
+                preprocessors.append(preprocessor)
+            except Exception as e:
+                logger.error(f"Preprocessing failed for {path}: {e}")
+                inputs.append(path)
+                preprocessors.append(None)
+        if len(inputs) > 1:
+            try:
+                list_file = os.path.join(work_dir, "images.txt")
+                with open(list_file, "w", encoding="utf-8") as f:
+                    f.write("\n".join(inputs) + "\n")
+                if structured:
+                    data = pytesseract.image_to_data(list_file, config=config, output_type=pytesseract.Output.DICT)
+                    if set(data['page_num']) == set(range(1, len(inputs) + 1)):
+                        results = []
+                        for page, preprocessor in enumerate(preprocessors, 1):
+                            lines = data_lines(data, min_confidence,
+                                               preprocessor.to_source if preprocessor else None, page=page)
+                            results.append((lines_to_text(lines), lines))
+                        return results
+                else:
+                    pages = pytesseract.image_to_string(list_file, config=config).split("\f")
+                    if len(pages) == len(inputs) + 1 and not pages[-1].strip():
+                        pages = pages[:-1]  # some tesseract versions end every page with a form feed
+                    if len(pages) == len(inputs):
+                        return [(page.strip(), None) for page in pages]
+            except Exception as e:
+                logger.debug(f"Batched tesseract run failed, retrying per image: {e}")
+        results = []
+        for path, image_input, preprocessor in zip(paths, inputs, preprocessors):
+            try:
+                if structured:
+                    results.append(read_structured(image_input, config, min_confidence, preprocessor))
+                else:
+                    results.append((pytesseract.image_to_string(image_input, config=config).strip(), None))
+            except Exception as e:
+                logger.error(f"OCR failed for {path}: {e}")
+                results.append(("", [] if structured else None))
+        return results
+
+
+class OCRJobQueue:
+    """Bounded queue of OCR jobs served by one worker thread
+
+    The GUI button and the auto-screenshot timer both submit here instead of
+    starting a thread per request. A single worker also keeps OCRProcessor's
+    change-detection state consistent. submit() returns False when full.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._queue = queue.Queue(maxsize or settings.OCR_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Callable, callback: Optional[Callable] = None,
+               error_callback: Optional[Callable[[Exception], None]] = None) -> bool:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ocr-worker", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((job, callback, error_callback))
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job, callback, error_callback = self._queue.get()
+            try:
+                result = job()
+            except Exception as e:
+                if error_callback:
+                    error_callback(e)
+                else:
+                    logger.error(f"OCR job failed: {e}")
+                continue
+            finally:
+                self._queue.task_done()
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logger.error(f"OCR callback failed: {e}")
+
+
+class IncrementalOCR:
+    """Re-recognizes only the parts of a capture that changed since the previous one
+
+    Frames are diffed against the previous capture with ImageChops and the
+    changed cells of a OCR_TILE_SIZE grid are merged into regions. Only those
+    regions go to Tesseract; words elsewhere are reused from the cache, which
+    stores each word with its position so the text can be stitched back into
+    lines in reading order.
+    """
+
+    def __init__(self, tile_size: Optional[int] = None, diff_threshold: Optional[int] = None):
+        self.preprocessor = None
+        self.tile_size = tile_size or settings.OCR_TILE_SIZE
+        self.diff_threshold = settings.OCR_TILE_DIFF_THRESHOLD if diff_threshold is None else diff_threshold
+        self.previous = None
+        self.words: List[Tuple] = []  # left, top, right, bottom, text, confidence, block
+        self.last_regions: List[Tuple[int, int, int, int]] = []
+        self._next_block = 1
+
+    def reset(self):
+        self.previous = None
+        self.words = []
+        self._next_block = 1
+
+    def changed_regions(self, gray: Image.Image) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes of connected groups of changed tiles"""
+        if self.previous is None or self.previous.size != gray.size:
+            return [(0, 0, *gray.size)]
+        threshold = self.diff_threshold
+        diff = ImageChops.difference(self.previous, gray).point(lambda v: 255 if v > threshold else 0)
+        bbox = diff.getbbox()
+        if bbox is None:
+            return []
+        size = self.tile_size
+        width, height = gray.size
+        changed = set()
+        # Only tiles inside the overall bounding box of the change need checking
+        for row in range(bbox[1] // size, (bbox[3] - 1) // size + 1):
+            for col in range(bbox[0] // size, (bbox[2] - 1) // size + 1):
+                box = (col * size, row * size, min((col + 1) * size, width), min((row + 1) * size, height))
+                if diff.crop(box).getbbox():
+                    changed.add((row, col))
+
+        regions = []
+        while changed:
+            stack = [changed.pop()]
+            rows, cols = [], []
+            while stack:
+                row, col = stack.pop()
+                rows.append(row)
+                cols.append(col)
+                for neighbor in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                    if neighbor in changed:
+                        changed.remove(neighbor)
+                        stack.append(neighbor)
+            regions.append((min(cols) * size, min(rows) * size,
+                            min((max(cols) + 1) * size, width), min((max(rows) + 1) * size, height)))
+        return regions
+
+    def _expand(self, region: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """Grow a region until it fully contains every cached word it touches"""
+        left, top, right, bottom = region
+        grown = True
+        while grown:
+            grown = False
+            for w_left, w_top, w_right, w_bottom, *_ in self.words:
+                if w_left < right and w_right > left and w_top < bottom and w_bottom > top:
+                    if w_left < left or w_top < top or w_right > right or w_bottom > bottom:
+                        left, top = min(left, w_left), min(top, w_top)
+                        right, bottom = max(right, w_right), max(bottom, w_bottom)
+                        grown = True
+        return left, top, right, bottom
+
+    @staticmethod
+    def _merge(regions: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Union overlapping regions so no word is recognized twice"""
+        merged = []
+        for region in regions:
+            while True:
+                for other in merged:
+                    if other[0] < region[2] and other[2] > region[0] and other[1] < region[3] and other[3] > region[1]:
+                        merged.remove(other)
+                        region = (min(region[0], other[0]), min(region[1], other[1]),
+                                  max(region[2], other[2]), max(region[3], other[3]))
+                        break
+                else:
+                    break
+            merged.append(region)
+        return merged
+
+    def _recognize_region(self, image: Image.Image, region: Tuple[int, int, int, int]):
+        left, top = region[0], region[1]
+        # Cropping would shift word positions, so regions are only scaled/binarized
+        preprocessor = self.preprocessor or OCRPreprocessor()
+        crop = preprocessor.apply(image.crop(region), allow_crop=False)
+        data = pytesseract.image_to_data(uncompressed(crop), config=ocr_config(preprocessor.dpi),
+                                         output_type=pytesseract.Output.DICT)
+        first_block = self._next_block
+        for line in data_lines(data, settings.OCR_MIN_CONFIDENCE, preprocessor.to_source):
+            for w_left, w_top, w_right, w_bottom, text, confidence, block in line:
+                # Block numbers restart in every region; keep them unique across the cache
+                block += first_block - 1
+                self._next_block = max(self._next_block, block + 1)
+                self.words.append((left + w_left, top + w_top, left + w_right, top + w_bottom, text, confidence, block))
+
+    def recognize(self, image: Image.Image) -> str:
+        gray = image.convert("L")
+        regions = self._merge([self._expand(region) for region in self.changed_regions(gray)])
+        for region in regions:
+            left, top, right, bottom = region
+            self.words = [word for word in self.words
+                          if not (word[0] >= left and word[1] >= top and word[2] <= right and word[3] <= bottom)]
+            self._recognize_region(gray, region)
+        self.previous = gray
+        self.last_regions = regions
+        return self.stitch()
+
+    def lines(self) -> List[List[Tuple]]:
+        """Cached words grouped into lines by vertical overlap, in reading order"""
+        lines = []
+        for word in sorted(self.words, key=lambda word: (word[1], word[0])):
+            center = (word[1] + word[3]) / 2
+            if lines and lines[-1]['top'] <= center <= lines[-1]['bottom']:
+                lines[-1]['words'].append(word)
+                lines[-1]['bottom'] = max(lines[-1]['bottom'], word[3])
+            else:
+                lines.append({'top': word[1], 'bottom': word[3], 'words': [word]})
+        return [sorted(line['words']) for line in lines]
+
+    def stitch(self) -> str:
+        """Cached words as text"""
+        return "\n".join(" ".join(word[4] for word in line) for line in self.lines())
+
 
 class OCRProcessor:
     def __init__(self):
@@ -15,43 +543,192 @@ class OCRProcessor:
         self.ocr_dir = get_screenshots_dir() / "ocr_results"
         self.ocr_dir.mkdir(parents=True, exist_ok=True)
 
-    def take_screenshot(self) -> Path:
-        """Take a screenshot and return its path"""
+        # Change detection for repeated captures
+        self.last_hash = None
+        self.last_result = None
+        self.skipped_frames = 0
+        self.incremental = IncrementalOCR()
+        self.writer = ScreenshotWriter()
+
+    def _screenshot_path(self) -> Path:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"screenshot_{timestamp}.{settings.SCREENSHOT_FORMAT.lower()}"
-        filepath = get_screenshots_dir() / filename
+        return get_screenshots_dir() / filename
 
-        screenshot = pyautogui.screenshot()
+    def take_screenshot(self) -> Path:
+        """Take a screenshot and return its path"""
+        return self.save_screenshot(capture_screen())
 
-        # Save screenshot with quality only for JPEG
-        if settings.SCREENSHOT_FORMAT.lower() in ["jpg", "jpeg"]:
-            screenshot.save(filepath, quality=settings.SCREENSHOT_QUALITY)
-        else:
-            screenshot.save(filepath)
+    def save_screenshot(self, screenshot: Image.Image) -> Path:
+        """Save a captured screenshot and return its path"""
+        filepath = self._screenshot_path()
+        write_screenshot(screenshot, filepath)
+        return filepath
 
+    def archive_screenshot(self, screenshot: Image.Image) -> Optional[Path]:
+        """Hand a capture to the background writer; None when SCREENSHOT_ARCHIVE is off"""
+        if not settings.SCREENSHOT_ARCHIVE:
+            return None
+        filepath = self._screenshot_path()
+        # Image.save keeps per-call encoder state on the image, so the writer needs its own copy
+        self.writer.submit(screenshot.copy(), filepath)
         return filepath
 
-    def run_ocr(self, image_path: Path) -> tuple[Path, str]:
-        """Run OCR on a given image and save the text result"""
+    def recognize(self, image: Image.Image, incremental: bool = False, source: str = "image") -> str:
+        """OCR an in-memory image
+
+        With incremental=True only regions that changed since the previous
+        incremental call are recognized (see IncrementalOCR).
+        """
+        return self.recognize_structured(image, incremental, source)[0]
+
+    def recognize_structured(self, image: Image.Image, incremental: bool = False,
+                             source: str = "image") -> Tuple[str, Optional[List[List[Tuple]]]]:
+        """Like recognize, but also returns the words as grouped by data_lines
+
+        Words come from the same image_to_data pass as the text and are
+        filtered by OCR_MIN_CONFIDENCE. lines is None with OCR_STRUCTURED off,
+        in which case full frames are read with image_to_string.
+        """
         try:
-            img = Image.open(image_path)
-            custom_config = f'--oem 3 --psm 6 -l {settings.OCR_LANGUAGE}'
-            text = pytesseract.image_to_string(img, config=custom_config)
+            if incremental:
+                text = self.incremental.recognize(image).strip()
+                return text, self.incremental.lines() if settings.OCR_STRUCTURED else None
+            preprocessor = OCRPreprocessor()
+            processed = preprocessor.apply(image)
+            config = ocr_config(preprocessor.dpi)
+            if settings.OCR_STRUCTURED:
+                return read_structured(uncompressed(processed), config, settings.OCR_MIN_CONFIDENCE, preprocessor)
+            return pytesseract.image_to_string(uncompressed(processed), config=config).strip(), None
         except Exception as e:
-            text = ""
-            print(f"OCR failed for {image_path}: {e}")
+            if incremental:
+                self.incremental.reset()  # the cache may be half updated
+            logger.error(f"OCR failed for {source}: {e}")
+            return "", None
 
-        # Save text result
+    def save_text(self, text: str, screenshot_path: Optional[Path] = None,
+                  lines: Optional[List[List[Tuple]]] = None) -> Path:
+        """Save an OCR text result, plus ocr_<timestamp>.jsonl records when lines are given, and index it"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         text_file = self.ocr_dir / f"ocr_{timestamp}.txt"
+        self._store(text_file, text, lines, screenshot_path)
+        return text_file
+
+    def _store(self, text_file: Path, text: str, lines: Optional[List[List[Tuple]]],
+               screenshot_path: Optional[Path] = None, captured_at: Optional[float] = None):
         with open(text_file, "w", encoding="utf-8") as f:
-            f.write(text.strip())
+            f.write(text)
+        if lines is not None:
+            write_records(lines, text_file.with_suffix(".jsonl"))
+        self.index_text(text_file, text, screenshot_path, captured_at)
+
+    def index_text(self, text_file: Path, text: str, screenshot_path: Optional[Path] = None,
+                   captured_at: Optional[float] = None):
+        """Add a saved result to the OCR search index (OCR_INDEX_ENABLED)"""
+        if not settings.OCR_INDEX_ENABLED:
+            return
+        try:
+            ocr_index.add(text_file, text, screenshot_path, captured_at)
+        except sqlite3.Error as e:
+            logger.error(f"Could not index {text_file}: {e}")
 
-        return text_file, text.strip()
+    def run_ocr(self, image_path: Path, incremental: bool = False) -> tuple[Path, str]:
+        """Run OCR on a given image and save the text result"""
+        if incremental or settings.OCR_PREPROCESS:
+            with Image.open(image_path) as img:
+                text, lines = self.recognize_structured(img, incremental=incremental, source=str(image_path))
+        else:
+            # tesseract reads the file itself; no decode and re-encode in Python
+            lines = None
+            try:
+                if settings.OCR_STRUCTURED:
+                    text, lines = read_structured(str(image_path), ocr_config(), settings.OCR_MIN_CONFIDENCE)
+                else:
+                    text = pytesseract.image_to_string(str(image_path), config=ocr_config()).strip()
+            except Exception as e:
+                text = ""
+                logger.error(f"OCR failed for {image_path}: {e}")
+        return self.save_text(text, image_path, lines), text
+
+    def run_ocr_batch(self, image_paths: Iterable[Path], workers: Optional[int] = None,
+                      save: bool = True) -> Iterator[tuple[Path, str]]:
+        """OCR many images in parallel, yielding (image path, text) in input order as results arrive
+
+        Images are sent in chunks of OCR_BATCH_CHUNK to a pool of OCR_WORKERS
+        processes, with at most two chunks per worker in flight. With save=True
+        each text is also written to ocr_results/ocr_<image name>.txt (and
+        .jsonl records with OCR_STRUCTURED).
+        """
+        workers = workers or settings.OCR_WORKERS
+        chunk_size = settings.OCR_BATCH_CHUNK
+        preprocessor = OCRPreprocessor()
+        config = ocr_config(preprocessor.dpi)
+        min_confidence = settings.OCR_MIN_CONFIDENCE if settings.OCR_STRUCTURED else None
+        paths = iter(image_paths)
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                while len(in_flight) < workers * 2:
+                    chunk = [path for _, path in zip(range(chunk_size), paths)]
+                    if not chunk:
+                        break
+                    in_flight.append((chunk, executor.submit(
+                        _ocr_files, [str(path) for path in chunk], config, settings.TESSERACT_PATH or None,
+                        preprocessor.steps, min_confidence)))
+                if not in_flight:
+                    break
+                chunk, future = in_flight.popleft()
+                for image_path, (text, lines) in zip(chunk, future.result()):
+                    if save:
+                        self._store(self.ocr_dir / f"ocr_{Path(image_path).stem}.txt", text, lines,
+                                    Path(image_path), parse_capture_time(Path(image_path)))
+                    yield Path(image_path), text
+
+    def is_unchanged(self, screenshot: Image.Image) -> bool:
+        """Compare a capture with the last processed frame and remember its hash if it changed"""
+        frame_hash = difference_hash(screenshot, settings.OCR_CHANGE_HASH_SIZE)
+        if self.last_hash is not None and hash_distance(frame_hash, self.last_hash) <= settings.OCR_CHANGE_THRESHOLD:
+            return True
+        self.last_hash = frame_hash
+        return False
 
     def screenshot_and_ocr(self) -> tuple[Path, str]:
-        """Take a screenshot and immediately process OCR"""
-        screenshot_path = self.take_screenshot()
-        return self.run_ocr(screenshot_path)
+        """Take a screenshot and immediately process OCR
+
+        The capture goes straight from memory to OCR; saving it happens on
+        the background writer (or not at all with SCREENSHOT_ARCHIVE off).
+        """
+        screenshot = capture_screen()
+        self.is_unchanged(screenshot)  # keeps the reference frame current for later captures
+        return self._process_capture(screenshot, incremental=False)
+
+    def _process_capture(self, screenshot: Image.Image, incremental: bool) -> tuple[Path, str]:
+        screenshot_path = self.archive_screenshot(screenshot)
+        text, lines = self.recognize_structured(screenshot, incremental, source=str(screenshot_path or "screenshot"))
+        self.last_result = (self.save_text(text, screenshot_path, lines), text)
+        return self.last_result
+
+    def screenshot_and_ocr_if_changed(self) -> Optional[tuple[Path, str]]:
+        """Like screenshot_and_ocr, but returns None without saving or OCR when the screen looks the same
+
+        Frames within OCR_CHANGE_THRESHOLD bits of the last processed frame's
+        difference hash are skipped; last_result still refers to that frame.
+        """
+        screenshot = capture_screen()
+        if self.is_unchanged(screenshot) and self.last_result is not None:
+            self.skipped_frames += 1
+            return None
+        return self._process_capture(screenshot, incremental=settings.OCR_INCREMENTAL)
+
+ocr_processor = OCRProcessor()
+ocr_queue = OCRJobQueue()
+
+
+if __name__ == "__main__":
+    import sys
 
-ocr_processor = OCRProcessor()
\ No newline at end of file
+    folder = Path(sys.argv[1]) if len(sys.argv) > 1 else get_screenshots_dir()
+    images = sorted(path for path in folder.iterdir()
+                    if path.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"))
+    for image_path, text in ocr_processor.run_ocr_batch(images):
+        print(f"{image_path.name}: {len(text)} characters")
\ No newline at end of file
@@ -0,0 +1,354 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+from config.settings import settings
+from core.io_throttle import apply_background_priority
+
+logger = logging.getLogger(__name__)
+
+MISFIRE_POLICIES = ('skip', 'coalesce', 'catch_up')
+
+
+class IntervalSchedule:
+    """Runs every `seconds` seconds"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+
+    def next_after(self, timestamp: float) -> float:
+        return timestamp + self.seconds
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields accept *, numbers, ranges (1-5), steps (*/15, 0-30/10), lists
+    (1,15) and, for months and weekdays, names (jan, mon). Sunday is 0 or 7.
+    As in Vixie cron, when both day fields are restricted either may match.
+    Times are local.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    NAMES = {
+        3: ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'],
+        4: ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'],
+    }
+    SEARCH_YEARS = 5
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: {expression!r}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            sorted(self._parse_field(field, index)) for index, field in enumerate(fields))
+        if 7 in self.weekdays:
+            self.weekdays = sorted(set(self.weekdays) - {7} | {0})
+        self.days_restricted = not fields[2].startswith('*')
+        self.weekdays_restricted = not fields[4].startswith('*')
+
+    def _value(self, text: str, index: int) -> int:
+        names = self.NAMES.get(index)
+        if names and text in names:
+            return names.index(text) + (1 if index == 3 else 0)
+        return int(text)
+
+    def _parse_field(self, field: str, index: int) -> Set[int]:
+        low, high = self.FIELDS[index]
+        values = set()
+        for part in field.lower().split(','):
+            part, has_step, step = part.partition('/')
+            step = int(step) if has_step else 1
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (self._value(value, index) for value in part.split('-', 1))
+            else:
+                start = self._value(part, index)
+                end = high if has_step else start
+            if step < 1 or not low <= start <= end <= high:
+                raise ValueError(f"Invalid cron field {field!r} in {self.expression!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day or weekday
+        return day and weekday
+
+    def next_after(self, timestamp: float) -> float:
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * self.SEARCH_YEARS)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            minute = next((m for m in self.minutes if m >= moment.minute), None)
+            if minute is None:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=minute).timestamp()
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def __str__(self):
+        return f"cron {self.expression}"
+
+
+class Job:
+    """A scheduled callable and its run state"""
+
+    def __init__(self, name: str, func: Callable[[], None], schedule, jitter: float = 0.0,
+                 misfire: str = 'coalesce', pool: str = 'default'):
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy {misfire!r}, expected one of {', '.join(MISFIRE_POLICIES)}")
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.jitter = jitter
+        self.misfire = misfire
+        self.pool = pool
+        self.paused = False
+        self.due: Optional[float] = None  # nominal time of the next run
+        self.next_run: Optional[float] = None  # due plus jitter
+        self.running = False
+        self.backlog = 0
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def status(self) -> Dict:
+        return {
+            'name': self.name,
+            'schedule': str(self.schedule),
+            'pool': self.pool,
+            'paused': self.paused,
+            'running': self.running,
+            'next_run': self.next_run if not self.paused else None,
+            'last_run': self.last_run,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+
+class Scheduler:
+    """Runs interval and cron jobs on bounded thread pools
+
+    A single timer thread keeps jobs in a heap ordered by next run time and
+    hands due jobs to their pool. A job never overlaps itself: if it is still
+    running when it comes due again, that run is counted as skipped, so each
+    pool's queue holds at most one entry per job. Runs that start more than
+    SCHEDULER_MISFIRE_GRACE seconds late (sleep, suspended VM, busy pool)
+    follow the job's misfire policy:
+      skip      drop the missed runs and wait for the next occurrence
+      coalesce  run once for any number of missed occurrences
+      catch_up  run every missed occurrence back to back (at most MAX_CATCH_UP)
+    Jitter delays each run by up to `jitter` seconds without shifting the
+    underlying schedule.
+    """
+
+    MAX_CATCH_UP = 10
+    MAX_SLEEP = 60  # seconds; bounds the reaction time to wall clock jumps
+
+    def __init__(self, workers: Optional[int] = None):
+        self.misfire_grace = settings.SCHEDULER_MISFIRE_GRACE
+        self.jobs: Dict[str, Job] = {}
+        self._pool_config = {'default': (workers or settings.SCHEDULER_WORKERS, False)}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def add_pool(self, name: str, workers: int, background: bool = False):
+        """Declare a worker pool; background pools run at BACKGROUND_NICE / BACKGROUND_IO_CLASS priority"""
+        with self._condition:
+            self._pool_config[name] = (max(1, workers), background)
+
+    def _pool(self, name: str) -> ThreadPoolExecutor:
+        pool = self._pools.get(name)
+        if pool is None:
+            workers, background = self._pool_config[name]
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"scheduler-{name}",
+                                      initializer=apply_background_priority if background else None)
+            self._pools[name] = pool
+        return pool
+
+    def add_job(self, name: str, func: Callable[[], None], schedule, jitter: float = 0.0,
+                misfire: str = 'coalesce', pool: str = 'default', paused: bool = False,
+                run_now: bool = False) -> Job:
+        """Schedule func; a job with the same name is replaced"""
+        if pool not in self._pool_config:
+            raise ValueError(f"Unknown scheduler pool: {pool}")
+        job = Job(name, func, schedule, jitter, misfire, pool)
+        job.paused = paused
+        with self._condition:
+            if name in self.jobs:
+                self.jobs[name].paused = True  # drops its heap entries
+            self.jobs[name] = job
+            if not paused:
+                now = time.time()
+                self._schedule(job, now if run_now else schedule.next_after(now))
+        logger.debug(f"Scheduled job {name} ({schedule}, misfire={misfire}, pool={pool})")
+        return job
+
+    def every(self, name: str, seconds: float, func: Callable[[], None], **kwargs) -> Job:
+        return self.add_job(name, func, IntervalSchedule(seconds), **kwargs)
+
+    def cron(self, name: str, expression: str, func: Callable[[], None], **kwargs) -> Job:
+        return self.add_job(name, func, CronSchedule(expression), **kwargs)
+
+    def remove_job(self, name: str):
+        with self._condition:
+            job = self.jobs.pop(name, None)
+            if job:
+                job.paused = True
+
+    def pause(self, name: str):
+        with self._condition:
+            self.jobs[name].paused = True
+
+    def resume(self, name: str, run_now: bool = False):
+        with self._condition:
+            job = self.jobs[name]
+            if not job.paused:
+                return
+            job.paused = False
+            now = time.time()
+            self._schedule(job, now if run_now else job.schedule.next_after(now))
+
+    def run_now(self, name: str):
+        """Run a job immediately (unless it is already running), keeping its schedule"""
+        with self._condition:
+            self._submit(self.jobs[name], 1)
+
+    def status(self) -> List[Dict]:
+        with self._condition:
+            return [job.status() for job in self.jobs.values()]
+
+    def _schedule(self, job: Job, due: float):
+        job.due = due
+        job.next_run = due + (random.uniform(0, job.jitter) if job.jitter else 0)
+        heapq.heappush(self._heap, (job.next_run, next(self._sequence), job))
+        self._condition.notify()
+
+    def start(self):
+        """Start the timer thread"""
+        if self.is_running():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop scheduling; with wait=True, also wait for running jobs to finish"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        self._pools = {}
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _loop(self):
+        with self._condition:
+            while not self._stopping:
+                # Entries of paused, removed or rescheduled jobs are dropped lazily
+                while self._heap and (self._heap[0][2].paused or self._heap[0][0] != self._heap[0][2].next_run
+                                      or self.jobs.get(self._heap[0][2].name) is not self._heap[0][2]):
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait(self.MAX_SLEEP)
+                    continue
+                now = time.time()
+                next_run, _, job = self._heap[0]
+                if next_run > now:
+                    self._condition.wait(min(next_run - now, self.MAX_SLEEP))
+                    continue
+                heapq.heappop(self._heap)
+                self._fire(job, now)
+
+    def _fire(self, job: Job, now: float):
+        late = now - job.next_run
+        # Count the occurrences that have come due, then move on to the first one in the future
+        occurrences = 1
+        following = job.schedule.next_after(job.due)
+        while following <= now and occurrences <= self.MAX_CATCH_UP:
+            occurrences += 1
+            following = job.schedule.next_after(following)
+        if following <= now:  # too far behind to count every occurrence
+            following = job.schedule.next_after(now)
+        self._schedule(job, following)
+
+        if late > self.misfire_grace:
+            if job.misfire == 'skip':
+                job.skipped += occurrences
+                logger.info(f"Skipped job {job.name}: {late:.0f}s late")
+                return
+            logger.info(f"Job {job.name} is {late:.0f}s late, running "
+                        f"{occurrences if job.misfire == 'catch_up' else 1} time(s)")
+        self._submit(job, occurrences if job.misfire == 'catch_up' else 1)
+
+    def _submit(self, job: Job, runs: int):
+        if job.running:
+            job.skipped += runs
+            logger.debug(f"Job {job.name} is still running, skipped {runs} run(s)")
+            return
+        job.running = True
+        job.backlog = runs - 1
+        try:
+            self._pool(job.pool).submit(self._run, job)
+        except RuntimeError:  # pool shut down by stop()
+            job.running = False
+
+    def _run(self, job: Job):
+        while True:
+            start = time.time()
+            try:
+                job.func()
+                job.last_error = None
+            except Exception as e:
+                job.failures += 1
+                job.last_error = str(e)
+                logger.error(f"Scheduled job {job.name} failed: {e}")
+            job.runs += 1
+            job.last_run = start
+            job.last_duration = time.time() - start
+            with self._condition:
+                if job.backlog and not job.paused and not self._stopping:
+                    job.backlog -= 1
+                    continue
+                job.backlog = 0
+                job.running = False
+                return
@@ -1,31 +1,245 @@
+import heapq
+import threading
+import time
 import psutil
 from datetime import datetime
+import logging
 
-class SystemMonitor:
-    """Simple system resource monitoring"""
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_CPU_WINDOW = 0.1  # seconds; shorter CPU deltas are mostly noise
+PROCESS_ATTRS = ['pid', 'name', 'create_time', 'cpu_times', 'memory_info', 'io_counters']
+PROCESS_CPU_BUDGET = 0.01  # fraction of one core the process tracker may use
+
+
+class ProcessTracker:
+    """Top-N processes by CPU, resident memory and I/O rate
+
+    process_iter() fetches only PROCESS_ATTRS, inside a oneshot() block per
+    process. CPU and I/O rates are deltas of the cumulative counters against
+    the previous sample, so nothing blocks waiting for a measurement window.
+    """
+
+    def __init__(self, top_n: int = None):
+        self.top_n = top_n or settings.PROCESS_TOP_N
+        self._previous = {}  # pid -> (create_time, cpu seconds, io bytes)
+        self._last_sample = None
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = now - self._last_sample if self._last_sample else None
+        current = {}
+        rows = []
+        for proc in psutil.process_iter(PROCESS_ATTRS, ad_value=None):
+            info = proc.info
+            cpu_times, memory, io = info['cpu_times'], info['memory_info'], info['io_counters']
+            if cpu_times is None:
+                continue  # exited or inaccessible
+            cpu_total = cpu_times.user + cpu_times.system
+            io_total = io.read_bytes + io.write_bytes if io else None
+            current[info['pid']] = (info['create_time'], cpu_total, io_total)
+            previous = self._previous.get(info['pid'])
+            # a different create_time means the PID was reused by a new process
+            if not elapsed or previous is None or previous[0] != info['create_time']:
+                cpu_percent, io_rate = 0.0, 0.0
+            else:
+                cpu_percent = max(0.0, cpu_total - previous[1]) / elapsed * 100
+                io_rate = 0.0
+                if io_total is not None and previous[2] is not None:
+                    io_rate = max(0, io_total - previous[2]) / elapsed
+            rows.append({
+                'pid': info['pid'],
+                'name': info['name'],
+                'cpu_percent': round(cpu_percent, 1),
+                'rss_mb': round(memory.rss / (1024 * 1024), 1) if memory else 0.0,
+                'io_bytes_per_sec': round(io_rate),
+            })
+        self._previous = current  # drops processes that have exited
+        self._last_sample = now
+        return {
+            'process_count': len(rows),
+            'cpu': heapq.nlargest(self.top_n, rows, key=lambda row: row['cpu_percent']),
+            'memory': heapq.nlargest(self.top_n, rows, key=lambda row: row['rss_mb']),
+            'io': heapq.nlargest(self.top_n, rows, key=lambda row: row['io_bytes_per_sec']),
+        }
+
+
+def filesystem_usage():
+    """Usage of every mounted physical filesystem, once per device"""
+    filesystems = []
+    seen = set()
+    for partition in psutil.disk_partitions(all=False):
+        if partition.device in seen:
+            continue
+        seen.add(partition.device)
+        try:
+            usage = psutil.disk_usage(partition.mountpoint)
+        except (PermissionError, OSError):
+            continue
+        filesystems.append({
+            'device': partition.device,
+            'mountpoint': partition.mountpoint,
+            'fstype': partition.fstype,
+            'total_gb': round(usage.total / (1024 ** 3), 1),
+            'percent': usage.percent,
+        })
+    return filesystems
+
+
+class DiskIOTracker:
+    """Per-disk read/write rates from deltas of psutil.disk_io_counters"""
 
     def __init__(self):
+        self._previous = None
+        self._last_sample = None
+
+    def sample(self):
+        now = time.monotonic()
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception:
+            return {}
+        rates = {}
+        if self._previous is not None and now > self._last_sample:
+            elapsed = now - self._last_sample
+            for disk, counter in counters.items():
+                previous = self._previous.get(disk)
+                if previous is None:
+                    continue
+                rates[disk] = {
+                    'read_bytes_per_sec': round(max(0, counter.read_bytes - previous.read_bytes) / elapsed),
+                    'write_bytes_per_sec': round(max(0, counter.write_bytes - previous.write_bytes) / elapsed),
+                }
+        self._previous = counters
+        self._last_sample = now
+        return rates
+
+
+class SystemMonitor:
+    """Simple system resource monitoring
+
+    Call start() to sample in a background thread every MONITOR_INTERVAL
+    seconds. CPU usage is measured as the delta since the previous sample
+    (psutil.cpu_percent(interval=None)), so sampling never blocks. Each
+    sample is published as a new dict, so readers never need a lock.
+
+    Samples also carry every mounted filesystem, per-disk I/O rates and,
+    every PROCESS_SAMPLE_INTERVAL seconds, the top processes. On hosts with
+    many processes that interval is stretched to keep the tracker within
+    PROCESS_CPU_BUDGET.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.MONITOR_INTERVAL
         self.last_check = None
         self.cpu_percent = 0
         self.memory_percent = 0
         self.disk_percent = 0
+        self._snapshot = None
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.process_tracker = ProcessTracker()
+        self.disk_io_tracker = DiskIOTracker()
+        self._top_processes = None
+        self._last_process_sample = None
+        self._process_interval = settings.PROCESS_SAMPLE_INTERVAL
+        psutil.cpu_percent(interval=None)  # prime the delta-based CPU counter
+        self._last_cpu_sample = time.monotonic()
 
     def update_stats(self):
         """Update system stats"""
         self.last_check = datetime.now()
-        self.cpu_percent = psutil.cpu_percent(interval=1)
+        elapsed = time.monotonic() - self._last_cpu_sample
+        # Only the very first sample right after priming may wait, and only briefly
+        wait = MIN_CPU_WINDOW - elapsed if elapsed < MIN_CPU_WINDOW else None
+        self.cpu_percent = psutil.cpu_percent(interval=wait)
+        self._last_cpu_sample = time.monotonic()
         self.memory_percent = psutil.virtual_memory().percent
         self.disk_percent = psutil.disk_usage('/').percent
-
-    def get_stats(self):
-        """Return current system stats as a dictionary"""
-        self.update_stats()
-        return {
+        self._update_top_processes()
+        # Publish by swapping the reference; readers see either the old or the new dict
+        self._snapshot = {
             'timestamp': self.last_check.isoformat(),
             'cpu_percent': self.cpu_percent,
             'memory_percent': self.memory_percent,
-            'disk_percent': self.disk_percent
+            'disk_percent': self.disk_percent,
+            'filesystems': filesystem_usage(),
+            'disk_io': self.disk_io_tracker.sample(),
+            'top_processes': self._top_processes
         }
+        return self._snapshot
+
+    def _update_top_processes(self):
+        if not settings.PROCESS_SAMPLE_INTERVAL:
+            return
+        now = time.monotonic()
+        if self._last_process_sample is not None and now - self._last_process_sample < self._process_interval:
+            return
+        cpu_start = time.thread_time()
+        try:
+            self._top_processes = self.process_tracker.sample()
+        except Exception as e:
+            logger.error(f"Process sampling failed: {e}")
+        cost = time.thread_time() - cpu_start
+        self._process_interval = max(settings.PROCESS_SAMPLE_INTERVAL, cost / PROCESS_CPU_BUDGET)
+        self._last_process_sample = now
+
+    def get_stats(self):
+        """Return current system stats as a dictionary"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.update_stats()
+        if not self.is_running() and time.monotonic() - self._last_cpu_sample >= MIN_CPU_WINDOW:
+            return self.update_stats()  # no sampler: sample on demand
+        return snapshot
+
+    def peek_stats(self):
+        """Latest sample of the background sampler, or None when it isn't running
+
+        Unlike get_stats() this never samples on the calling thread.
+        """
+        return self._snapshot if self.is_running() else None
+
+    def add_listener(self, callback):
+        """Call callback(snapshot) from the sampler thread after every sample"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def start(self):
+        """Start the background sampler"""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                snapshot = self.update_stats()
+                for callback in list(self._listeners):
+                    try:
+                        callback(snapshot)
+                    except Exception as e:
+                        logger.error(f"System monitor listener failed: {e}")
+            except Exception as e:
+                logger.error(f"System monitor sample failed: {e}")
+            self._stop_event.wait(self.interval)
 
 
 if __name__ == "__main__":
@@ -33,4 +247,10 @@ if __name__ == "__main__":
     stats = monitor.get_stats()
     print("System stats:")
     for key, value in stats.items():
-        print(f"{key}: {value}")
\ No newline at end of file
+        if key != 'top_processes':
+            print(f"{key}: {value}")
+    time.sleep(1)
+    top = monitor.process_tracker.sample()
+    print(f"Top processes by CPU ({top['process_count']} running):")
+    for row in top['cpu']:
+        print(f"  {row['pid']:>7} {row['name']}: {row['cpu_percent']}% CPU, {row['rss_mb']} MB")
@@ -0,0 +1,4 @@
+"""Command line entry point: python -m deskbot [gui | daemon]"""
+from main import main
+
+main()
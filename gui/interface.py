@@ -2,13 +2,20 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 from pathlib import Path
 from datetime import datetime
-import threading
 import time
 import csv
+import sqlite3
+from collections import deque
 
+from core.alerts import AlertEngine
+from core.daemon import add_default_jobs
 from core.file_organizer import FileOrganizer
+from core.file_watcher import FileWatcher
+from core.metrics_store import MetricsStore
 from core.system_monitor import SystemMonitor
-from core.ocr_processor import ocr_processor
+from core.ocr_index import ocr_index
+from core.ocr_processor import ocr_processor, ocr_queue
+from core.scheduler import Scheduler
 from config.settings import settings
 from utils.logger import setup_logger
 
@@ -22,11 +29,30 @@ class DeskBotGUI:
         self.root.geometry(f"{settings.WINDOW_WIDTH}x{settings.WINDOW_HEIGHT}")
 
         self.monitor = SystemMonitor()
-        self.file_organizer = FileOrganizer()
-        self.session_logs = []
-
-        # Auto screenshot flag
+        self.metrics_store = MetricsStore()
+        self.monitor.add_listener(self.metrics_store.record_snapshot)
+        self.alert_engine = AlertEngine()
+        self.alert_engine.subscribe(lambda event: self.root.after(0, lambda: self.on_alert(event)))
+        self.monitor.add_listener(self.alert_engine.evaluate)
+        self.monitor.start()
+        # Manual passes, scheduled passes and watch flushes share one organizer, so they never overlap
+        self.file_organizer = FileOrganizer(self.monitor)
+        # Event log only; system usage history lives in the metrics store
+        self.session_logs = deque(maxlen=settings.SESSION_LOG_LIMIT)
+        self.session_started = time.time()
+
+        # Auto organize and auto screenshot run on the scheduler; both start paused
+        self.auto_organize_enabled = False
         self.auto_screenshot_enabled = False
+        self.scheduler = Scheduler()
+        add_default_jobs(self.scheduler, self.file_organizer,
+                         on_organized=lambda stats: self.root.after(
+                             0, lambda: self.append_action_log("Auto", stats, f"Auto organized files: {stats}")),
+                         on_screenshot=self._on_auto_ocr_done, organize=False)
+        self.scheduler.start()
+
+        # Watch mode (created on first start)
+        self.file_watcher = None
 
         self.create_widgets()
         self.update_system_stats()  # Start system monitoring
@@ -65,6 +91,12 @@ class DeskBotGUI:
         ttk.Button(frame, text="Organize Desktop", command=self.organize_desktop).pack(side="left", padx=5, pady=5)
         ttk.Button(frame, text="Custom Directory", command=self.organize_custom_directory).pack(side="left", padx=5, pady=5)
 
+        self.watch_mode_btn = ttk.Button(frame, text="Start Watch Mode", command=self.toggle_watch_mode)
+        self.watch_mode_btn.pack(side="left", padx=5, pady=5)
+
+        self.auto_organize_btn = ttk.Button(frame, text="Start Auto Organize", command=self.toggle_auto_organize)
+        self.auto_organize_btn.pack(side="left", padx=5, pady=5)
+
     # ---------------- Logs ----------------
     def create_logs_tab(self, parent):
         frame = ttk.LabelFrame(parent, text="Live Log")
@@ -88,34 +120,60 @@ class DeskBotGUI:
         self.auto_screenshot_btn = ttk.Button(frame, text="Start Auto Screenshot", command=self.toggle_auto_screenshot)
         self.auto_screenshot_btn.pack(pady=5)
 
+        # Search previous OCR results
+        search_frame = ttk.Frame(frame)
+        search_frame.pack(fill="x", pady=5)
+        self.ocr_search_entry = ttk.Entry(search_frame)
+        self.ocr_search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.ocr_search_entry.bind("<Return>", lambda event: self.search_ocr())
+        ttk.Button(search_frame, text="Search OCR", command=self.search_ocr).pack(side="left", padx=5)
+
         self.ocr_output = scrolledtext.ScrolledText(frame, state="disabled", height=15)
         self.ocr_output.pack(fill="both", expand=True)
 
     def run_ocr(self):
-        """Run OCR in a separate thread to avoid blocking GUI"""
-        threading.Thread(target=self._ocr_thread, daemon=True).start()
+        """Queue a screenshot + OCR job for the shared OCR worker to avoid blocking GUI"""
+        accepted = ocr_queue.submit(
+            ocr_processor.screenshot_and_ocr,
+            callback=lambda result: self.root.after(0, lambda: self._on_ocr_done(result)),
+            error_callback=lambda e: self.root.after(0, lambda: messagebox.showerror("OCR Error", str(e)))
+        )
+        if not accepted:
+            self.append_log("OCR is busy, please try again shortly.")
 
-    def _ocr_thread(self):
-        try:
-            text_file, text = ocr_processor.screenshot_and_ocr()
-
-            # Update logs
-            log_msg = f"OCR run: saved to {text_file}"
-            self.append_log(log_msg)
-            self.session_logs.append({
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "type": "ocr",
-                "cpu": None,
-                "memory": None,
-                "disk": None,
-                "event": log_msg
-            })
-
-            # Update OCR output in main thread
-            self.root.after(0, lambda: self._update_ocr_output(text))
+    def _on_ocr_done(self, result):
+        text_file, text = result
 
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("OCR Error", str(e)))
+        # Update logs
+        log_msg = f"OCR run: saved to {text_file}"
+        self.append_log(log_msg)
+        self.session_logs.append({
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "type": "ocr",
+            "cpu": None,
+            "memory": None,
+            "disk": None,
+            "event": log_msg
+        })
+
+        self._update_ocr_output(text)
+
+    def search_ocr(self):
+        """Show the best matching OCR results with their screenshots"""
+        query = self.ocr_search_entry.get().strip()
+        if not query:
+            return
+        try:
+            results = ocr_index.search(query)
+        except sqlite3.Error as e:
+            messagebox.showerror("OCR Search Error", str(e))
+            return
+        lines = [f"{len(results)} result(s) for {query}", ""]
+        for result in results:
+            captured = datetime.fromtimestamp(result['captured_at']).strftime("%Y-%m-%d %H:%M:%S")
+            lines.append(f"{captured}  {result['screenshot'] or result['text_file']}")
+            lines.append(f"    {result['snippet']}")
+        self._update_ocr_output("\n".join(lines))
 
     def _update_ocr_output(self, text):
         self.ocr_output.configure(state="normal")
@@ -142,31 +200,31 @@ class DeskBotGUI:
         })
 
         if self.auto_screenshot_enabled:
-            threading.Thread(target=self._auto_screenshot_loop, daemon=True).start()
-
-    def _auto_screenshot_loop(self):
-        while self.auto_screenshot_enabled:
-            try:
-                text_file, _ = ocr_processor.screenshot_and_ocr()
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                log_msg = f"Auto OCR saved to {text_file}"
-                
-                # Update Logs tab
-                self.root.after(0, lambda msg=log_msg: self.append_log(msg))
-                
-                # Add to session logs
-                self.session_logs.append({
-                    "timestamp": timestamp,
-                    "type": "ocr",
-                    "cpu": None,
-                    "memory": None,
-                    "disk": None,
-                    "event": log_msg
-                })
-                logger.info(log_msg)
-            except Exception as e:
-                logger.error(f"Auto OCR error: {e}")
-            time.sleep(settings.AUTO_SCREENSHOT_INTERVAL)
+            self.scheduler.resume('screenshot', run_now=True)
+        else:
+            self.scheduler.pause('screenshot')
+
+    def _on_auto_ocr_done(self, result):
+        if result is None:
+            logger.debug("Screen unchanged, skipped auto OCR")
+            return
+        text_file, _ = result
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        log_msg = f"Auto OCR saved to {text_file}"
+
+        # Update Logs tab
+        self.root.after(0, lambda msg=log_msg: self.append_log(msg))
+
+        # Add to session logs
+        self.session_logs.append({
+            "timestamp": timestamp,
+            "type": "ocr",
+            "cpu": None,
+            "memory": None,
+            "disk": None,
+            "event": log_msg
+        })
+        logger.info(log_msg)
 
     # ---------------- System ----------------
     def create_system_tab(self, parent):
@@ -181,8 +239,20 @@ class DeskBotGUI:
             label.pack(side="left", padx=5)
             self.labels[metric.lower()] = label
 
+        self.top_process_label = ttk.Label(frame, text="Top process: -")
+        self.top_process_label.pack(anchor="w", padx=5, pady=2)
+
     # ---------------- File Organizer ----------------
+    def _organizer_busy(self) -> bool:
+        """Refuse a manual pass while a scheduled or watch pass runs, instead of freezing the window"""
+        if self.file_organizer.is_busy():
+            self.append_log("An organize pass is already running, try again when it has finished")
+            return True
+        return False
+
     def organize_downloads(self):
+        if self._organizer_busy():
+            return
         try:
             stats = self.file_organizer.organize_files()
             message = f"Organized Downloads: {stats}"
@@ -191,6 +261,8 @@ class DeskBotGUI:
             self.append_log(f"Error organizing Downloads: {e}")
 
     def organize_desktop(self):
+        if self._organizer_busy():
+            return
         try:
             desktop_path = [Path.home() / "Desktop"]
             files = self.file_organizer.scan_directories_from_list(desktop_path)
@@ -205,6 +277,8 @@ class DeskBotGUI:
         if not folder:
             self.append_log("No directory selected for custom organization.")
             return
+        if self._organizer_busy():
+            return
         try:
             folder_path = [Path(folder)]
             files = self.file_organizer.scan_directories_from_list(folder_path)
@@ -214,6 +288,43 @@ class DeskBotGUI:
         except Exception as e:
             self.append_log(f"Error organizing custom directory: {e}")
 
+    def toggle_watch_mode(self):
+        if self.file_watcher and self.file_watcher.is_running():
+            self.file_watcher.stop()
+            self.watch_mode_btn.config(text="Start Watch Mode")
+            self.append_log("Watch mode stopped")
+            return
+
+        def on_organized(stats):
+            message = f"Watch mode organized files: {stats}"
+            self.root.after(0, lambda: self.append_action_log("Watch", stats, message))
+
+        self.file_watcher = FileWatcher(self.file_organizer, on_organized=on_organized)
+        self.file_watcher.start()
+        self.watch_mode_btn.config(text="Stop Watch Mode")
+        self.append_log("Watch mode started")
+
+    def toggle_auto_organize(self):
+        self.auto_organize_enabled = not self.auto_organize_enabled
+        state_msg = "started" if self.auto_organize_enabled else "stopped"
+        self.auto_organize_btn.config(
+            text="Stop Auto Organize" if self.auto_organize_enabled else "Start Auto Organize"
+        )
+        self.append_log(f"Auto Organize {state_msg}")
+        self.session_logs.append({
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "type": "organizer",
+            "cpu": None,
+            "memory": None,
+            "disk": None,
+            "event": f"Auto Organize {state_msg}"
+        })
+
+        if self.auto_organize_enabled:
+            self.scheduler.resume('organize')
+        else:
+            self.scheduler.pause('organize')
+
     def append_action_log(self, directory_type, stats, message):
         logger.info(message)
         self.append_log(message)
@@ -228,24 +339,33 @@ class DeskBotGUI:
 
     # ---------------- System Monitor ----------------
     def update_system_stats(self):
-        stats = self.monitor.get_stats()
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stats = self.monitor.get_stats()  # cached snapshot from the sampler thread, never blocks
 
         self.labels["cpu"].config(text=f"CPU: {stats['cpu_percent']}%")
         self.labels["memory"].config(text=f"Memory: {stats['memory_percent']}%")
         self.labels["disk"].config(text=f"Disk: {stats['disk_percent']}%")
+        top = stats.get("top_processes")
+        if top and top["cpu"]:
+            busiest = top["cpu"][0]
+            self.top_process_label.config(
+                text=f"Top process: {busiest['name']} (PID {busiest['pid']}) {busiest['cpu_percent']}% CPU, {busiest['rss_mb']} MB"
+            )
 
+        self.root.after(5000, self.update_system_stats)
+
+    def on_alert(self, event):
+        prefix = "ALERT" if event["state"] == "firing" else "Resolved"
+        message = f"{prefix}: {event['message']}"
+        self.append_log(message)
         self.session_logs.append({
-            "timestamp": timestamp,
-            "type": "system",
-            "cpu": stats['cpu_percent'],
-            "memory": stats['memory_percent'],
-            "disk": stats['disk_percent'],
-            "event": ""
+            "timestamp": datetime.fromisoformat(event["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+            "type": "alert",
+            "cpu": None,
+            "memory": None,
+            "disk": None,
+            "event": message
         })
 
-        self.root.after(5000, self.update_system_stats)
-
     # ---------------- Logging ----------------
     def append_log(self, message):
         self.log_area.configure(state="normal")
@@ -254,8 +374,24 @@ class DeskBotGUI:
         self.log_area.configure(state="disabled")
 
     # ---------------- Export ----------------
+    def _system_usage_rows(self):
+        """System samples recorded by the metrics store during this session"""
+        columns = [self.metrics_store.query(name, since=self.session_started) for name in ("cpu", "memory", "disk")]
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(cpu["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "type": "system",
+                "cpu": cpu["avg"],
+                "memory": memory["avg"],
+                "disk": disk["avg"],
+                "event": ""
+            }
+            for cpu, memory, disk in zip(*columns)
+        ]
+
     def export_logs(self):
-        if not self.session_logs:
+        rows = sorted([*self.session_logs, *self._system_usage_rows()], key=lambda entry: entry["timestamp"])
+        if not rows:
             self.append_log("No session logs to export.")
             return
 
@@ -272,7 +408,7 @@ class DeskBotGUI:
                 fieldnames = ["timestamp", "type", "cpu", "memory", "disk", "event"]
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
-                for entry in self.session_logs:
+                for entry in rows:
                     writer.writerow(entry)
             self.append_log(f"Session logs exported to {file_path}")
         except Exception as e:
@@ -282,7 +418,10 @@ class DeskBotGUI:
 def run_gui():
     root = tk.Tk()
     app = DeskBotGUI(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.scheduler.stop(wait=False)
 
 
 if __name__ == "__main__":
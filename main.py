@@ -1,9 +1,32 @@
-from gui.interface import run_gui
+import argparse
+
 from utils.logger import setup_logger
 
-# Initialize logger
-logger = setup_logger(__name__)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="deskbot", description="DeskBot - Desktop Smart Organizer")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("gui", help="start the Tk interface (default)")
+    daemon_parser = commands.add_parser("daemon", help="run monitoring and scheduled jobs headless, without Tk")
+    daemon_parser.add_argument("--watch", action=argparse.BooleanOptionalAction, default=None,
+                               help="organize files as they arrive (default: DAEMON_WATCH)")
+    daemon_parser.add_argument("--screenshots", action=argparse.BooleanOptionalAction, default=None,
+                               help="take auto screenshots for OCR, needs a display (default: DAEMON_SCREENSHOTS)")
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        # Configure the root logger so messages from core modules reach the console and log file
+        logger = setup_logger()
+        logger.info("Starting DeskBot daemon...")
+        from core.daemon import run_daemon
+        run_daemon(watch=args.watch, screenshots=args.screenshots)
+    else:
+        logger = setup_logger(__name__)
+        logger.info("Starting DeskBot...")
+        # Imported here so the daemon never loads Tk
+        from gui.interface import run_gui
+        run_gui()
+
 
 if __name__ == "__main__":
-    logger.info("Starting DeskBot...")
-    run_gui()
+    main()
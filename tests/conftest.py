@@ -0,0 +1,29 @@
+import pytest
+
+from config.settings import settings
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point settings and the module-level stores at a temporary data directory"""
+    from core.backup_store import backup_store
+    from core.file_catalog import file_catalog
+    from core.hash_cache import hash_cache
+
+    data = tmp_path / "data"
+    monkeypatch.setattr(settings, 'DATA_DIR', data)
+    monkeypatch.setattr(settings, 'ORGANIZED_FILES_DIR', data / "organized_files")
+    monkeypatch.setattr(settings, 'DUPLICATES_DIR', data / "duplicates")
+    monkeypatch.setattr(settings, 'SCREENSHOTS_DIR', data / "screenshots")
+    monkeypatch.setattr(settings, 'THROTTLE_ENABLED', False)
+    for store, name in ((hash_cache, "hash_cache.sqlite3"), (file_catalog, "catalog.sqlite3")):
+        monkeypatch.setattr(store, 'db_path', data / name)
+        monkeypatch.setattr(store, '_conn', None)
+    monkeypatch.setattr(backup_store, 'root', data / "backups")
+    monkeypatch.setattr(backup_store, 'blobs_dir', data / "backups" / "blobs")
+    monkeypatch.setattr(backup_store, 'manifest_path', data / "backups" / "manifest.jsonl")
+    monkeypatch.setattr(backup_store, '_touched', set())
+    yield data
+    for store in (hash_cache, file_catalog):
+        if store._conn is not None:
+            store._conn.close()
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from core.alerts import AlertEngine, RateRule, ThresholdRule
+
+
+def feed(rule, samples):
+    """Evaluate (timestamp, value) samples and return the (timestamp, state) of every event"""
+    events = []
+    for timestamp, value in samples:
+        event = rule.evaluate(value, timestamp)
+        if event:
+            events.append((timestamp, event['state']))
+    return events
+
+
+def test_threshold_fires_once_after_the_sustain_window():
+    rule = ThresholdRule('cpu_high', 'cpu', threshold=80, duration=120, hysteresis=5)
+    samples = [(t, 95) for t in range(0, 300, 10)]
+    assert feed(rule, samples) == [(120, 'firing')]
+    assert rule.active
+
+
+def test_short_spikes_do_not_fire():
+    rule = ThresholdRule('cpu_high', 'cpu', threshold=80, duration=60)
+    # 50s above, one sample below restarts the window, then 50s above again
+    samples = [(t, 90) for t in range(0, 60, 10)] + [(60, 70)] + [(t, 90) for t in range(70, 130, 10)]
+    assert feed(rule, samples) == []
+    assert not rule.active
+
+
+def test_no_flapping_inside_the_hysteresis_band_and_resolve_below_it():
+    rule = ThresholdRule('memory_high', 'memory', threshold=80, duration=0, hysteresis=5)
+    samples = [(0, 85), (10, 79), (20, 81), (30, 76), (40, 80), (50, 74.9), (60, 76), (70, 81)]
+    assert feed(rule, samples) == [(0, 'firing'), (50, 'resolved'), (70, 'firing')]
+
+
+def test_rate_rule_is_silent_during_warm_up():
+    rule = RateRule('disk_filling', 'disk', horizon=24 * 3600, smoothing=600)
+    # Jumps 1% per minute: full within the horizon, but only 9 minutes have been observed
+    samples = [(t, 50 + t / 60) for t in range(0, 600, 60)]
+    assert feed(rule, samples) == []
+    assert rule.rate > 0
+
+
+def test_rate_rule_predicts_time_until_full_and_resolves_with_headroom():
+    rule = RateRule('disk_filling', 'disk', horizon=3600, smoothing=600)
+    # 1% per minute from 20%: once warmed up, the smoothed rate predicts a full disk within the hour
+    rising = [(t, 20 + t / 60) for t in range(0, 3660, 60)]
+    events = feed(rule, rising)
+    assert len(events) == 1 and events[0][0] >= 600 and events[0][1] == 'firing'
+    assert abs(rule.time_until_limit(80) - 1200) < 120  # (100 - 80)% at ~1%/min, after the average has settled
+    # Flat disk: the smoothed rate decays until the prediction leaves horizon * 1.2
+    flat = [(t, 80) for t in range(3660, 3660 + 3 * 3600, 60)]
+    assert [state for _, state in feed(rule, flat)] == ['resolved']
+    assert not rule.active
+
+
+def test_engine_publishes_events_from_snapshots():
+    rule = ThresholdRule('cpu_high', 'cpu', threshold=50)
+    engine = AlertEngine([rule])
+    events = []
+    engine.subscribe(events.append)
+    engine.evaluate({'timestamp': datetime(2026, 1, 1, 12).isoformat(), 'cpu_percent': 75})
+    assert [(event['rule'], event['state'], event['value']) for event in events] == [('cpu_high', 'firing', 75)]
+    assert engine.active_alerts() == ['cpu_high']
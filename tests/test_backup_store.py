@@ -0,0 +1,58 @@
+import json
+import os
+
+from core.backup_store import backup_store
+
+
+def test_identical_content_is_stored_once(tmp_path, data_dir):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("same content")
+    second.write_text("same content")
+    assert backup_store.backup(first) == backup_store.backup(second)
+    blobs = [p for p in backup_store.blobs_dir.glob('*/*') if not p.name.startswith('.')]
+    assert len(blobs) == 1
+    assert {r['path'] for r in backup_store._read_manifest()} == {str(first), str(second)}
+
+
+def test_backup_survives_in_place_edit_of_the_original(tmp_path, data_dir):
+    original = tmp_path / "report.txt"
+    original.write_text("version 1")
+    blob = backup_store.backup(original)
+    assert blob.stat().st_ino != original.stat().st_ino
+
+    with open(original, 'r+') as f:  # in place, same inode
+        f.write("VERSION 2")
+    assert blob.read_text() == "version 1"
+
+    record = backup_store.find(original)[0]
+    restored = backup_store.restore(record, tmp_path / "restored.txt")
+    assert restored.read_text() == "version 1"
+
+
+def test_hardlinked_blob_from_older_versions_is_replaced(tmp_path, data_dir):
+    original = tmp_path / "photo.jpg"
+    original.write_bytes(b"pixels")
+    blob = backup_store.backup(original)
+    blob.unlink()
+    os.link(original, blob)  # what the hardlink fallback used to produce
+
+    backup_store.backup(original)
+    assert blob.stat().st_nlink == 1
+    assert blob.read_bytes() == b"pixels"
+
+
+def test_garbage_collection_drops_expired_records_and_orphan_blobs(tmp_path, data_dir, monkeypatch):
+    original = tmp_path / "old.txt"
+    original.write_text("old")
+    blob = backup_store.backup(original)
+    monkeypatch.setattr(backup_store, 'retention_days', 1)
+    records = backup_store._read_manifest()
+    for record in records:
+        record['time'] -= 2 * 86400
+    backup_store.manifest_path.write_text("".join(
+        json.dumps(record) + "\n" for record in records))
+    backup_store._touched.clear()  # as if the backup happened before the last GC pass
+
+    result = backup_store.collect_garbage()
+    assert result['expired_records'] == 1 and result['removed_blobs'] == 1
+    assert not blob.exists()
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+from core.categorizer import MEMO_LIMIT, Categorizer
+
+CATEGORIES = {
+    'images': ['.jpg', '.png'],
+    'archives': ['.zip', '.gz', '.tar.gz'],
+    'documents': ['.pdf', '.txt'],
+}
+
+
+def test_extensions_and_multi_part_suffixes():
+    categorizer = Categorizer(CATEGORIES, rules=[])
+    assert categorizer.category_for_name("photo.JPG") == 'images'
+    assert categorizer.category_for_name("backup.tar.gz") == 'archives'
+    assert categorizer.category_for_name("notes.2023.05.01.txt") == 'documents'
+    assert categorizer.category_for_name(".bashrc") == 'others'
+    assert categorizer.category_for_name("README") == 'others'
+
+
+def test_memo_stays_small_for_date_stamped_names():
+    categorizer = Categorizer(CATEGORIES, rules=[])
+    for day in range(1, 29):
+        for month in range(1, 13):
+            categorizer.category_for_name(f"scan.2023.{month:02}.{day:02}.jpg")
+    assert set(categorizer._memo) == {'jpg'}
+    for i in range(MEMO_LIMIT * 2):
+        categorizer.category_for_name(f"dump.{i}.gz")  # .gz ends .tar.gz, so the chain is kept
+    assert len(categorizer._memo) <= MEMO_LIMIT
+
+
+def test_rules_apply_in_file_order_before_extensions():
+    rules = [
+        {"category": "invoices", "glob": "invoice*.pdf"},
+        {"category": "reports", "regex": "(report|summary)_\\d+\\.pdf"},
+        {"category": "everything_pdf", "glob": "*.pdf"},
+    ]
+    categorizer = Categorizer(CATEGORIES, rules=rules)
+    assert categorizer.categorize(Path("Invoice_42.pdf")) == 'invoices'
+    assert categorizer.categorize(Path("summary_7.pdf")) == 'reports'
+    assert categorizer.categorize(Path("other.pdf")) == 'everything_pdf'
+    assert categorizer.categorize(Path("photo.jpg")) == 'images'
+
+
+def test_regex_backreferences_work_in_user_rules():
+    rules = [
+        {"category": "plain", "glob": "*.txt"},
+        {"category": "doubled", "regex": "(\\w+)-\\1\\.pdf"},
+        {"category": "pdfs", "glob": "*.pdf"},
+    ]
+    categorizer = Categorizer(CATEGORIES, rules=rules)
+    assert categorizer.categorize(Path("copy-copy.pdf")) == 'doubled'
+    assert categorizer.categorize(Path("copy-paste.pdf")) == 'pdfs'
+    assert categorizer.categorize(Path("a.txt")) == 'plain'
+
+
+def test_invalid_regex_rule_is_ignored():
+    categorizer = Categorizer(CATEGORIES, rules=[{"category": "broken", "regex": "(unclosed"},
+                                                 {"category": "pdfs", "glob": "*.pdf"}])
+    assert [rule.category for rule in categorizer.rules] == ['pdfs']
+    assert categorizer.categorize(Path("x.pdf")) == 'pdfs'
+
+
+def test_size_predicates_need_stat(tmp_path):
+    big = tmp_path / "setup.msi"
+    big.write_bytes(b"x" * 2048)
+    rules = [{"category": "installers", "extensions": [".msi"], "min_size_mb": 0.001}]
+    categorizer = Categorizer(CATEGORIES, rules=rules)
+    assert categorizer.categorize(big) == 'installers'
+    small = tmp_path / "tiny.msi"
+    small.write_bytes(b"x")
+    assert categorizer.categorize(small) == 'others'
+
+
+def test_rules_without_a_category_are_skipped(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text('[{"extensions": ["txt"]}, "notes", {"category": "pdfs", "glob": "*.pdf"}]')
+    categorizer = Categorizer(CATEGORIES, rules=Categorizer.load_rules(rules_file))
+    assert [rule.category for rule in categorizer.rules] == ['pdfs']
+    assert categorizer.categorize(Path("notes.txt")) == 'documents'
+
+
+def test_rules_file_must_hold_a_list(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text('{"category": "x"}')
+    assert Categorizer.load_rules(rules_file) == []
+    assert Categorizer(CATEGORIES, rules=[{"category": "big", "min_size_mb": "lots"}]).rules == []
+
+
+def test_age_signature_changes_only_when_an_age_limit_is_crossed():
+    day = 86400
+    categorizer = Categorizer(CATEGORIES, rules=[
+        {'category': 'fresh', 'max_age_days': 7},
+        {'category': 'stale', 'min_age_days': 30},
+        {'category': 'big', 'min_size_mb': 10},
+    ])
+    assert categorizer.age_signature(0, now=1 * day) == categorizer.age_signature(0, now=6 * day) == (True, False)
+    assert categorizer.age_signature(0, now=8 * day) == (False, False)
+    assert categorizer.age_signature(0, now=31 * day) == (False, True)
+    assert Categorizer(CATEGORIES, rules=[{'category': 'big', 'min_size_mb': 10}]).age_signature(0) == ()
@@ -0,0 +1,61 @@
+import pytest
+
+from config.settings import settings
+from core.content_sniffer import ContentSniffer
+from core.file_organizer import FileOrganizer
+
+OLE2 = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + b'\x00' * 504
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+@pytest.mark.parametrize("header, expected", [
+    (PNG, ('png', 'images', True)),
+    (b'%PDF-1.7\n', ('pdf', 'documents', True)),
+    (b'PK\x03\x04' + b'\x00' * 26 + b'word/document.xml', ('docx', 'documents', True)),
+    (b'PK\x03\x04' + b'\x00' * 26 + b'data.bin', ('zip', 'archives', False)),
+    (OLE2, ('ole2', 'documents', False)),
+    (b'#!/bin/sh\necho hi\n', ('script', 'code', False)),
+    (b'MZ just some text', ('text', 'documents', False)),  # no PE header behind the MZ
+    (b'\x00\x01\x02binary', None),
+    (b'\x00\x00\x00\x18ftypisom\x00\x00\x02\x00', ('mp4', 'videos', True)),
+    (b'\x00\x00\x00\x18ftypM4A \x00\x00\x02\x00', ('m4a', 'audio', True)),
+    (b'\x00\x00\x00\x18ftypheic\x00\x00\x00\x00', ('heic', 'images', True)),
+    (b'\x00\x00\x00\x18ftypheif\x00\x00\x00\x00', ('heif', 'images', True)),
+    (b'\x00\x00\x00\x18ftypmif1\x00\x00\x00\x00', ('heif', 'images', True)),
+    (b'\x00\x00\x00\x1cftypavif\x00\x00\x00\x00', ('avif', 'images', True)),
+    (b'\x00\x00\x00\x18ftypzzzz\x00\x00\x00\x00', ('mp4', 'videos', False)),  # unknown brand
+])
+def test_classify(header, expected):
+    assert ContentSniffer.classify(header) == expected
+
+
+@pytest.fixture
+def organizer(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'CONTENT_SNIFFING', 'all')
+    return FileOrganizer()
+
+
+@pytest.mark.parametrize("name, category", [
+    ("budget.xls", 'spreadsheets'),
+    ("setup.msi", 'executables'),
+    ("slides.ppt", 'presentations'),
+    ("letter.doc", 'documents'),
+])
+def test_ole2_files_keep_their_extension_category(tmp_path, organizer, name, category):
+    path = tmp_path / name
+    path.write_bytes(OLE2)
+    assert organizer.categorize_batch([path]) == {path: category}
+
+
+def test_heic_photos_are_not_moved_to_videos(tmp_path, organizer):
+    path = tmp_path / "IMG_0001.HEIC"
+    path.write_bytes(b'\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic' + b'\x00' * 64)
+    assert organizer.categorize_batch([path]) == {path: 'images'}
+
+
+def test_strong_signature_overrides_a_wrong_extension(tmp_path, organizer):
+    path = tmp_path / "holiday.pdf"
+    path.write_bytes(PNG)
+    unknown = tmp_path / "download"
+    unknown.write_bytes(OLE2)
+    assert organizer.categorize_batch([path, unknown]) == {path: 'images', unknown: 'documents'}
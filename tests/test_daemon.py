@@ -0,0 +1,49 @@
+import threading
+
+from config.settings import settings
+from core.daemon import DeskBotDaemon, add_default_jobs
+from core.file_organizer import FileOrganizer
+from core.scheduler import Scheduler
+
+
+def test_watcher_and_scheduled_job_share_one_organizer(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'METRICS_DIR', data_dir / "metrics")
+    daemon = DeskBotDaemon(watch=True, screenshots=False)
+    try:
+        assert daemon.file_watcher.organizer is daemon.organizer
+        assert {job['name'] for job in daemon.scheduler.status()} >= {'organize', 'screenshot'}
+    finally:
+        daemon.metrics_store.close()
+
+
+def test_organize_job_starts_paused_unless_requested(data_dir):
+    organizer = FileOrganizer()
+    for organize in (False, True):
+        scheduler = Scheduler()
+        add_default_jobs(scheduler, organizer, organize=organize)
+        assert scheduler.jobs['organize'].paused is not organize
+        assert scheduler.jobs['screenshot'].paused
+
+
+def test_concurrent_passes_on_one_organizer_do_not_race(tmp_path, data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'BACKUP_BEFORE_ORGANIZE', True)
+    organizer = FileOrganizer()
+    monkeypatch.setattr(organizer, 'STABILITY_WAIT', 0.05)
+    files = []
+    for i in range(20):
+        path = tmp_path / f"report_{i}.txt"
+        path.write_text(f"report {i}")
+        files.append(path)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(organizer.organize_files(list(files), min_age=0)))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(stats['total_organized'] for stats in results) == [0, 20]
+    assert all(stats['total_errors'] == 0 for stats in results)
+    organized = list((settings.ORGANIZED_FILES_DIR / "documents").iterdir())
+    assert len(organized) == 20
@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+
+from core.directory_scanner import DirectoryScanner
+from core.file_organizer import FileOrganizer
+
+
+def make_tree(root: Path):
+    (root / "sub" / "deeper").mkdir(parents=True)
+    for name in ("a.txt", ".hidden", "sub/b.pdf", "sub/deeper/c.jpg"):
+        (root / name).write_text(name)
+
+
+def test_scan_respects_recursion_depth_and_ignore_patterns(tmp_path):
+    make_tree(tmp_path)
+    flat = DirectoryScanner(recursive=False, ignore_patterns=['.*'])
+    assert {p.name for p in flat.scan([tmp_path])} == {"a.txt"}
+    one_level = DirectoryScanner(recursive=True, max_depth=1, ignore_patterns=['.*'])
+    assert {p.name for p in one_level.scan([tmp_path])} == {"a.txt", "b.pdf"}
+    everything = DirectoryScanner(recursive=True, max_depth=None, ignore_patterns=[])
+    assert {p.name for p in everything.scan([tmp_path])} == {"a.txt", ".hidden", "b.pdf", "c.jpg"}
+
+
+def test_symlinked_directory_loops_are_walked_once(tmp_path):
+    make_tree(tmp_path)
+    os.symlink(tmp_path, tmp_path / "sub" / "loop")
+    scanner = DirectoryScanner(recursive=True, max_depth=None, ignore_patterns=[], symlinks='follow')
+    names = [p.name for p in scanner.scan([tmp_path])]
+    assert sorted(names) == sorted(["a.txt", ".hidden", "b.pdf", "c.jpg"])
+
+
+class CountingEntry:
+    """DirEntry proxy counting stat() calls (os.DirEntry itself can't be patched)"""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.stat_calls = 0
+
+    def __fspath__(self):
+        return self.entry.path
+
+    def stat(self, **kwargs):
+        self.stat_calls += 1
+        return self.entry.stat(**kwargs)
+
+
+def test_filter_safe_to_move_stats_each_entry_once(tmp_path, data_dir, monkeypatch):
+    make_tree(tmp_path)
+    (tmp_path / "b.txt").write_text("b")
+    organizer = FileOrganizer()
+    monkeypatch.setattr(organizer, 'STABILITY_WAIT', 0)
+    entries = [CountingEntry(entry) for entry in
+               DirectoryScanner(recursive=False, ignore_patterns=['.*']).scan_entries([tmp_path])]
+    calls = []
+    real_stat = Path.stat
+
+    def counting_stat(self, *args, **kwargs):
+        calls.append(self)
+        return real_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'stat', counting_stat)
+    safe, rejected = organizer.filter_safe_to_move(entries, min_age=0)
+    assert sorted(safe) == [tmp_path / "a.txt", tmp_path / "b.txt"] and not rejected
+    # First snapshot: exactly one DirEntry.stat() per file; the re-check after the wait goes to disk
+    assert [entry.stat_calls for entry in entries] == [1, 1]
+    assert sorted(calls) == sorted(safe)
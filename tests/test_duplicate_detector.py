@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from config.settings import settings
+from core.duplicate_detector import DuplicateDetector
+from core.file_organizer import FileOrganizer
+
+
+@pytest.fixture
+def organizer(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'BACKUP_BEFORE_ORGANIZE', False)
+    monkeypatch.setattr(settings, 'DUPLICATE_ACTION', 'skip')
+    organizer = FileOrganizer()
+    monkeypatch.setattr(organizer, 'STABILITY_WAIT', 0)
+    return organizer
+
+
+def test_duplicates_within_a_batch_keep_the_oldest_copy(tmp_path, data_dir):
+    original, copy, other = tmp_path / "a.txt", tmp_path / "a (1).txt", tmp_path / "b.txt"
+    original.write_text("hello world")
+    copy.write_text("hello world")
+    other.write_text("hello there")  # same size, different content
+    os.utime(original, (1, 1))
+    assert DuplicateDetector('skip').find_duplicates([copy, other, original]) == [[original, copy]]
+
+
+def test_file_saved_again_later_is_caught_in_a_later_pass(tmp_path, organizer):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    (downloads / "invoice.pdf").write_bytes(b"%PDF-1.4 invoice")
+    first = organizer.organize_files([downloads / "invoice.pdf"], min_age=0)
+    assert first['total_organized'] == 1
+
+    (downloads / "invoice (1).pdf").write_bytes(b"%PDF-1.4 invoice")
+    (downloads / "receipt.pdf").write_bytes(b"%PDF-1.4 receip")  # same size, different content
+    second = organizer.organize_files(sorted(downloads.iterdir()), min_age=0)
+    assert second['total_organized'] == 1
+    assert second['duplicates']['found'] == 1
+    assert (downloads / "invoice (1).pdf").exists()  # skipped, left in place
+    assert sorted(p.name for p in (settings.ORGANIZED_FILES_DIR / "documents").iterdir()) == \
+        ["invoice.pdf", "receipt.pdf"]
+
+
+def test_organized_files_are_never_acted_on(tmp_path, organizer, monkeypatch):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    monkeypatch.setattr(organizer.duplicate_detector, 'action', 'none')
+    for name in ("one.txt", "two.txt"):  # organized before duplicate detection was enabled
+        (downloads / name).write_text("unique")
+        organizer.organize_files([downloads / name], min_age=0)
+    documents = settings.ORGANIZED_FILES_DIR / "documents"
+    detector = DuplicateDetector('skip')
+    assert detector.find_duplicates([]) == []
+
+    (downloads / "three.txt").write_text("unique")
+    groups = detector.find_duplicates([downloads / "three.txt"])
+    assert len(groups) == 1
+    keeper, *duplicates = groups[0]
+    assert keeper.parent == documents and duplicates == [downloads / "three.txt"]
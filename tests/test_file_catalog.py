@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from config.settings import settings
+from core.file_catalog import FileCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = FileCatalog(tmp_path / "catalog.sqlite3")
+    yield catalog
+    if catalog._conn is not None:
+        catalog._conn.close()
+
+
+def organized(root, relative, data):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def test_first_stats_reconcile_an_existing_tree(tmp_path, catalog, monkeypatch):
+    root = tmp_path / "organized"
+    organized(root, "images/a.png", b"x" * 1024)
+    organized(root, "images/b.png", b"x" * 2048)
+    pdf = organized(root, "documents/c.pdf", b"x" * 512)
+    organized(root, "stray.txt", b"not in a category")
+    os.utime(pdf, (1_000_000, 1_000_000))
+    monkeypatch.setattr(settings, 'ORGANIZED_FILES_DIR', root)
+
+    stats = catalog.get_category_stats()
+    assert stats['images']['file_count'] == 2
+    assert stats['images']['total_size_mb'] == round(3072 / (1024 * 1024), 2)
+    assert stats['documents'] == {'file_count': 1, 'total_size_mb': 0.0, 'last_modified': 1_000_000}
+    assert set(stats) == {'images', 'documents'}
+
+
+def test_reconcile_adds_updates_and_removes(tmp_path, catalog):
+    root = tmp_path / "organized"
+    kept = organized(root, "documents/kept.txt", b"v1")
+    gone = organized(root, "documents/gone.txt", b"x")
+    catalog.record(kept, 'documents')
+    catalog.record(gone, 'documents')
+    catalog.flush()
+
+    gone.unlink()
+    kept.write_bytes(b"version two")
+    organized(root, "archives/new.zip", b"zip")
+    assert catalog.reconcile(root) == {'added': 1, 'updated': 1, 'removed': 1}
+    assert {record['name']: record['size'] for record in catalog.search()} == {'kept.txt': 11, 'new.zip': 3}
+    assert catalog.reconcile(root) == {'added': 0, 'updated': 0, 'removed': 0}
+
+
+def test_search_by_name_and_category(tmp_path, catalog):
+    root = tmp_path / "organized"
+    for relative in ("documents/report_2024.pdf", "documents/notes.txt", "images/report_cover.png"):
+        catalog.record(organized(root, relative, b"x"), relative.split("/")[0])
+    assert {r['name'] for r in catalog.search("report")} == {'report_2024.pdf', 'report_cover.png'}
+    assert [r['name'] for r in catalog.search("report*", category='images')] == ['report_cover.png']
+    assert catalog.search("100%") == []  # % is literal, not a wildcard
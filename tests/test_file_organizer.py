@@ -0,0 +1,38 @@
+import os
+import time
+
+import core.file_organizer as file_organizer_module
+from core.file_organizer import FileOrganizer
+
+
+def test_stability_check_waits_once_per_batch_and_reports_reasons(tmp_path, data_dir, monkeypatch):
+    old = time.time() - 3600
+    paths = {}
+    for name in ("stable.txt", "growing.log", "fresh.txt"):
+        paths[name] = tmp_path / name
+        paths[name].write_text(name)
+        if name != "fresh.txt":
+            os.utime(paths[name], (old, old))
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        with open(paths["growing.log"], "a") as f:  # written to while the check waits
+            f.write("more")
+
+    monkeypatch.setattr(file_organizer_module.time, 'sleep', sleep)
+    organizer = FileOrganizer()
+    safe, rejected = organizer.filter_safe_to_move(
+        [paths["stable.txt"], paths["growing.log"], paths["fresh.txt"], tmp_path / "gone.txt"], min_age=60)
+    assert safe == [paths["stable.txt"]]
+    assert rejected == {'changing': 1, 'too_recent': 1, 'missing': 1}
+    assert sleeps == [organizer.STABILITY_WAIT]
+
+
+def test_rejections_are_reported_in_pass_stats(tmp_path, data_dir):
+    path = tmp_path / "new.txt"
+    path.write_text("just written")
+    stats = FileOrganizer().organize_files([path], min_age=3600)
+    assert stats['total_organized'] == 0
+    assert stats['skipped'] == {'too_recent': 1}
+    assert path.exists()
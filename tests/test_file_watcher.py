@@ -0,0 +1,95 @@
+import threading
+import time
+
+from config.settings import settings
+from core.file_watcher import FileWatcher, PollingSource
+
+
+class FakeOrganizer:
+    """Records flushes; moves away only the files listed in `movable`"""
+
+    def __init__(self, movable=None):
+        self.calls = []
+        self.movable = movable
+
+    def scan_directories_from_list(self, directories):
+        return []
+
+    def organize_files(self, files, min_age=None, background=False):
+        self.calls.append(sorted(files))
+        moved = [path for path in files if self.movable is None or path.name in self.movable]
+        for path in moved:
+            path.unlink()
+        return {'total_organized': len(moved), 'total_errors': 0}
+
+
+def test_polling_honours_its_interval(tmp_path, monkeypatch):
+    source = PollingSource(interval=0.3)
+    source.add_watch(tmp_path)
+    listings = []
+    take_snapshot = source._take_snapshot
+    monkeypatch.setattr(source, '_take_snapshot', lambda directory: listings.append(directory) or take_snapshot(directory))
+
+    (tmp_path / "new.txt").write_text("x")
+    changed = []
+    deadline = time.monotonic() + 0.45
+    while time.monotonic() < deadline:
+        paths, _ = source.read_events(0.05)  # short debounce-driven timeouts
+        changed += paths
+    assert len(listings) == 1
+    assert changed == [tmp_path / "new.txt"]
+
+
+def test_files_are_organized_once_they_stop_changing(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'WATCH_DEBOUNCE_SECONDS', 0.3)
+    watcher = FileWatcher(FakeOrganizer(), directories=[tmp_path])
+    path = tmp_path / "report.pdf"
+    path.write_text("x")
+    watcher._queue([path])
+    watcher._flush_settled()
+    assert watcher.organizer.calls == []
+    time.sleep(0.2)
+    watcher._queue([path])  # written again: the debounce starts over
+    time.sleep(0.2)
+    watcher._flush_settled()
+    assert watcher.organizer.calls == []
+    time.sleep(0.15)
+    watcher._flush_settled()
+    assert watcher.organizer.calls == [[path]]
+    assert not watcher.pending
+
+
+def test_files_left_in_place_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'WATCH_DEBOUNCE_SECONDS', 0)
+    watcher = FileWatcher(FakeOrganizer(movable={"moved.txt"}), directories=[tmp_path])
+    moved, locked = tmp_path / "moved.txt", tmp_path / "locked.txt"
+    moved.write_text("x")
+    locked.write_text("x")
+    watcher._queue([moved, locked])
+    watcher._flush_settled()
+    assert list(watcher.pending) == [locked]
+    for _ in range(watcher.MAX_RETRIES):
+        watcher._flush_settled()
+    assert not watcher.pending and not watcher.retries
+    assert len(watcher.organizer.calls) == watcher.MAX_RETRIES + 1
+
+
+def test_polling_watcher_end_to_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'WATCH_FORCE_POLLING', True)
+    monkeypatch.setattr(settings, 'WATCH_POLL_INTERVAL', 0.2)
+    monkeypatch.setattr(settings, 'WATCH_DEBOUNCE_SECONDS', 0.1)
+    organizer = FakeOrganizer()
+    watcher = FileWatcher(organizer, directories=[tmp_path])
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.05)
+        (tmp_path / "photo.jpg").write_text("x")
+        deadline = time.monotonic() + 3
+        while not organizer.calls and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher._stop_event.set()
+        thread.join(timeout=5)
+    assert watcher.backend == 'polling'
+    assert organizer.calls == [[tmp_path / "photo.jpg"]]
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from config.settings import settings
+from core.io_throttle import IOThrottle
+from core.system_monitor import SystemMonitor
+
+
+class FakeMonitor:
+    def __init__(self, cpu=10.0):
+        self.cpu = cpu
+        self.calls = 0
+
+    def peek_stats(self):
+        self.calls += 1
+        return {'cpu_percent': self.cpu, 'memory_percent': 10.0, 'disk_io': {}}
+
+
+@pytest.fixture(autouse=True)
+def throttle_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'THROTTLE_ENABLED', True)
+    monkeypatch.setattr(settings, 'THROTTLE_CHECK_INTERVAL', 0)
+    monkeypatch.setattr(settings, 'CPU_THRESHOLD', 80)
+    monkeypatch.setattr(settings, 'MEMORY_THRESHOLD', 85)
+
+
+def test_busy_system_halves_the_level_and_idle_ramps_it_back():
+    monitor = FakeMonitor(cpu=95)
+    throttle = IOThrottle(monitor, max_workers=4)
+    throttle._refresh()
+    throttle._refresh()
+    assert throttle.level == 0.25 and throttle.allowed_workers == 1
+    monitor.cpu = 5
+    for _ in range(3):
+        throttle._refresh()
+    assert throttle.level == 1.0
+
+
+def test_slots_are_limited_while_throttled():
+    throttle = IOThrottle(FakeMonitor(cpu=95), max_workers=4)
+    throttle._refresh()  # level 0.5 -> 2 workers
+    active, peak = [], [0]
+    lock = threading.Lock()
+
+    def work():
+        with throttle.slot():
+            with lock:
+                active.append(1)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= throttle.allowed_workers
+
+
+def test_without_a_running_sampler_the_throttle_never_samples(monkeypatch):
+    throttle = IOThrottle()
+    assert throttle.monitor is None
+    with throttle.slot():
+        pass
+    assert throttle.level == 1.0
+
+    monitor = SystemMonitor()
+    monkeypatch.setattr(monitor, 'update_stats', lambda: pytest.fail("sampled on the caller's thread"))
+    throttle = IOThrottle(monitor)
+    throttle._refresh()
+    assert throttle.level == 1.0
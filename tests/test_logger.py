@@ -0,0 +1,79 @@
+import gzip
+import json
+import logging
+import queue
+
+from utils.logger import BatchingQueueListener, JsonLinesFormatter, LogFileHandler, RecordQueueHandler, log_stage
+
+
+def make_record(message, *args, **extra):
+    record = logging.LogRecord('deskbot.test', logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_include_extra_fields():
+    line = JsonLinesFormatter().format(make_record("moved %d files", 3, stage='move', duration_ms=1.5))
+    entry = json.loads(line)
+    assert entry['message'] == "moved 3 files"
+    assert (entry['level'], entry['logger']) == ('INFO', 'deskbot.test')
+    assert (entry['stage'], entry['duration_ms']) == ('move', 1.5)
+    assert not {'args', 'msg', 'levelno', 'pathname'} & set(entry)
+
+
+def test_log_stage_records_its_duration():
+    records = []
+    logger = logging.getLogger('deskbot.test.stage')
+    logger.setLevel(logging.DEBUG)
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    try:
+        with log_stage(logger, 'dedup', files=4):
+            pass
+    finally:
+        logger.removeHandler(handler)
+    assert [(r.stage, r.files) for r in records] == [('dedup', 4)]
+    assert records[0].duration_ms >= 0
+
+
+def test_rotated_files_are_gzipped(tmp_path):
+    path = tmp_path / "app.log"
+    handler = LogFileHandler(path, max_bytes=200, backup_count=2, compress=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(12):
+        handler.emit(make_record(f"line {i:02} " + "x" * 40))
+    handler.close()
+    backups = sorted(p.name for p in tmp_path.iterdir())
+    assert backups == ["app.log", "app.log.1.gz", "app.log.2.gz"]
+    newest_backup = gzip.decompress((tmp_path / "app.log.1.gz").read_bytes()).decode()
+    assert newest_backup.splitlines()[0].startswith("line 04")
+    assert path.read_text().splitlines()[0].startswith("line 08")
+
+
+def test_listener_flushes_once_per_batch():
+    flushes = []
+
+    class CountingHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+
+        def emit(self, record):
+            self.messages.append(record.getMessage())
+
+        def flush(self):
+            flushes.append(len(self.messages))
+
+    handler = CountingHandler()
+    record_queue = queue.SimpleQueue()
+    producer = RecordQueueHandler(record_queue)
+    args = ["before"]
+    for i in range(10):
+        producer.emit(make_record("record %d %s", i, args))
+    args[0] = "after"  # changed once queued: the message must already be rendered
+    listener = BatchingQueueListener(record_queue, handler, batch_size=4)
+    listener.start()
+    listener.stop()
+    assert handler.messages == [f"record {i} ['before']" for i in range(10)]
+    assert flushes[:3] == [4, 8, 10]
@@ -0,0 +1,58 @@
+from core.metrics_store import MetricSeries, MetricsStore
+
+TIERS = (('raw', 0, 5), ('minute', 60, 3))
+
+
+def test_raw_ring_wraps_and_keeps_the_newest_samples():
+    series = MetricSeries('cpu', tiers=TIERS)
+    for i in range(8):
+        series.add(float(i), timestamp=1000.0 + i)
+    assert [row['avg'] for row in series.query('raw')] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert [row['timestamp'] for row in series.query('raw', since=1006)] == [1006.0, 1007.0]
+
+
+def test_rollups_aggregate_min_avg_max_per_bucket():
+    series = MetricSeries('cpu', tiers=TIERS)
+    for timestamp, value in ((60, 10), (90, 30), (119, 20), (120, 50), (185, 70)):
+        series.add(value, timestamp=timestamp)
+    rows = series.query('minute')
+    assert rows == [
+        {'timestamp': 60, 'min': 10, 'avg': 20, 'max': 30},
+        {'timestamp': 120, 'min': 50, 'avg': 50, 'max': 50},
+        {'timestamp': 180, 'min': 70, 'avg': 70, 'max': 70},  # bucket still open
+    ]
+
+
+def test_history_and_open_buckets_survive_reopening(tmp_path):
+    series = MetricSeries('cpu', tmp_path / "cpu.ring", tiers=TIERS)
+    for timestamp, value in ((60, 10), (90, 30), (120, 50)):
+        series.add(value, timestamp)
+    series.close()
+
+    reopened = MetricSeries('cpu', tmp_path / "cpu.ring", tiers=TIERS)
+    reopened.add(70, timestamp=150)  # lands in the bucket that was open when the file was closed
+    assert reopened.query('minute') == [
+        {'timestamp': 60, 'min': 10, 'avg': 20, 'max': 30},
+        {'timestamp': 120, 'min': 50, 'avg': 60, 'max': 70},
+    ]
+    assert [row['avg'] for row in reopened.query('raw')] == [10, 30, 50, 70]
+    reopened.close()
+
+
+def test_store_records_monitor_snapshots(tmp_path):
+    store = MetricsStore(tmp_path, persist=False)
+    store.record_snapshot({'timestamp': '2026-01-01T12:00:00', 'cpu_percent': 12.5,
+                           'memory_percent': 40.0, 'disk_percent': None})
+    assert sorted(store.names()) == ['cpu', 'memory']
+    assert [row['avg'] for row in store.query('cpu')] == [12.5]
+    assert not list(tmp_path.iterdir())
+    store.close()
+
+
+def test_changed_tier_layout_starts_a_fresh_file(tmp_path):
+    series = MetricSeries('cpu', tmp_path / "cpu.ring", tiers=TIERS)
+    series.add(42, timestamp=1000)
+    series.close()
+    resized = MetricSeries('cpu', tmp_path / "cpu.ring", tiers=(('raw', 0, 10),))
+    assert resized.query('raw') == []
+    resized.close()
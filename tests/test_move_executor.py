@@ -0,0 +1,55 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import core.move_executor as move_executor
+from config.settings import settings
+from core.move_executor import MoveExecutor
+
+
+class FakeThrottle:
+    @contextmanager
+    def slot(self):
+        yield
+
+    def consume(self, size):
+        pass
+
+
+class FakeOrganizer:
+    def __init__(self):
+        self.throttle = FakeThrottle()
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def move_file(self, file_path, category):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return True
+
+    def record_error(self):
+        pass
+
+
+def test_destination_cap_is_shared_across_source_devices(monkeypatch, tmp_path):
+    # Device 9 is a "spinning" destination allowed 2 concurrent moves, fed from 3 sources
+    monkeypatch.setattr(move_executor, 'device_workers', lambda device: 2 if device == 9 else 4)
+    monkeypatch.setattr(settings, 'MOVE_COPY_WORKERS', 8)  # so only the device cap applies
+    organizer = FakeOrganizer()
+    executor = MoveExecutor(organizer)
+    futures = []
+    for source in (1, 2, 3):
+        key = (source, 9)
+        for i in range(4):
+            futures.append(executor._get_pool(key).submit(
+                executor._run, tmp_path / f"{source}-{i}", 'documents', key, 10))
+    executor.wait()
+    for future in futures:
+        future.result()
+    assert organizer.peak == 2
+    assert executor.category_counts == {'documents': 12}
@@ -0,0 +1,58 @@
+import threading
+
+from core.name_allocator import NameAllocator
+
+
+def test_free_names_are_kept_and_collisions_get_a_counter(tmp_path):
+    allocator = NameAllocator()
+    assert allocator.allocate(tmp_path, "report.pdf") == tmp_path / "report.pdf"
+    assert allocator.allocate(tmp_path, "report.pdf") == tmp_path / "report_1.pdf"
+    assert allocator.allocate(tmp_path, "report.txt") == tmp_path / "report.txt"
+
+
+def test_counters_continue_after_the_highest_existing_suffix(tmp_path):
+    for name in ("photo.jpg", "photo_1.jpg", "photo_7.jpg", "photo_3.png"):
+        (tmp_path / name).write_text("x")
+    allocator = NameAllocator()
+    assert allocator.allocate(tmp_path, "photo.jpg") == tmp_path / "photo_8.jpg"
+    assert allocator.allocate(tmp_path, "photo.png") == tmp_path / "photo.png"
+    assert allocator.allocate(tmp_path, "photo_3.png") == tmp_path / "photo_3_1.png"
+
+
+def test_files_created_behind_the_index_are_not_overwritten(tmp_path):
+    allocator = NameAllocator()
+    allocator.allocate(tmp_path, "notes.txt")
+    (tmp_path / "notes_1.txt").write_text("created by someone else")
+    assert allocator.allocate(tmp_path, "notes.txt") == tmp_path / "notes_2.txt"
+
+
+def test_released_names_can_be_allocated_again(tmp_path):
+    allocator = NameAllocator()
+    path = allocator.allocate(tmp_path, "data.csv")
+    allocator.release(path)
+    assert allocator.allocate(tmp_path, "data.csv") == path
+
+
+def test_invalidate_rereads_the_directory(tmp_path):
+    allocator = NameAllocator()
+    allocator.allocate(tmp_path, "a.txt")
+    allocator.invalidate(tmp_path)
+    assert allocator.allocate(tmp_path, "a.txt") == tmp_path / "a.txt"  # never written, so free again
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    allocator = NameAllocator()
+    results = []
+    lock = threading.Lock()
+
+    def work():
+        paths = [allocator.allocate(tmp_path, "scan.png") for _ in range(50)]
+        with lock:
+            results.extend(paths)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 400
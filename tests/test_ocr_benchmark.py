@@ -0,0 +1,24 @@
+from PIL import Image
+
+from config.settings import settings
+from utils.ocr_benchmark import character_accuracy, folder_samples
+
+
+def test_repo_sample_screenshots_are_benchmarked_without_ground_truth():
+    samples = folder_samples(settings.SCREENSHOTS_DIR)
+    assert samples, "data/screenshots should hold sample captures"
+    assert all(truth is None for _, _, truth in samples)
+
+
+def test_ground_truth_sidecars_are_picked_up(tmp_path):
+    Image.new("RGB", (8, 8), "white").save(tmp_path / "a.png")
+    Image.new("RGB", (8, 8), "white").save(tmp_path / "b.png")
+    (tmp_path / "a.png.gt.txt").write_text("hello")
+    (tmp_path / "notes.txt").write_text("not an image")
+    assert [(name, truth) for name, _, truth in folder_samples(tmp_path)] == [("a.png", "hello"), ("b.png", None)]
+
+
+def test_character_accuracy_ignores_whitespace_layout():
+    assert character_accuracy("hello  world\n", "hello world") == 1.0
+    assert character_accuracy("hellp world", "hello world") == 1 - 1 / 11
+    assert character_accuracy("", "") == 1.0
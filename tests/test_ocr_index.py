@@ -0,0 +1,60 @@
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from config.settings import settings
+from core.ocr_index import OCRIndex, to_fts_query
+
+REPO_SCREENSHOTS = Path(__file__).resolve().parent.parent / "data" / "screenshots"
+
+
+@pytest.fixture
+def index(data_dir):
+    index = OCRIndex(data_dir / "ocr_index.sqlite3")
+    yield index
+    index._conn.close()
+
+
+def test_query_syntax_is_escaped():
+    assert to_fts_query('invoice "due date" rep*') == '"invoice" "due date" "rep"*'
+    assert to_fts_query('c++ OR -x') == '"c" "OR" "x"'
+    assert to_fts_query('  ') == ''
+
+
+def test_rebuild_links_the_repo_samples_to_their_screenshots(index):
+    shutil.copytree(REPO_SCREENSHOTS, settings.SCREENSHOTS_DIR)
+    assert index.rebuild() == 2
+    rows = index._connect().execute("SELECT text_file, screenshot, captured_at FROM results").fetchall()
+    links = {Path(row['text_file']).name: Path(row['screenshot']).name for row in rows}
+    assert links == {
+        "ocr_20250905_123247.txt": "screenshot_20250905_123246.png",  # saved a second after capture
+        "ocr_20250905_123639.txt": "screenshot_20250905_123639.png",
+    }
+    captured = {Path(row['screenshot']).name: row['captured_at'] for row in rows}
+    assert captured["screenshot_20250905_123246.png"] == datetime(2025, 9, 5, 12, 32, 46).timestamp()
+
+
+def test_rebuild_does_not_link_distant_screenshots(index):
+    ocr_dir = settings.SCREENSHOTS_DIR / "ocr_results"
+    ocr_dir.mkdir(parents=True)
+    (settings.SCREENSHOTS_DIR / "screenshot_20250905_120000.png").write_bytes(b"")
+    (settings.SCREENSHOTS_DIR / "screenshot_20250905_130005.png").write_bytes(b"")  # after the text
+    (ocr_dir / "ocr_20250905_130000.txt").write_text("late batch result")
+    index.rebuild()
+    assert index.search("batch")[0]['screenshot'] is None
+
+
+def test_search_ranks_and_filters_by_time(index, tmp_path):
+    index.add(tmp_path / "a.txt", "quarterly invoice for project apollo", captured_at=1000)
+    index.add(tmp_path / "b.txt", "invoice invoice invoice", captured_at=2000)
+    index.add(tmp_path / "c.txt", "meeting notes", captured_at=3000)
+    results = index.search("invoice")
+    assert [Path(r['text_file']).name for r in results] == ["b.txt", "a.txt"]
+    assert "[invoice]" in results[0]['snippet']
+    assert [Path(r['text_file']).name for r in index.search("invoice", since=1500)] == ["b.txt"]
+    assert [Path(r['text_file']).name for r in index.search('"project apollo"')] == ["a.txt"]
+    assert index.search("proj*")[0]['text_file'].endswith("a.txt")
+    index.add(tmp_path / "a.txt", "replaced text", captured_at=1000)
+    assert index.count() == 3 and index.search("apollo") == []
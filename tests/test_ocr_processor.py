@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+
+import pytest
+from PIL import Image, ImageDraw
+
+import core.ocr_processor as ocr_module
+from config.settings import settings
+from core.ocr_processor import (IncrementalOCR, OCRJobQueue, OCRPreprocessor, OCRProcessor, _ocr_files,
+                                difference_hash, hash_distance)
+
+
+def screen(*boxes, size=(640, 400)):
+    """White 'screen' with a black rectangle per box"""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        draw.rectangle(box, fill="black")
+    return image
+
+
+@pytest.fixture
+def processor(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'SCREENSHOT_ARCHIVE', False)
+    monkeypatch.setattr(settings, 'OCR_INDEX_ENABLED', False)
+    processor = OCRProcessor()
+    processor.recognized = []
+    monkeypatch.setattr(processor, 'recognize_structured',
+                        lambda image, incremental=False, source="image": processor.recognized.append(image) or ("text", None))
+    return processor
+
+
+def test_difference_hash_distance_tracks_visual_change():
+    base = screen((40, 40, 200, 80))
+    assert hash_distance(difference_hash(base), difference_hash(base.copy())) == 0
+    noisy = base.copy()
+    noisy.putpixel((300, 300), (250, 250, 250))  # one barely different pixel
+    assert hash_distance(difference_hash(base), difference_hash(noisy)) == 0
+    moved = screen((40, 240, 600, 380))
+    assert hash_distance(difference_hash(base), difference_hash(moved)) >= 10
+    assert difference_hash(base, hash_size=8) < 2 ** 64
+
+
+def test_unchanged_frames_skip_ocr(processor, monkeypatch):
+    frames = iter([screen((40, 40, 200, 80)), screen((40, 40, 200, 80)), screen((40, 40, 600, 380))])
+    monkeypatch.setattr(ocr_module, 'capture_screen', lambda: next(frames))
+    first = processor.screenshot_and_ocr_if_changed()
+    assert first is not None
+    assert processor.screenshot_and_ocr_if_changed() is None
+    assert processor.skipped_frames == 1 and processor.last_result == first
+    assert processor.screenshot_and_ocr_if_changed() is not None
+    assert len(processor.recognized) == 2
+
+
+def test_manual_captures_always_run_ocr_but_update_the_reference(processor, monkeypatch):
+    same = screen((40, 40, 200, 80))
+    monkeypatch.setattr(ocr_module, 'capture_screen', lambda: same.copy())
+    processor.screenshot_and_ocr()
+    processor.screenshot_and_ocr()
+    assert len(processor.recognized) == 2
+    assert processor.screenshot_and_ocr_if_changed() is None
+
+
+def gray_screen(*boxes):
+    return screen(*boxes, size=(512, 256)).convert("L")
+
+
+def test_changed_regions_group_adjacent_tiles():
+    ocr = IncrementalOCR(tile_size=64, diff_threshold=10)
+    assert ocr.changed_regions(gray_screen()) == [(0, 0, 512, 256)]  # first frame: everything
+    ocr.previous = gray_screen()
+    assert ocr.changed_regions(gray_screen()) == []
+    regions = ocr.changed_regions(gray_screen((10, 10, 100, 20), (400, 200, 410, 210)))
+    assert sorted(regions) == [(0, 0, 128, 64), (384, 192, 448, 256)]
+
+
+def test_regions_grow_over_cached_words_and_merge():
+    ocr = IncrementalOCR(tile_size=64)
+    ocr.words = [(50, 10, 150, 30, "invoice", 95.0, 1), (300, 10, 360, 30, "total", 90.0, 1)]
+    # A change in the first tile cuts through "invoice": re-read the whole word
+    assert ocr._expand((0, 0, 64, 64)) == (0, 0, 150, 64)
+    assert ocr._expand((200, 100, 264, 164)) == (200, 100, 264, 164)  # touches no word
+    merged = IncrementalOCR._merge([(0, 0, 150, 64), (128, 0, 192, 64), (300, 0, 364, 64)])
+    assert sorted(merged) == [(0, 0, 192, 64), (300, 0, 364, 64)]
+
+
+def test_only_changed_regions_are_sent_to_tesseract(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_MIN_CONFIDENCE', 0)
+    crops = []
+
+    def image_to_data(image, config, output_type):
+        crops.append(image.size)
+        return {'text': ["word"], 'conf': [90], 'left': [2], 'top': [2], 'width': [20], 'height': [10],
+                'block_num': [1], 'par_num': [1], 'line_num': [1], 'page_num': [1]}
+
+    monkeypatch.setattr(ocr_module.pytesseract, 'image_to_data', image_to_data)
+    ocr = IncrementalOCR(tile_size=64, diff_threshold=10)
+    ocr.preprocessor = OCRPreprocessor([])
+    ocr.recognize(screen(size=(512, 256)))
+    assert crops == [(512, 256)]
+    ocr.recognize(screen((400, 200, 410, 210), size=(512, 256)))
+    assert crops[1:] == [(64, 64)]
+    assert [word[4] for word in ocr.words] == ["word", "word"]  # the untouched word was reused
+
+
+class FakeTesseract:
+    """image_to_string stand-in: the list file gets `batch_output`, single images their own name"""
+
+    def __init__(self, batch_output):
+        self.batch_output = batch_output
+        self.calls = []
+
+    def image_to_string(self, image_input, config):
+        self.calls.append(image_input)
+        if str(image_input).endswith("images.txt"):
+            return self.batch_output
+        return f"text of {image_input}"
+
+
+@pytest.mark.parametrize("batch_output", ["page one\fpage two\fpage three", "page one\fpage two\fpage three\f"])
+def test_one_tesseract_run_per_chunk(monkeypatch, batch_output):
+    fake = FakeTesseract(batch_output)
+    monkeypatch.setattr(ocr_module.pytesseract, 'image_to_string', fake.image_to_string)
+    results = _ocr_files(["a.png", "b.png", "c.png"], "--psm 6")
+    assert results == [("page one", None), ("page two", None), ("page three", None)]
+    assert len(fake.calls) == 1
+
+
+def test_pages_that_do_not_line_up_fall_back_to_one_run_per_image(monkeypatch):
+    fake = FakeTesseract("page one\fpage two")  # one page short
+    monkeypatch.setattr(ocr_module.pytesseract, 'image_to_string', fake.image_to_string)
+    results = _ocr_files(["a.png", "b.png", "c.png"], "--psm 6")
+    assert [text for text, _ in results] == ["text of a.png", "text of b.png", "text of c.png"]
+    assert fake.calls[1:] == ["a.png", "b.png", "c.png"]
+
+
+def test_structured_chunks_are_split_by_page_number(monkeypatch):
+    def image_to_data(image_input, config, output_type):
+        return {'text': ["low", "first", "second"], 'conf': [20, 90, 80], 'page_num': [1, 1, 2],
+                'left': [0, 0, 0], 'top': [0, 0, 0], 'width': [5, 5, 5], 'height': [5, 5, 5],
+                'block_num': [1, 1, 1], 'par_num': [1, 1, 1], 'line_num': [1, 1, 1]}
+
+    monkeypatch.setattr(ocr_module.pytesseract, 'image_to_data', image_to_data)
+    results = _ocr_files(["a.png", "b.png"], "--psm 6", min_confidence=50)
+    assert [text for text, _ in results] == ["first", "second"]
+
+
+def test_job_queue_rejects_work_when_full():
+    release = threading.Event()
+    queue = OCRJobQueue(maxsize=1)
+    done = []
+    assert queue.submit(lambda: release.wait(5), callback=done.append)
+    deadline = time.monotonic() + 5
+    while queue.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)  # the worker has taken the first job
+    assert queue.submit(lambda: "second", callback=done.append)
+    assert not queue.submit(lambda: "third")
+    release.set()
+    queue._queue.join()
+    assert done == [True, "second"]
+
+
+def test_captures_are_recognized_from_memory_and_archived_in_the_background(processor, monkeypatch):
+    monkeypatch.setattr(settings, 'SCREENSHOT_ARCHIVE', True)
+    monkeypatch.setattr(ocr_module, 'capture_screen', lambda: screen((40, 40, 200, 80)))
+    saved = []
+    monkeypatch.setattr(ocr_module, 'write_screenshot', lambda image, path: saved.append(path) or image.save(path))
+    text_file, _ = processor.screenshot_and_ocr()
+    processor.writer.flush()
+    assert len(processor.recognized) == 1 and isinstance(processor.recognized[0], Image.Image)
+    assert len(saved) == 1 and saved[0].exists() and text_file.exists()
+
+
+def test_captures_are_not_written_with_archiving_off(processor, monkeypatch):
+    monkeypatch.setattr(ocr_module, 'capture_screen', lambda: screen((40, 40, 200, 80)))
+    monkeypatch.setattr(ocr_module, 'write_screenshot', lambda image, path: pytest.fail("capture was saved"))
+    processor.screenshot_and_ocr()
+    processor.writer.flush()
+    assert not list(settings.SCREENSHOTS_DIR.glob("screenshot_*"))
+
+
+def test_run_ocr_hands_the_file_path_to_tesseract(data_dir, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'OCR_PREPROCESS', [])
+    monkeypatch.setattr(settings, 'OCR_STRUCTURED', False)
+    monkeypatch.setattr(settings, 'OCR_INDEX_ENABLED', False)
+    inputs = []
+    monkeypatch.setattr(ocr_module.pytesseract, 'image_to_string',
+                        lambda image_input, config: inputs.append(image_input) or " hello ")
+    image_path = tmp_path / "capture.png"
+    screen().save(image_path)
+    text_file, text = OCRProcessor().run_ocr(image_path)
+    assert inputs == [str(image_path)] and text == "hello"
+    assert text_file.read_text() == "hello"
+
+
+def test_in_memory_frames_are_passed_uncompressed():
+    assert ocr_module.uncompressed(screen()).format == "PPM"
+    assert ocr_module.uncompressed(Image.new("P", (4, 4))).mode == "RGB"
+
+
+OCR_DATA = {
+    'text': ["Invoice", "", "42", "smudge", "Total", "EUR"],
+    'conf': [96, -1, 91.25, 12, 88, 79],
+    'left': [10, 0, 80, 140, 10, 70], 'top': [10, 0, 12, 10, 50, 52],
+    'width': [60, 0, 20, 30, 50, 30], 'height': [12, 0, 10, 12, 12, 10],
+    'block_num': [1, 1, 1, 1, 2, 2], 'par_num': [1, 1, 1, 1, 1, 1], 'line_num': [1, 1, 1, 1, 1, 1],
+    'page_num': [1, 1, 1, 1, 1, 1],
+}
+
+
+def test_data_lines_drop_low_confidence_words_and_group_lines():
+    lines = ocr_module.data_lines(OCR_DATA, min_confidence=60)
+    assert [[word[4] for word in line] for line in lines] == [["Invoice", "42"], ["Total", "EUR"]]
+    assert lines[0][1] == (80, 12, 100, 22, "42", 91.2, 1)
+    assert ocr_module.lines_to_text(lines) == "Invoice 42\n\nTotal EUR"  # blank line between blocks
+    shifted = ocr_module.data_lines(OCR_DATA, 60, to_source=lambda box: tuple(v * 2 for v in box))
+    assert shifted[0][0][:4] == (20, 20, 140, 44)
+
+
+def test_write_records_saves_one_json_line_per_text_line(tmp_path):
+    path = tmp_path / "ocr.jsonl"
+    ocr_module.write_records(ocr_module.data_lines(OCR_DATA, min_confidence=60), path)
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records[0] == {'block': 1, 'line': 1, 'box': [10, 10, 100, 22], 'conf': 93.6, 'text': "Invoice 42",
+                          'words': [["Invoice", 96.0, 10, 10, 70, 22], ["42", 91.2, 80, 12, 100, 22]]}
+    assert (records[1]['block'], records[1]['line'], records[1]['text']) == (2, 1, "Total EUR")
@@ -0,0 +1,115 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from core.scheduler import CronSchedule, IntervalSchedule, Scheduler
+
+
+def at(*args) -> float:
+    return datetime(*args).timestamp()
+
+
+def test_cron_fields_are_parsed():
+    cron = CronSchedule("*/15 9-17 1,15 jan-mar mon-fri")
+    assert cron.minutes == [0, 15, 30, 45]
+    assert cron.hours == list(range(9, 18))
+    assert cron.days == [1, 15]
+    assert cron.months == [1, 2, 3]
+    assert cron.weekdays == [1, 2, 3, 4, 5]
+    assert CronSchedule("0 0 * * 7").weekdays == [0]
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* * * 13 *", "5-1 * * * *", "*/0 * * * *"])
+def test_invalid_cron_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_cron_next_run_times():
+    assert CronSchedule("30 2 * * *").next_after(at(2026, 3, 10, 2, 30)) == at(2026, 3, 11, 2, 30)
+    assert CronSchedule("*/20 * * * *").next_after(at(2026, 3, 10, 9, 41, 5)) == at(2026, 3, 10, 10, 0)
+    # Month rollover and year rollover
+    assert CronSchedule("0 0 1 * *").next_after(at(2026, 1, 31, 12, 0)) == at(2026, 2, 1, 0, 0)
+    assert CronSchedule("0 0 1 jan *").next_after(at(2026, 6, 1)) == at(2027, 1, 1, 0, 0)
+    # 2026-03-10 is a Tuesday: the next Monday is the 16th
+    assert CronSchedule("0 8 * * mon").next_after(at(2026, 3, 10, 12, 0)) == at(2026, 3, 16, 8, 0)
+
+
+def test_restricted_day_fields_match_either():
+    # The 13th or any Monday: Friday 2026-03-13, then Monday the 16th (not Monday 2026-04-13)
+    cron = CronSchedule("0 0 13 * mon")
+    assert cron.next_after(at(2026, 3, 11)) == at(2026, 3, 13)
+    assert cron.next_after(at(2026, 3, 13)) == at(2026, 3, 16)
+
+
+def test_impossible_cron_expression_fails_instead_of_looping():
+    with pytest.raises(ValueError, match="never matches"):
+        CronSchedule("0 0 31 feb *").next_after(time.time())
+
+
+def fire_late(misfire: str, missed: int):
+    """Fire a 60s interval job `missed` periods after it was due; return (scheduler, job, submitted runs)"""
+    scheduler = Scheduler(workers=1)
+    submitted = []
+    scheduler._submit = lambda job, runs: submitted.append(runs)
+    job = scheduler.every("job", 60, lambda: None, misfire=misfire)
+    now = time.time()
+    with scheduler._condition:
+        scheduler._schedule(job, now - 60 * missed)
+        scheduler._fire(job, now)
+    return scheduler, job, submitted, now
+
+
+def test_on_time_runs_ignore_the_misfire_policy():
+    _, job, submitted, now = fire_late('skip', 0)
+    assert submitted == [1] and job.skipped == 0
+    assert job.due == pytest.approx(now + 60)
+
+
+def test_skip_drops_missed_runs():
+    _, job, submitted, now = fire_late('skip', 3)
+    assert submitted == [] and job.skipped == 4
+    assert now < job.due <= now + 60
+
+
+def test_coalesce_runs_once():
+    _, job, submitted, now = fire_late('coalesce', 3)
+    assert submitted == [1]
+    assert now < job.due <= now + 60
+
+
+def test_catch_up_runs_every_missed_occurrence_up_to_the_limit():
+    _, _, submitted, _ = fire_late('catch_up', 3)
+    assert submitted == [4]
+    scheduler, job, submitted, now = fire_late('catch_up', 100)
+    assert submitted == [scheduler.MAX_CATCH_UP + 1]
+    assert now < job.due <= now + 60
+
+
+def test_a_running_job_is_not_overlapped():
+    scheduler = Scheduler(workers=2)
+    release, started = threading.Event(), threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+
+    job = scheduler.add_job("slow", work, IntervalSchedule(3600))
+    try:
+        scheduler.run_now("slow")
+        assert started.wait(5)
+        scheduler.run_now("slow")
+        assert job.skipped == 1
+    finally:
+        release.set()
+        scheduler.stop()
+    assert len(runs) == 1 and job.runs == 1 and not job.running
+
+
+def test_unknown_misfire_policy_is_rejected():
+    with pytest.raises(ValueError, match="misfire"):
+        Scheduler().every("job", 1, lambda: None, misfire="later")
@@ -0,0 +1,86 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import core.system_monitor as system_monitor
+from config.settings import settings
+from core.system_monitor import ProcessTracker, SystemMonitor
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monkeypatch.setattr(settings, 'PROCESS_SAMPLE_INTERVAL', 0)
+    monitor = SystemMonitor(interval=0.05)
+    yield monitor
+    monitor.stop()
+
+
+def test_sampler_publishes_to_listeners_and_survives_their_errors(monitor):
+    samples = []
+    monitor.add_listener(lambda snapshot: 1 / 0)
+    monitor.add_listener(samples.append)
+    monitor.start()
+    deadline = time.monotonic() + 3
+    while len(samples) < 3 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    monitor.stop()
+    assert len(samples) >= 3
+    assert len({id(sample) for sample in samples}) == len(samples)  # every sample is a new dict
+    assert {'timestamp', 'cpu_percent', 'memory_percent', 'disk_percent'} <= set(samples[-1])
+    assert not monitor.is_running()
+
+
+def test_reads_never_sample_on_the_caller_thread_while_running(monitor):
+    sampler_threads = []
+    update_stats = monitor.update_stats
+
+    def recording_update():
+        sampler_threads.append(threading.current_thread().name)
+        return update_stats()
+
+    monitor.update_stats = recording_update
+    monitor.start()
+    deadline = time.monotonic() + 3
+    while monitor.peek_stats() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for _ in range(20):
+        assert monitor.get_stats() is not None
+        assert monitor.peek_stats() is not None
+    monitor.stop()
+    assert set(sampler_threads) == {"system-monitor"}
+    assert monitor.peek_stats() is None
+
+
+class FakeProcess:
+    def __init__(self, pid, name, create_time, cpu_seconds, rss_mb, io_bytes=None):
+        self.info = {
+            'pid': pid, 'name': name, 'create_time': create_time,
+            'cpu_times': SimpleNamespace(user=cpu_seconds, system=0.0),
+            'memory_info': SimpleNamespace(rss=rss_mb * 1024 * 1024),
+            'io_counters': SimpleNamespace(read_bytes=io_bytes, write_bytes=0) if io_bytes is not None else None,
+        }
+
+
+def test_process_tracker_ranks_by_counter_deltas(monkeypatch):
+    clock = [100.0]
+    procs = []
+    monkeypatch.setattr(system_monitor.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(system_monitor.psutil, 'process_iter', lambda attrs, ad_value=None: list(procs))
+    tracker = ProcessTracker(top_n=2)
+
+    procs[:] = [FakeProcess(1, 'idle', 1.0, 50.0, 900, 0), FakeProcess(2, 'busy', 1.0, 10.0, 100, 0),
+                FakeProcess(3, 'copier', 1.0, 1.0, 50, 0), FakeProcess(4, 'reused', 1.0, 5.0, 10)]
+    first = tracker.sample()
+    assert all(row['cpu_percent'] == 0 for row in first['cpu'])  # no previous sample to diff against
+    assert [row['name'] for row in first['memory']] == ['idle', 'busy']
+
+    clock[0] += 10
+    procs[:] = [FakeProcess(1, 'idle', 1.0, 50.5, 900, 0), FakeProcess(2, 'busy', 1.0, 18.0, 100, 0),
+                FakeProcess(3, 'copier', 1.0, 1.0, 50, 50_000_000), FakeProcess(4, 'reused', 2.0, 9.0, 10)]
+    second = tracker.sample()
+    assert second['process_count'] == 4
+    # PID 4 now belongs to a new process (other create_time): its 4 CPU seconds are not a 40% delta
+    assert [(row['name'], row['cpu_percent']) for row in second['cpu']] == [('busy', 80.0), ('idle', 5.0)]
+    assert [(row['name'], row['io_bytes_per_sec']) for row in second['io']][0] == ('copier', 5_000_000)
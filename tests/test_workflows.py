@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+
+import pytest
+
+from automation.workflows import ACTIONS, MAP, SOURCE, Action, Workflow, WorkflowCache, WorkflowRunner
+from config.settings import settings
+
+CALLS = []
+
+
+def numbers_action(params):
+    for n in range(params.get('count', 5)):
+        yield {'n': n}
+
+
+def tag_action(items, params):
+    CALLS.extend(item['n'] for item in items)
+    return [{**item, 'lang': settings.OCR_LANGUAGE} for item in items]
+
+
+@pytest.fixture(autouse=True)
+def test_actions(monkeypatch):
+    CALLS.clear()
+    monkeypatch.setitem(ACTIONS, 'numbers', Action('numbers', SOURCE, numbers_action))
+    monkeypatch.setitem(ACTIONS, 'tag', Action('tag', MAP, tag_action, cacheable=True, depends_on=('OCR_LANGUAGE',)))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = WorkflowCache(tmp_path / "cache.sqlite3")
+    yield cache
+    if cache._conn:
+        cache._conn.close()
+
+
+def run(steps, cache):
+    return WorkflowRunner(Workflow("test", steps), cache=cache).run()
+
+
+def test_invalid_workflows_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        Workflow("w", {'src': {'action': 'numbers'},
+                       'a': {'action': 'tag', 'needs': ['src', 'b']},
+                       'b': {'action': 'tag', 'needs': ['a']}})
+    with pytest.raises(ValueError, match="unknown action"):
+        Workflow("w", {'src': {'action': 'nope'}})
+    with pytest.raises(ValueError, match="unknown steps"):
+        Workflow("w", {'a': {'action': 'tag', 'needs': 'src'}})
+    with pytest.raises(ValueError, match="needs an input step"):
+        Workflow("w", {'a': {'action': 'tag'}})
+
+
+def test_duplicate_needs_do_not_hang(cache):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(run(
+        {'src': {'action': 'numbers'}, 'tag': {'action': 'tag', 'needs': ['src', 'src']}}, cache)), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "workflow waited for a second END from the same step"
+    assert result['tag']['status'] == 'ok' and result['tag']['items_in'] == 5
+
+
+def test_map_results_are_cached_until_a_setting_they_depend_on_changes(cache, monkeypatch):
+    steps = {'src': {'action': 'numbers'}, 'tag': {'action': 'tag', 'needs': 'src'}}
+    monkeypatch.setattr(settings, 'OCR_LANGUAGE', 'eng')
+    assert run(steps, cache)['tag']['cache_hits'] == 0
+    assert run(steps, cache)['tag']['cache_hits'] == 5
+    assert sorted(CALLS) == list(range(5))
+
+    monkeypatch.setattr(settings, 'OCR_LANGUAGE', 'deu')
+    assert run(steps, cache)['tag']['cache_hits'] == 0
+    assert len(CALLS) == 10
+
+
+def test_builtin_actions_declare_their_settings():
+    assert {'FILE_CATEGORIES', 'CATEGORY_RULES_FILE', 'CONTENT_SNIFFING'} <= set(ACTIONS['categorize'].depends_on)
+    assert {'OCR_STRUCTURED', 'OCR_MIN_CONFIDENCE', 'OCR_LANGUAGE', 'OCR_PREPROCESS'} <= set(ACTIONS['ocr'].depends_on)
+
+
+def test_rule_file_edits_change_the_cache_context(tmp_path, monkeypatch):
+    rules = tmp_path / "rules.json"
+    rules.write_text('[]')
+    monkeypatch.setattr(settings, 'CATEGORY_RULES_FILE', rules)
+    before = ACTIONS['categorize'].cache_context()
+    rules.write_text('[{"category": "reports", "pattern": "report_*"}]')
+    assert ACTIONS['categorize'].cache_context() != before
+
+
+def test_export_is_rerun_and_rewrites_its_file(tmp_path, cache):
+    out = tmp_path / "out.jsonl"
+    steps = {'src': {'action': 'numbers'}, 'export': {'action': 'export', 'needs': 'src', 'with': {'path': str(out)}}}
+    assert run(steps, cache)['export']['status'] == 'ok'
+    out.unlink()
+    assert run(steps, cache)['export']['status'] == 'ok'
+    assert len(out.read_text().splitlines()) == 5
+
+
+def test_cached_categories_expire_when_a_file_ages_past_a_rule(data_dir, tmp_path, cache, monkeypatch):
+    import core.categorizer
+    import core.file_organizer
+    rules = core.categorizer.Categorizer(rules=[{'category': 'stale', 'extensions': ['.log'], 'min_age_days': 30}])
+    monkeypatch.setattr(core.categorizer, 'categorizer', rules)
+    monkeypatch.setattr(core.file_organizer, 'categorizer', rules)
+    (tmp_path / "inbox").mkdir()
+    (tmp_path / "inbox" / "app.log").write_text("log")
+    out = tmp_path / "out.jsonl"
+    steps = {'src': {'action': 'scan', 'with': {'directories': [str(tmp_path / "inbox")]}},
+             'categorize': {'action': 'categorize', 'needs': 'src'},
+             'export': {'action': 'export', 'needs': 'categorize', 'with': {'path': str(out)}}}
+
+    def categories():
+        return [json.loads(line)['category'] for line in out.read_text().splitlines()]
+
+    assert run(steps, cache)['categorize']['cache_hits'] == 0
+    assert run(steps, cache)['categorize']['cache_hits'] == 1
+    assert categories() == ['others']
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 31 * 86400)
+    assert run(steps, cache)['categorize']['cache_hits'] == 0
+    assert categories() == ['stale']
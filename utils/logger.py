@@ -1,35 +1,249 @@
+import atexit
+import gzip
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config.settings import settings
 
+CONSOLE_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+FILE_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record; fields passed with extra= (stage, duration_ms, ...) are included"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in self.RESERVED)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the queue listener when batched"""
+
+    def __init__(self, batched: bool = False):
+        super().__init__()
+        self.batched = batched
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if not self.batched:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def compress_file(source: str, dest: str):
+    """gzip source to dest and remove source"""
+    try:
+        with open(source, 'rb') as f_in, gzip.open(dest + '.tmp', 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(dest + '.tmp', dest)
+        os.remove(source)
+    except OSError as e:
+        print(f"Could not compress log file {source}: {e}", file=sys.stderr)
+
+
+class LogFileHandler(RotatingFileHandler):
+    """Size-rotated log file with batched writes and gzip-compressed backups
+
+    The file size is tracked in memory instead of seeking the stream for
+    every record, so writes stay buffered until the queue listener flushes
+    a batch. With compress=True rotated files become app.log.N.gz; the
+    compression runs on its own thread.
+    """
+
+    def __init__(self, filename, max_bytes: int = 0, backup_count: int = 0,
+                 batched: bool = False, compress: bool = False):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.batched = batched
+        self.compress = compress
+        if compress:
+            self.namer = lambda name: name + '.gz'
+        self._size = os.path.getsize(self.baseFilename) if os.path.isfile(self.baseFilename) else 0
+        self._compressor = None
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.maxBytes > 0 and self._size and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._size += len(msg)
+            if not self.batched:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self, source, dest):
+        if not self.compress or not os.path.exists(source):
+            return super().rotate(source, dest)
+        pending = dest[:-len('.gz')]
+        os.rename(source, pending)
+        self._compressor = threading.Thread(target=compress_file, args=(pending, dest),
+                                            name="log-compress", daemon=True)
+        self._compressor.start()
+
+    def _wait_for_compression(self):
+        if self._compressor:
+            self._compressor.join()
+            self._compressor = None
+
+    def doRollover(self):
+        self._wait_for_compression()  # backups are renamed next; the last archive must be complete
+        super().doRollover()
+        self._size = 0
+
+    def close(self):
+        self._wait_for_compression()
+        super().close()
+
+
+class RecordQueueHandler(QueueHandler):
+    """Hands records to the listener thread without formatting them"""
+
+    def prepare(self, record):
+        # Merge the arguments now so later changes to them can't alter the message. This
+        # renders the same text for every handler, so the record isn't copied; the listener
+        # runs in this process, so exc_info can travel as is
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers once per batch instead of once per record
+
+    A batch ends when the queue runs empty or after batch_size records.
+    """
+
+    def __init__(self, record_queue, *handlers, batch_size: int = 500):
+        super().__init__(record_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self._unflushed = 0
+
+    def dequeue(self, block):
+        if self._unflushed >= self.batch_size:
+            self.flush()
+        try:
+            record = self.queue.get_nowait()
+        except queue.Empty:
+            self.flush()
+            record = self.queue.get(block)
+        self._unflushed += 1
+        return record
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+        self._unflushed = 0
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+
+_lock = threading.Lock()
+_handlers = None
+_listener = None
+
+
+def _output_handlers(log_level):
+    """Console and file handlers shared by every logger set up here"""
+    console_handler = ConsoleHandler(batched=settings.LOG_ASYNC)
+    console_handler.setLevel(log_level)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    json_lines = settings.LOG_FORMAT == 'json'
+    settings.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    file_handler = LogFileHandler(
+        settings.LOGS_DIR / ("app.jsonl" if json_lines else "app.log"),
+        max_bytes=settings.LOG_MAX_SIZE,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        batched=settings.LOG_ASYNC,
+        compress=settings.LOG_COMPRESS
+    )
+    file_handler.setLevel(log_level)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(FILE_FORMAT))
+    return [console_handler, file_handler]
+
+
+def _get_handlers(log_level):
+    global _handlers, _listener
+    with _lock:
+        if _handlers is None:
+            outputs = _output_handlers(log_level)
+            if settings.LOG_ASYNC:
+                record_queue = queue.SimpleQueue()
+                _listener = BatchingQueueListener(record_queue, *outputs, batch_size=settings.LOG_BATCH_SIZE)
+                _listener.start()
+                atexit.register(stop_logging)
+                _handlers = [RecordQueueHandler(record_queue)]
+            else:
+                _handlers = outputs
+        return _handlers
+
+
+def stop_logging():
+    """Write out everything still queued and stop the listener thread (runs at exit)"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
 def setup_logger(name=None):
-    """Set up logging for the project"""
+    """Set up logging for the project
+
+    With LOG_ASYNC (the default) a logger only puts records on a queue; a
+    QueueListener thread formats them and writes them to the console and
+    LOGS_DIR in batches, so logging in hot loops doesn't wait on I/O or
+    rotation. LOG_FORMAT=json writes app.jsonl instead of app.log, and
+    LOG_COMPRESS gzips rotated files.
+    """
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
+
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    
+
     # Prevent duplicate handlers
     if not logger.handlers:
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(log_level)
-        console_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
-        
-        # File handler
-        log_file = settings.LOGS_DIR / "app.log"
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=settings.LOG_MAX_SIZE,
-            backupCount=settings.LOG_BACKUP_COUNT
-        )
-        file_handler.setLevel(log_level)
-        file_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s')
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-    
+        for handler in _get_handlers(log_level):
+            logger.addHandler(handler)
+
     return logger
 
+
+@contextmanager
+def log_stage(logger, stage: str, level: int = logging.DEBUG, **fields):
+    """Log how long the block took; stage and duration_ms become fields in JSON Lines output"""
+    enabled = logger.isEnabledFor(level)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if enabled:
+            duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            logger.log(level, f"{stage} took {duration_ms:.1f} ms",
+                       extra={'stage': stage, 'duration_ms': duration_ms, **fields})
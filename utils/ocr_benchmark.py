@@ -0,0 +1,175 @@
+"""Benchmark OCR preprocessing settings
+
+Usage: python -m utils.ocr_benchmark [folder | --generated]
+
+Benchmarks the images in folder, by default the captures in SCREENSHOTS_DIR
+(data/screenshots holds the repo's samples). For each preprocessing
+configuration the script reports time per megapixel (preprocessing and
+OCR), mean word confidence and recognized words, and how those compare with
+the unpreprocessed run. Images with a ground-truth sidecar
+(<image name>.gt.txt) also get a character accuracy. --generated uses
+screen-like images with known text instead.
+"""
+import io
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+from config.settings import settings, get_screenshots_dir
+from core.ocr_processor import OCRPreprocessor, data_lines, lines_to_text, ocr_config, uncompressed
+
+CONFIGURATIONS = [
+    [],
+    ['grayscale'],
+    ['grayscale', 'crop'],
+    ['grayscale', 'crop', 'scale'],
+    ['grayscale', 'crop', 'threshold'],
+    ['grayscale', 'crop', 'scale', 'threshold'],
+]
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+WORDS = ("file organizer screenshot monitor backup desktop window terminal settings status "
+         "report invoice meeting project release update error warning download folder").split()
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def _sample(background, foreground, font_size: int, margin: int, jpeg_quality: Optional[int] = None,
+            header=None, seed: int = 0) -> Tuple[Image.Image, str]:
+    rng = random.Random(seed)
+    image = Image.new("RGB", (1920, 1080), background)
+    draw = ImageDraw.Draw(image)
+    font = _font(font_size)
+    lines = []
+    y = margin
+    if header:
+        draw.rectangle((0, 0, image.width, margin + font_size * 2), fill=header[0])
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(3))
+        draw.text((margin, margin // 2 + font_size // 2), title, fill=header[1], font=font)
+        lines.append(title)
+        y += font_size * 2
+    while y < image.height * 0.6:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10)))
+        draw.text((margin, y), line, fill=foreground, font=font)
+        lines.append(line)
+        y += int(font_size * 1.6)
+    if jpeg_quality:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=jpeg_quality)
+        image = Image.open(io.BytesIO(buffer.getvalue()))
+        image.load()
+    return image, "\n".join(lines)
+
+
+def generated_samples() -> List[Tuple[str, Image.Image, str]]:
+    """Screen-like captures with known text"""
+    return [
+        ("light", *_sample("white", "black", 14, 240, seed=1)),
+        ("dark", *_sample((30, 30, 30), (212, 212, 212), 14, 120, seed=2)),
+        ("header", *_sample((245, 245, 245), (40, 40, 40), 16, 80, header=((0, 90, 180), "white"), seed=3)),
+        ("jpeg", *_sample("white", (20, 20, 20), 13, 160, jpeg_quality=40, seed=4)),
+    ]
+
+
+def folder_samples(folder: Path) -> List[Tuple[str, Image.Image, Optional[str]]]:
+    """Images in folder, with their ground truth when a .gt.txt sidecar exists"""
+    samples = []
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        truth_file = path.with_name(path.name + ".gt.txt")
+        with Image.open(path) as image:
+            image.load()
+        truth = truth_file.read_text(encoding="utf-8") if truth_file.exists() else None
+        samples.append((path.name, image, truth))
+    return samples
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def character_accuracy(text: str, truth: str) -> float:
+    text, truth = " ".join(text.split()), " ".join(truth.split())
+    if not truth:
+        return 1.0 if not text else 0.0
+    return max(0.0, 1 - edit_distance(text, truth) / len(truth))
+
+
+def recognize(image: Image.Image, dpi: Optional[int]) -> Tuple[str, List[float]]:
+    """Text and word confidences from one image_to_data pass"""
+    data = pytesseract.image_to_data(uncompressed(image), config=ocr_config(dpi),
+                                     output_type=pytesseract.Output.DICT)
+    lines = data_lines(data)
+    return lines_to_text(lines), [word[5] for line in lines for word in line]
+
+
+def run(samples: List[Tuple[str, Image.Image, Optional[str]]]):
+    if settings.TESSERACT_PATH:
+        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_PATH
+    has_tesseract = bool(shutil.which(pytesseract.pytesseract.tesseract_cmd))
+    if not has_tesseract:
+        print("tesseract not found: reporting preprocessing time only\n")
+    megapixels = sum(image.width * image.height for _, image, _ in samples) / 1e6
+    with_truth = sum(truth is not None for _, _, truth in samples)
+    print(f"{len(samples)} images ({with_truth} with ground truth), {megapixels:.1f} megapixels\n")
+    header = f"{'steps':<34}{'prep ms/MP':>12}"
+    if has_tesseract:
+        header += f"{'ocr ms/MP':>12}{'vs none':>9}{'conf':>7}{'vs none':>9}{'words':>7}{'accuracy':>10}"
+    print(header)
+    baseline = None
+    for steps in CONFIGURATIONS:
+        preprocessor = OCRPreprocessor(steps)
+        prep_time = ocr_time = 0.0
+        confidences, accuracies = [], []
+        for _, image, truth in samples:
+            start = time.perf_counter()
+            processed = preprocessor.apply(image)
+            prep_time += time.perf_counter() - start
+            if has_tesseract:
+                start = time.perf_counter()
+                text, word_confidences = recognize(processed, preprocessor.dpi)
+                ocr_time += time.perf_counter() - start
+                confidences += word_confidences
+                if truth is not None:
+                    accuracies.append(character_accuracy(text, truth))
+        name = ",".join(steps) or "none"
+        row = f"{name:<34}{prep_time * 1000 / megapixels:12.1f}"
+        if not has_tesseract:
+            print(row)
+            continue
+        total_time = prep_time + ocr_time
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        if baseline is None:
+            baseline = (total_time, confidence)  # the first configuration is the unpreprocessed run
+        speedup = baseline[0] / total_time if total_time else 0.0
+        accuracy_column = f"{sum(accuracies) / len(accuracies):10.1%}" if accuracies else f"{'-':>10}"
+        print(f"{row}{ocr_time * 1000 / megapixels:12.1f}{speedup:8.2f}x"
+              f"{confidence:7.1f}{confidence - baseline[1]:+9.1f}{len(confidences):7}{accuracy_column}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--generated":
+        samples = generated_samples()
+    else:
+        folder = Path(sys.argv[1]) if len(sys.argv) > 1 else get_screenshots_dir()
+        samples = folder_samples(folder) if folder.is_dir() else []
+        if not samples:
+            sys.exit(f"No images found in {folder} (use --generated for synthetic samples)")
+    run(samples)